@@ -2,3 +2,4 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .s3 import S3Sink as s3
+from .s3 import S3MultipartSink as s3multipart
@@ -1,9 +1,12 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import zlib
 import string
 import random
+import collections
 from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
 from utils import S3Client
 from utils.helpers import (
     logger,
@@ -28,6 +31,9 @@ class S3Sink(AbstractSink):
         self.prefix = f"{context['prefix'].strip('/')}/year={datetime.now().strftime('%Y')}/month={datetime.now().strftime('%m')}/day={datetime.now().strftime('%d')}"
         self.extension = "gz"
 
+    def _get_s3_object_name(self) -> str:
+        return f'{datetime.now().strftime("%Y-%m-%d-%H-%M-%S")}-{"".join(random.choices(string.ascii_letters + string.digits, k=8))}.{self.extension}'  # NOSONAR
+
     def process(self, source: AbstractSource) -> Status:
         """_summary_
 
@@ -38,7 +44,7 @@ class S3Sink(AbstractSink):
         local_work_path = make_local_work_dir()
 
         try:
-            s3_object_name = f'{datetime.now().strftime("%Y-%m-%d-%H-%M-%S")}-{"".join(random.choices(string.ascii_letters + string.digits, k=8))}.gz'  # NOSONAR
+            s3_object_name = self._get_s3_object_name()
             output_file_path = local_work_path / s3_object_name
 
             output_file_object = file_writer(output_file_path, extension=self.extension)
@@ -65,3 +71,189 @@ class S3Sink(AbstractSink):
 
         clean_local_download_dir(local_work_path)
         return status
+
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class MultipartObjectWriter:
+
+    def __init__(
+        self,
+        s3_client: S3Client,
+        bucket: str,
+        key: str,
+        executor: ThreadPoolExecutor,
+        part_size: int = 8 * 1024 * 1024,
+        max_pending_parts: int = 4,
+    ) -> None:
+        """Compress records into a gzip stream and upload it to S3 by multipart upload, a part is uploaded in the
+           executor as soon as part_size compressed bytes are buffered, so neither the whole object nor the
+           uncompressed data is kept in memory or on disk.
+
+        Args:
+            s3_client (S3Client): S3 client.
+            bucket (str): The bucket name.
+            key (str): The object key.
+            executor (ThreadPoolExecutor): The executor used to upload parts.
+            part_size (int, optional): The minimum size of each part except the last one. Defaults to 8 MiB.
+            max_pending_parts (int, optional): The maximum number of parts uploading at the same time, writing is
+                blocked when the limit is reached. Defaults to 4.
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.executor = executor
+        self.part_size = part_size
+        self.max_pending_parts = max_pending_parts
+        self.upload_id = ""
+        self.records = 0
+        self.size = 0
+        self._compressor = zlib.compressobj(wbits=31)
+        self._buffer = bytearray()
+        self._part_number = 0
+        self._parts = []
+        self._pending: collections.deque[Future] = collections.deque()
+
+    def write(self, record: str) -> None:
+        data = self._compressor.compress(record.encode("utf-8"))
+        self.records += 1
+        if data:
+            self.size += len(data)
+            self._buffer += data
+            if len(self._buffer) >= self.part_size:
+                self._upload_part()
+
+    def _upload_part(self) -> None:
+        if not self.upload_id:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                bucket=self.bucket, key=self.key
+            )
+        self._part_number += 1
+        body, self._buffer = bytes(self._buffer), bytearray()
+        self._pending.append(
+            self.executor.submit(
+                self.s3_client.upload_part,
+                bucket=self.bucket,
+                key=self.key,
+                upload_id=self.upload_id,
+                part_number=self._part_number,
+                body=body,
+            )
+        )
+        while len(self._pending) > self.max_pending_parts:
+            self._parts.append(self._pending.popleft().result())
+
+    def close(self) -> None:
+        data = self._compressor.flush()
+        self.size += len(data)
+        self._buffer += data
+        self._upload_part()
+        while self._pending:
+            self._parts.append(self._pending.popleft().result())
+        self.s3_client.complete_multipart_upload(
+            bucket=self.bucket, key=self.key, upload_id=self.upload_id, parts=self._parts
+        )
+
+    def abort(self) -> None:
+        for future in self._pending:
+            future.cancel()
+        for future in self._pending:
+            if not future.cancelled():
+                future.exception()
+        self._pending.clear()
+        if self.upload_id:
+            self.s3_client.abort_multipart_upload(
+                bucket=self.bucket, key=self.key, upload_id=self.upload_id
+            )
+
+
+class S3MultipartSink(S3Sink):
+
+    def __init__(self, context: dict) -> None:
+        """Stream gzip compressed records into S3 multipart uploads, parts are uploaded in parallel, and a new object
+           is started when the current object exceeds maxObjectSize compressed bytes or maxRecords records.
+
+        Args:
+            context (dict): e.g. {"bucket": "logging-bucket", "prefix": "AWSLogs/RDS/", "role": "",
+                                  "partSize": 8388608, "maxObjectSize": 536870912, "maxRecords": 0, "maxWorkers": 4},
+                                  0 means no limit for maxObjectSize and maxRecords.
+        """
+        super().__init__(context=context)
+        self.part_size = max(int(context.get("partSize", 8 * 1024 * 1024)), MIN_PART_SIZE)
+        self.max_object_size = int(context.get("maxObjectSize", 512 * 1024 * 1024))
+        self.max_records = int(context.get("maxRecords", 0))
+        self.max_workers = max(int(context.get("maxWorkers", 4)), 1)
+        self.s3_objects = []
+
+    def _is_full(self, writer: MultipartObjectWriter) -> bool:
+        return (0 < self.max_records <= writer.records) or (
+            0 < self.max_object_size <= writer.size
+        )
+
+    def process(self, source: AbstractSource) -> Status:
+        """Write records of source to S3, several objects are written when the thresholds are exceeded.
+
+        Args:
+            source (AbstractSource): The source which yields records.
+
+        Returns:
+            Status: Status.SUCCEEDED if all objects are uploaded, otherwise Status.FAILED and the objects
+                uploaded by this call are deleted.
+        """
+        status = Status.RUNNING
+        writer = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for record in source.process():
+                    if writer is None:
+                        writer = MultipartObjectWriter(
+                            s3_client=self.s3_client,
+                            bucket=self.bucket,
+                            key=f"{self.prefix}/{self._get_s3_object_name()}",
+                            executor=executor,
+                            part_size=self.part_size,
+                            max_pending_parts=self.max_workers,
+                        )
+                    writer.write(record)
+
+                    if self._is_full(writer):
+                        writer.close()
+                        self.s3_objects.append(writer.key)
+                        logger.info(
+                            f"Successfully uploaded object {self.bucket}/{writer.key}, records: {writer.records}, size: {writer.size}."
+                        )
+                        writer = None
+
+                if writer is not None:
+                    writer.close()
+                    self.s3_objects.append(writer.key)
+                    logger.info(
+                        f"Successfully uploaded object {self.bucket}/{writer.key}, records: {writer.records}, size: {writer.size}."
+                    )
+                    writer = None
+                status = Status.SUCCEEDED
+            except Exception as e:
+                status = Status.FAILED
+                logger.error(f"Failed to upload file to S3: {e}")
+                if writer is not None:
+                    writer.abort()
+                self._delete_s3_objects()
+
+        return status
+
+    def _delete_s3_objects(self) -> None:
+        """Delete the objects completed before a failure, the records are written again on retry."""
+        if not self.s3_objects:
+            return
+        try:
+            self.s3_client.batch_delete_objects(
+                tasks=[
+                    {"source": {"bucket": self.bucket, "key": key}}
+                    for key in self.s3_objects
+                ]
+            )
+            self.s3_objects = []
+        except Exception as e:
+            logger.error(f"Failed to delete objects {self.s3_objects} in {self.bucket}: {e}")
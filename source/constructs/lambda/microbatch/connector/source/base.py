@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import re
-from typing import Iterator
+from typing import Iterator, Iterable
 
 
 class LogFormat(type):
@@ -19,14 +19,50 @@ class LogParser:
 
     def __init__(self, log_format: LogFormat):
         self.log_format = log_format
+        self._pattern = re.compile(self.log_format.PATTERN, self.log_format.FLAGS)
+
+    def _transform(self, matched: re.Match) -> dict:
+        return self.log_format._transform(
+            data=dict(zip(self.log_format.NAME, matched.groups()))
+        )
 
     def parse(self, string: str) -> Iterator[dict]:
-        for matched in re.finditer(
-            self.log_format.PATTERN, string, self.log_format.FLAGS
-        ):
-            yield self.log_format._transform(
-                data=dict(zip(self.log_format.NAME, matched.groups()))
-            )
+        for matched in self._pattern.finditer(string):
+            yield self._transform(matched=matched)
+
+    def parse_stream(
+        self, strings: Iterable[str], max_carry_size: int = 16 * 1024 * 1024
+    ) -> Iterator[dict]:
+        """Parse log data which arrives portion by portion, a record may be split across portions.
+
+        The last record matched in a portion may be incomplete, e.g. a multiline error log or slow query whose remaining
+        lines are in the next portion, so it is not returned but carried over and matched again together with the next
+        portion. Only one record is carried over at a time, so the parse is linear in the size of the log data.
+
+        Args:
+            strings (Iterable[str]): The portions of log data, in order.
+            max_carry_size (int, optional): The maximum size of text carried over to the next portion, the text which
+                does not match any record beyond this size is dropped at a line boundary. Defaults to 16 MiB.
+
+        Yields:
+            Iterator[dict]: The parsed records, the same as parse on the concatenated log data.
+        """
+        carry = ""
+        for string in strings:
+            buffer = f"{carry}{string}" if carry else string
+            last_matched = None
+            for matched in self._pattern.finditer(buffer):
+                if last_matched is not None:
+                    yield self._transform(matched=last_matched)
+                last_matched = matched
+
+            carry = buffer if last_matched is None else buffer[last_matched.start() :]
+            if len(carry) > max_carry_size:
+                idx = carry.find("\n", len(carry) - max_carry_size)
+                carry = carry[idx + 1 :] if idx != -1 else ""
+
+        if carry:
+            yield from self.parse(string=carry)
 
 
 class AbstractSource:
@@ -4,7 +4,10 @@
 import re
 import copy
 import json
+import queue
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, Union
 from utils import logger, CommonEnum, RDSClient, iso8601_strftime
 from source.base import LogFormat, LogParser, AbstractSource
@@ -218,13 +221,50 @@ class RDSSource(AbstractSource):
         self.filename_contains_set: set = set(context.get("FilenameContains", list()))
         self.log_file_marker: dict = context.get("LogFileMarker", dict())
         self.log_file_marker_expire_days = context.get("LogFileMarkerExpireDays", 3)
-
-    def _check_database_type(self, db_identifier: str) -> DatabaseType:
-        if self.rds_client.describe_db_cluster(db_cluster_identifier=db_identifier):
-            return DatabaseType.CLUSTER
+        self.topology: dict = context.get("Topology", dict())
+        self.topology_expire_minutes = context.get("TopologyExpireMinutes", 60)
+        self.max_workers = max(int(context.get("MaxWorkers", 8)), 1)
+        self._lock = threading.Lock()
+
+    def _get_topology(self, db_identifier: str) -> dict:
+        """Get the database type and the DB instances of the DB identifier. The topology is cached in the context, and
+           is refreshed after TopologyExpireMinutes, so that clusters are not described on every run.
+
+        Args:
+            db_identifier (str): The DB cluster identifier or DB instance identifier.
+
+        Returns:
+            dict: e.g. {"DatabaseType": "Cluster", "DBInstanceIdentifiers": ["instance-1"], "UpdatedAt": 1704357600484}
+        """
+        topology = self.topology.get(db_identifier, {})
+        if topology.get("UpdatedAt", 0) > (
+            self.current_epoch_time_in_ms - self.topology_expire_minutes * 60 * 1000
+        ):
+            return topology
+
+        topology = dict(
+            DatabaseType=DatabaseType.UNKNOWN.value,
+            DBInstanceIdentifiers=[],
+            UpdatedAt=self.current_epoch_time_in_ms,
+        )
+        db_cluster_info = self.rds_client.describe_db_cluster(
+            db_cluster_identifier=db_identifier
+        )
+        if db_cluster_info:
+            topology["DatabaseType"] = DatabaseType.CLUSTER.value
+            topology["DBInstanceIdentifiers"] = [
+                db_instance["DBInstanceIdentifier"]
+                for db_instance in db_cluster_info.get("DBClusterMembers", [])
+            ]
         elif self.rds_client.describe_db_instance(db_instance_identifier=db_identifier):
-            return DatabaseType.INSTANCE
-        return DatabaseType.UNKNOWN
+            topology["DatabaseType"] = DatabaseType.INSTANCE.value
+            topology["DBInstanceIdentifiers"] = [db_identifier]
+
+        if topology["DatabaseType"] != DatabaseType.UNKNOWN:
+            self.topology[db_identifier] = topology
+        else:
+            self.topology.pop(db_identifier, None)
+        return topology
 
     def _get_log_parser(
         self, log_file_name: str, engine: Engine, engine_version: str
@@ -250,19 +290,18 @@ class RDSSource(AbstractSource):
         else:
             return None
 
-    def _get_db_cluster_logs(self, db_cluster_identifier: str) -> Iterator[dict]:
-        db_clusters_info = self.rds_client.describe_db_cluster(
-            db_cluster_identifier=db_cluster_identifier
-        )
-        for db_instances in db_clusters_info["DBClusterMembers"]:
-            db_instance_identifier = db_instances["DBInstanceIdentifier"]
-            for log_entry in self._get_db_instance_logs(
-                db_instance_identifier=db_instance_identifier
-            ):
-                log_entry["db_cluster_identifier"] = db_cluster_identifier
-                yield log_entry
+    def _get_db_instance_log_file_tasks(
+        self, db_instance_identifier: str, db_cluster_identifier: str = ""
+    ) -> list[dict]:
+        """Describe the DB instance and list its log files once, return a task for each log file which has a LogParser.
+
+        Args:
+            db_instance_identifier (str): The DB instance identifier.
+            db_cluster_identifier (str, optional): The DB cluster identifier which the DB instance belongs to. Defaults to "".
 
-    def _get_db_instance_logs(self, db_instance_identifier: str) -> Iterator[dict]:
+        Returns:
+            list[dict]: The log file tasks, they can be processed by _get_log_file_logs independently.
+        """
         db_instance_info = self.rds_client.describe_db_instance(
             db_instance_identifier=db_instance_identifier
         )
@@ -276,7 +315,9 @@ class RDSSource(AbstractSource):
             filename_contains_set=self.filename_contains_set,
             file_last_written=self.last_written,
         )
-        for log_file_name in db_instance_log_files.keys():
+
+        log_file_tasks = []
+        for log_file_name, log_file_info in db_instance_log_files.items():
             parser = self._get_log_parser(
                 log_file_name=log_file_name,
                 engine=engine,
@@ -287,28 +328,55 @@ class RDSSource(AbstractSource):
                     f"No matching LogParser, DBInstanceIdentifier: {db_instance_identifier}, engine: {engine}, log file name: {log_file_name}."
                 )
                 continue
+            log_file_tasks.append(
+                dict(
+                    parser=parser,
+                    log_file_name=log_file_name,
+                    log_file_info=log_file_info,
+                    metadata=dict(
+                        db_cluster_identifier=db_cluster_identifier,
+                        db_instance_identifier=db_instance_identifier,
+                        engine=engine,
+                        engine_version=engine_version,
+                        endpoint_address=endpoint_address,
+                        endpoint_port=endpoint_port,
+                    ),
+                )
+            )
+        return log_file_tasks
+
+    def _get_log_file_logs(self, log_file_task: dict) -> Iterator[dict]:
+        metadata = log_file_task["metadata"]
+        db_instance_identifier = metadata["db_instance_identifier"]
+        log_file_name = log_file_task["log_file_name"]
 
+        with self._lock:
             marker = (
                 self.log_file_marker.get(db_instance_identifier, {})
                 .get(log_file_name, {})
                 .get("Marker")
             )
-            log_file = self.rds_client.download_db_log_file_portion(
+        log_file = dict(Marker="")
+
+        def _log_file_data() -> Iterator[str]:
+            for portion in self.rds_client.download_db_log_file_portions(
                 db_instance_identifier=db_instance_identifier,
                 log_file_name=log_file_name,
                 marker=marker,
-            )
-            for log_entry in parser.parse(string=log_file["LogFileData"]):
-                log_entry["db_cluster_identifier"] = ""
-                log_entry["db_instance_identifier"] = db_instance_identifier
-                log_entry["engine"] = engine
-                log_entry["engine_version"] = engine_version
-                log_entry["endpoint_address"] = endpoint_address
-                log_entry["endpoint_port"] = endpoint_port
-                yield log_entry
+            ):
+                log_file["Marker"] = portion["Marker"]
+                yield portion["LogFileData"]
+
+        for log_entry in log_file_task["parser"].parse_stream(
+            strings=_log_file_data()
+        ):
+            log_entry.update(metadata)
+            yield log_entry
+
+        with self._lock:
             self.log_file_marker.setdefault(db_instance_identifier, {})
             self.log_file_marker[db_instance_identifier][log_file_name] = (
-                db_instance_log_files[log_file_name]
+                log_file_task["log_file_info"]
             )
             self.log_file_marker[db_instance_identifier][log_file_name]["Marker"] = (
                 log_file["Marker"]
@@ -330,19 +398,76 @@ class RDSSource(AbstractSource):
                 tmp_log_file_marker.pop(db_instance_identifier)
         self.log_file_marker = tmp_log_file_marker
 
+    def _process_log_file_tasks(
+        self, executor: ThreadPoolExecutor, log_file_tasks: list[dict]
+    ) -> Iterator[str]:
+        """Process log files concurrently, the records are handed over to the caller through a bounded queue, so the
+           memory usage does not depend on the size of log files.
+        """
+        records = queue.Queue(maxsize=self.max_workers * 1000)
+        stopped = threading.Event()
+
+        def _put(record: Union[str, None]) -> None:
+            while not stopped.is_set():
+                try:
+                    records.put(record, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def _worker(log_file_task: dict) -> None:
+            try:
+                for log_entry in self._get_log_file_logs(log_file_task=log_file_task):
+                    if stopped.is_set():
+                        return
+                    _put(f"{json.dumps(log_entry)}\n")
+            finally:
+                _put(None)
+
+        futures = [
+            executor.submit(_worker, log_file_task) for log_file_task in log_file_tasks
+        ]
+        try:
+            finished = 0
+            while finished < len(futures):
+                record = records.get()
+                if record is None:
+                    finished += 1
+                    continue
+                yield record
+            for future in futures:
+                future.result()
+        finally:
+            stopped.set()
+
     def process(self) -> Iterator[str]:
+        db_instances = []
         for db_identifier in self.db_identifiers:
-            database_type = self._check_database_type(db_identifier=db_identifier)
-            logger.info(f"The DB Identifier: {db_identifier} is {database_type}.")
-
-            logs = []
-            if database_type == DatabaseType.CLUSTER:
-                logs = self._get_db_cluster_logs(db_cluster_identifier=db_identifier)
-            elif database_type == DatabaseType.INSTANCE:
-                logs = self._get_db_instance_logs(db_instance_identifier=db_identifier)
+            topology = self._get_topology(db_identifier=db_identifier)
+            logger.info(
+                f"The DB Identifier: {db_identifier} is {topology['DatabaseType']}."
+            )
+            db_cluster_identifier = (
+                db_identifier
+                if topology["DatabaseType"] == DatabaseType.CLUSTER
+                else ""
+            )
+            for db_instance_identifier in topology["DBInstanceIdentifiers"]:
+                db_instances.append((db_instance_identifier, db_cluster_identifier))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            log_file_tasks = []
+            for tasks in executor.map(
+                lambda x: self._get_db_instance_log_file_tasks(
+                    db_instance_identifier=x[0], db_cluster_identifier=x[1]
+                ),
+                db_instances,
+            ):
+                log_file_tasks.extend(tasks)
 
-            for log_entry in logs:
-                yield f"{json.dumps(log_entry)}\n"
+            yield from self._process_log_file_tasks(
+                executor=executor, log_file_tasks=log_file_tasks
+            )
 
         self._clean_expired_marker()
 
@@ -353,4 +478,7 @@ class RDSSource(AbstractSource):
             LastWritten=self.current_epoch_time_in_ms,
             LogFileMarker=self.log_file_marker,
             LogFileMarkerExpireDays=self.log_file_marker_expire_days,
+            Topology=self.topology,
+            TopologyExpireMinutes=self.topology_expire_minutes,
+            MaxWorkers=self.max_workers,
         )
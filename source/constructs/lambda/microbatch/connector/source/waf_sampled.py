@@ -32,9 +32,25 @@ class WAFSampledSource(AbstractSource):
             self.web_acl_names = []
         self.scope = context.get("scope", "REGIONAL")
         self.interval = int(context.get("interval", 1)) * 60
+        self.web_acls: dict = context.get("WebACLs", dict())
+        self.web_acls_expire_minutes = context.get("WebACLsExpireMinutes", 60)
+        self.max_workers = max(int(context.get("MaxWorkers", 8)), 1)
 
     def process(self) -> Iterator[str]:
         for log_entry in self.wafv2_client.get_sampled_requests_by_acl_names(
-            web_acl_names=self.web_acl_names, scope=self.scope, interval=self.interval
+            web_acl_names=self.web_acl_names,
+            scope=self.scope,
+            interval=self.interval,
+            cache=self.web_acls,
+            cache_expire_minutes=self.web_acls_expire_minutes,
+            max_workers=self.max_workers,
         ):
             yield f"{json.dumps(log_entry)}\n"
+
+    @property
+    def context(self):
+        return dict(
+            WebACLs=self.web_acls,
+            WebACLsExpireMinutes=self.web_acls_expire_minutes,
+            MaxWorkers=self.max_workers,
+        )
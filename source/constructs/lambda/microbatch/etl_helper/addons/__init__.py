@@ -8,6 +8,7 @@ from .helpers import (
     write_logs_to_ddb,
     execution_input_formatter,
     batch_update_partition,
+    batch_create_partition,
     etl_date_transform,
 )
 from .resources import (
@@ -3,8 +3,10 @@
 
 import os
 import re
+import copy
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Iterator
 from urllib.parse import unquote
 from utils.helpers import logger, iso8601_strftime
@@ -195,9 +197,11 @@ def batch_update_partition(
     action: str,
     work_group: str,
     output_location: str,
+    max_concurrency: int = 5,
 ) -> dict:
     """The S3 bucket prefix must follow the hive style partitioning format, scan S3 files, intercept partition paths,
        generate partition update statements, execute statements in batches, and write execution logs to DynamoDB.
+       The statements of different batches are independent, so up to max_concurrency statements run at the same time.
 
     :param param (Parameters): store all input parameters.
 
@@ -209,13 +213,9 @@ def batch_update_partition(
 
     partitioning_info = set()
     for content in contents:
-        object_key = content["Key"]
-        object_dirname = os.path.dirname(object_key)
-        partitioning_path = object_dirname[len(prefix) :]
-        partitioning_path = (
-            partitioning_path[1:] if partitioning_path[0] == "/" else partitioning_path
+        partitioning_info.add(
+            get_partitioning_path(object_key=content["Key"], prefix=prefix)
         )
-        partitioning_info.add(partitioning_path)
 
     alter_athena_partition_ddl = update_partition_ddl_generator(
         database=database,
@@ -225,13 +225,12 @@ def batch_update_partition(
     )
 
     results = {"status": "Succeeded", "totalSubTask": 0, "state": {}}
-    for ddl in alter_athena_partition_ddl:
-        query_execution_info = AWS_ATHENA.start_query_execution(
-            ddl,
-            work_group=work_group,
-            output_location=output_location,
-            asynchronous=False,
-        )
+    for query_execution_info in AWS_ATHENA.batch_start_query_execution(
+        list(alter_athena_partition_ddl),
+        work_group=work_group,
+        output_location=output_location,
+        max_concurrency=max_concurrency,
+    ):
         query_execution_status = AWS_ATHENA.get_query_execution_status(
             query_execution_info
         )
@@ -242,6 +241,15 @@ def batch_update_partition(
             results["state"][query_execution_state] = 0
         results["state"][query_execution_state] += 1
 
+    return summarize_sub_task_status(results=results)
+
+
+def summarize_sub_task_status(results: dict) -> dict:
+    """Set the status of a batch task according to the state of its sub tasks.
+
+    :param results (dict): The execution result summary, e.g. {"status": "Succeeded", "totalSubTask": 2, "state": {"Succeeded": 1, "Failed": 1}}.
+    :return: The execution result summary with status updated.
+    """
     succeeded_task = results["state"].get("Succeeded", 0)
     if succeeded_task == results["totalSubTask"]:
         results["status"] = "Succeeded"
@@ -253,6 +261,169 @@ def batch_update_partition(
     return results
 
 
+def get_partitioning_path(object_key: str, prefix: str) -> str:
+    """Intercept the hive style partitioning path of an object key, e.g. key is
+       centralized/aws_apigateway_logs_parquet/__ds__=2023-03-11/region=us-east-1/xxx.parquet and prefix is
+       centralized/aws_apigateway_logs_parquet, return __ds__=2023-03-11/region=us-east-1.
+
+    :param object_key (str): The key of S3 object.
+    :param prefix (str): The location prefix of table.
+    :return: partitioning path.
+    """
+    partitioning_path = os.path.dirname(object_key)[len(prefix) :]
+    return partitioning_path[1:] if partitioning_path[0] == "/" else partitioning_path
+
+
+def get_partition_watermark_meta_name(
+    database: str, table: str, bucket: str, prefix: str
+) -> str:
+    return f"PartitionWatermark:{database}.{table}:s3://{bucket}/{prefix}"
+
+
+def batch_create_partition(
+    bucket: str,
+    prefix: str,
+    partition_prefix: str,
+    database: str,
+    table: str,
+    batch_num: int = 100,
+    max_workers: int = 8,
+    lookback: datetime.timedelta = datetime.timedelta(minutes=15),
+) -> dict:
+    """Register partitions through Glue BatchCreatePartition instead of Athena DDL. Partitions are split into batches
+       of batch_num (BatchCreatePartition accepts up to 100 partitions per call) and the batches are created concurrently.
+       The LastModified of the newest object whose partition has been registered is stored in the metadata table as a
+       watermark, objects older than the watermark (minus lookback, to tolerate uploads that were in flight) are skipped
+       in the next run, and partitions already existing in the Data Catalog are counted as existed rather than failed.
+
+    :param bucket (str): The S3 bucket of table location.
+    :param prefix (str): The S3 prefix of table location, e.g. centralized/aws_apigateway_logs_parquet.
+    :param partition_prefix (str): The partition prefix to scan, e.g. __ds__=2023-03-11.
+    :param database (str): The name of the database.
+    :param table (str): The name of the table.
+    :param batch_num (int, optional): The number of partitions each BatchCreatePartition call contains. Defaults to 100.
+    :param max_workers (int, optional): The number of BatchCreatePartition calls run concurrently. Defaults to 8.
+    :param lookback (datetime.timedelta, optional): The overlap window before the watermark. Defaults to 15 minutes.
+
+    Returns:
+        dict: Returns the execution result summary of the partition update task.
+    """
+    results = {
+        "status": "Succeeded",
+        "totalSubTask": 0,
+        "state": {},
+        "partitions": {"Created": 0, "Existed": 0, "Failed": 0},
+    }
+
+    table_info = AWS_GLUE.get_table(database=database, name=table)
+    if not table_info:
+        logger.error(f"The table: {database}.{table} does not exist.")
+        results["status"] = "Failed"
+        return results
+
+    storage_descriptor = table_info["Table"]["StorageDescriptor"]
+    partition_keys = [x["Name"] for x in table_info["Table"].get("PartitionKeys", [])]
+
+    meta_name = get_partition_watermark_meta_name(
+        database=database, table=table, bucket=bucket, prefix=prefix
+    )
+    watermark_info = AWS_DDB_META.get(meta_name=meta_name) or {}
+    watermark = watermark_info.get("data", {}).get(partition_prefix)
+    watermark = datetime.datetime.fromisoformat(watermark) if watermark else None
+    latest_modified = watermark
+
+    full_partition_prefix = f"{prefix}/{partition_prefix}"
+    partitioning_info = set()
+    for content in AWS_S3.list_objects(bucket=bucket, prefix=full_partition_prefix):
+        last_modified = content["LastModified"]
+        if latest_modified is None or last_modified > latest_modified:
+            latest_modified = last_modified
+        if watermark is not None and last_modified <= watermark - lookback:
+            continue
+        partitioning_info.add(
+            get_partitioning_path(object_key=content["Key"], prefix=prefix)
+        )
+    logger.info(
+        f"Found {len(partitioning_info)} partitions to register in s3://{bucket}/{full_partition_prefix}, "
+        f"watermark: {watermark}."
+    )
+
+    partition_input_list = []
+    for partitioning_path in sorted(partitioning_info):
+        partition_spec = {}
+        for directory in partitioning_path.split("/"):
+            partition_spec[unquote(directory.split("=")[0])] = unquote(
+                "=".join(directory.split("=")[1:])
+            )
+        if set(partition_keys) - partition_spec.keys():
+            logger.warning(
+                f"The partitioning path: {partitioning_path} does not match partition keys: {partition_keys}, ignore it."
+            )
+            results["partitions"]["Failed"] += 1
+            continue
+        partition_storage_descriptor = copy.deepcopy(storage_descriptor)
+        partition_storage_descriptor["Location"] = (
+            f"s3://{bucket}/{prefix}/{partitioning_path}"
+        )
+        partition_input_list.append(
+            {
+                "Values": [partition_spec[key] for key in partition_keys],
+                "StorageDescriptor": partition_storage_descriptor,
+            }
+        )
+
+    def _batch_create_partition(partitions: list[dict]) -> dict:
+        state = {"Created": 0, "Existed": 0, "Failed": 0}
+        try:
+            response = AWS_GLUE.batch_create_partition(
+                database=database,
+                table_name=table,
+                partition_input_list=partitions,
+            )
+        except Exception as e:
+            logger.error(e)
+            state["Failed"] = len(partitions)
+            return state
+
+        for error in response.get("Errors", []):
+            if error["ErrorDetail"]["ErrorCode"] == "AlreadyExistsException":
+                state["Existed"] += 1
+            else:
+                logger.error(
+                    f"Failed to create partition: {error['PartitionValues']}, error: {error['ErrorDetail']}."
+                )
+                state["Failed"] += 1
+        state["Created"] = len(partitions) - state["Existed"] - state["Failed"]
+        return state
+
+    batches = [
+        partition_input_list[i : i + batch_num]
+        for i in range(0, len(partition_input_list), batch_num)
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for state in executor.map(_batch_create_partition, batches):
+            results["totalSubTask"] += 1
+            sub_task_state = "Failed" if state["Failed"] else "Succeeded"
+            results["state"][sub_task_state] = (
+                results["state"].get(sub_task_state, 0) + 1
+            )
+            for key, value in state.items():
+                results["partitions"][key] += value
+
+    results = summarize_sub_task_status(results=results)
+    if results["partitions"]["Failed"] > 0 and results["status"] == "Succeeded":
+        results["status"] = "PartlySucceeded"
+
+    if results["partitions"]["Failed"] == 0 and latest_modified is not None:
+        watermark_info.setdefault("data", {})[partition_prefix] = (
+            latest_modified.isoformat()
+        )
+        watermark_info["type"] = "PartitionWatermark"
+        AWS_DDB_META.put(meta_name=meta_name, item=watermark_info)
+
+    return results
+
+
 def update_partition_ddl_generator(
     database: str, table: str, partitioning_info: set, action="ADD", batch_num: int = 20
 ) -> Iterator[str]:
@@ -13,6 +13,7 @@ from addons import (
     get_item_by_execution_id,
     execution_input_formatter,
     batch_update_partition,
+    batch_create_partition,
     etl_date_transform,
     check_glue_environment,
 )
@@ -28,6 +29,11 @@ class API(CommonEnum):
     ETL_DATE_TRANSFORM = "ETL: DateTransform"
 
 
+class PartitionMode(CommonEnum):
+    ATHENA = "Athena"
+    GLUE = "Glue"
+
+
 class Parameters(ValidateParameters):
     """This class is used to parse ,validate and store all incoming parameters.
 
@@ -130,6 +136,12 @@ class Parameters(ValidateParameters):
         if self.parameters.action not in ("ADD", "DROP"):
             self.parameters.action = "ADD"
 
+        self.parameters.mode = parameters["parameters"].get(
+            "mode", PartitionMode.ATHENA
+        )
+        if self.parameters.mode not in list(PartitionMode.__members__.values()):
+            self.parameters.mode = PartitionMode.ATHENA
+
         AWS_S3.is_exists_bucket(self.parameters.location.bucket)
 
     def _api_etl_date_transform_parameter_check(self, parameters):
@@ -258,16 +270,28 @@ def lambda_handler(event, context) -> Union[None, dict]:
             task_token=param.task_token,
         )
     elif param.api == API.BATCH_UPDATE_PARTITION:
-        results = batch_update_partition(
-            bucket=param.parameters.location.bucket,
-            prefix=param.parameters.location.prefix,
-            partition_prefix=param.parameters.partition_prefix,
-            database=param.parameters.database,
-            table=param.parameters.table_name,
-            action=param.parameters.action,
-            work_group=param.parameters.work_group,
-            output_location=param.parameters.output_location,
-        )
+        if (
+            param.parameters.mode == PartitionMode.GLUE
+            and param.parameters.action == "ADD"
+        ):
+            results = batch_create_partition(
+                bucket=param.parameters.location.bucket,
+                prefix=param.parameters.location.prefix,
+                partition_prefix=param.parameters.partition_prefix,
+                database=param.parameters.database,
+                table=param.parameters.table_name,
+            )
+        else:
+            results = batch_update_partition(
+                bucket=param.parameters.location.bucket,
+                prefix=param.parameters.location.prefix,
+                partition_prefix=param.parameters.partition_prefix,
+                database=param.parameters.database,
+                table=param.parameters.table_name,
+                action=param.parameters.action,
+                work_group=param.parameters.work_group,
+                output_location=param.parameters.output_location,
+            )
         item["endTime"] = iso8601_strftime()
         item["data"] = results
         item["status"] = results["status"]
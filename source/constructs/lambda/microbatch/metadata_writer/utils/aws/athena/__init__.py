@@ -3,10 +3,14 @@
 
 import time
 import datetime
-from typing import Union
+import collections
+from typing import Union, Iterator
 from utils.helpers import logger, AWSConnection, iso8601_strftime
 
 
+QUERY_EXECUTION_FINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+
 class AthenaClient:
     """Amazon Athena Client, used to interact with Amazon Athena."""
 
@@ -36,6 +40,40 @@ class AthenaClient:
         )
         return response
 
+    def batch_get_query_execution(self, query_execution_ids: list[str]) -> dict:
+        """Returns the details of a single query execution or a list of up to 50 query executions.
+
+        @see: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/athena/client/batch_get_query_execution.html
+
+        :param query_execution_ids (list[str]): An array of query execution IDs, up to 50.
+
+        Returns: dict, when BatchGetQueryExecution is failed, all query execution IDs are returned in UnprocessedQueryExecutionIds.
+        """
+        response = {
+            "QueryExecutions": [],
+            "UnprocessedQueryExecutionIds": [],
+        }
+        try:
+            batch_query_execution_response = (
+                self._athena_client.batch_get_query_execution(
+                    QueryExecutionIds=query_execution_ids
+                )
+            )
+        except Exception as e:
+            logger.warning(e)
+            response["UnprocessedQueryExecutionIds"] = [
+                {"QueryExecutionId": query_execution_id}
+                for query_execution_id in query_execution_ids
+            ]
+            return response
+        response["QueryExecutions"] = batch_query_execution_response.get(
+            "QueryExecutions", []
+        )
+        response["UnprocessedQueryExecutionIds"] = batch_query_execution_response.get(
+            "UnprocessedQueryExecutionIds", []
+        )
+        return response
+
     def get_query_execution_status(self, execution_info: dict) -> dict:
         """The state of query execution via get_query_execution' response
 
@@ -84,34 +122,14 @@ class AthenaClient:
         Returns:
             dict: response
         """
-        kwargs = {}
-        if work_group is not None:
-            kwargs["WorkGroup"] = work_group
-        if output_location is not None:
-            kwargs["ResultConfiguration"] = {"OutputLocation": output_location}
-
-        logger.debug(
-            f"Starting Athena query execution, this queryString is {query_string}."
+        query_execution_id = self._submit_query_execution(
+            query_string=query_string,
+            work_group=work_group,
+            output_location=output_location,
         )
-        try:
-            query_execution_response = self._athena_client.start_query_execution(
-                QueryString=query_string, **kwargs
-            )
-        except Exception as e:
-            logger.error(e)
-            return {
-                "QueryExecution": {
-                    "QueryExecutionId": "",
-                    "Query": query_string,
-                    "Status": {
-                        "State": "FAILED",
-                        "SubmissionDateTime": datetime.datetime.now(datetime.UTC),
-                        "CompletionDateTime": datetime.datetime.now(datetime.UTC),
-                    },
-                }
-            }
+        if not query_execution_id:
+            return self._get_failed_query_execution(query_string=query_string)
 
-        query_execution_id = query_execution_response["QueryExecutionId"]
         if asynchronous is True:
             response = self.get_query_execution(query_execution_id=query_execution_id)
             logger.info(
@@ -121,10 +139,9 @@ class AthenaClient:
 
         while True:
             response = self.get_query_execution(query_execution_id)
-            if response["QueryExecution"]["Status"]["State"] in (
-                "SUCCEEDED",
-                "FAILED",
-                "CANCELLED",
+            if (
+                response["QueryExecution"]["Status"]["State"]
+                in QUERY_EXECUTION_FINAL_STATES
             ):
                 break
             # It is not recommended to modify it. When there are too many partitions, it is easy to cause lambda execution timeout.
@@ -134,6 +151,169 @@ class AthenaClient:
         )
         return response
 
+    def batch_start_query_execution(
+        self,
+        query_strings: list[str],
+        work_group: Union[str, None] = None,
+        output_location: Union[str, None] = None,
+        max_concurrency: int = 20,
+        interval: float = 1,
+        max_interval: float = 30,
+        backoff_rate: float = 2,
+        timeout: float = 240,
+    ) -> Iterator[dict]:
+        """Submit several independent SQL statements and poll them together, the response of each statement is returned as
+           soon as it finishes, so the returned order is the completion order rather than the order of query_strings.
+
+           At most max_concurrency statements are running at the same time, the running statements are polled by
+           BatchGetQueryExecution (up to 50 query executions per call). When no statement finishes in a poll, wait before
+           the next poll, the waiting time starts from interval and is multiplied by backoff_rate each time, up to max_interval.
+           When the statements are not finished after timeout seconds, the remaining statements are returned as FAILED.
+
+        :param query_strings (list[str]): SQL statements need to execution, they must not depend on each other.
+        :param work_group (Union[str, None], optional): Required when query_string is a DML statement. Defaults to None.
+        :param output_location (Union[str, None], optional): Required when query_string is a DML statement. Defaults to None.
+        :param max_concurrency (int, optional): The maximum number of running statements. Defaults to 20.
+        :param interval (float, optional): The initial polling interval in seconds. Defaults to 1.
+        :param max_interval (float, optional): The maximum polling interval in seconds. Defaults to 30.
+        :param backoff_rate (float, optional): The multiplier by which the polling interval increases. Defaults to 2.
+        :param timeout (float, optional): The maximum time in seconds to wait for all statements. Defaults to 240.
+
+        Yields:
+            Iterator[dict]: The response of each statement, it has the same format as get_query_execution's response.
+        """
+        pending = collections.deque(query_strings)
+        running = {}
+        delay = interval
+        deadline = time.monotonic() + timeout
+
+        while pending or running:
+            if time.monotonic() >= deadline:
+                logger.error(
+                    f"Query executions are not completed in {timeout} seconds, "
+                    f"{len(running)} running and {len(pending)} pending query executions are marked as failed."
+                )
+                for query_execution_id, query_string in running.items():
+                    yield self._get_failed_query_execution(
+                        query_string=query_string,
+                        query_execution_id=query_execution_id,
+                    )
+                for query_string in pending:
+                    yield self._get_failed_query_execution(query_string=query_string)
+                return
+
+            while pending and len(running) < max_concurrency:
+                query_string = pending.popleft()
+                query_execution_id = self._submit_query_execution(
+                    query_string=query_string,
+                    work_group=work_group,
+                    output_location=output_location,
+                )
+                if not query_execution_id:
+                    yield self._get_failed_query_execution(query_string=query_string)
+                    continue
+                running[query_execution_id] = query_string
+
+            if not running:
+                continue
+
+            finished = False
+            for query_execution in self._poll_query_executions(
+                query_executions=running.copy()
+            ):
+                if query_execution["Status"]["State"] in QUERY_EXECUTION_FINAL_STATES:
+                    running.pop(query_execution["QueryExecutionId"])
+                    finished = True
+                    logger.info(
+                        f"Query execution is completed, the response is {query_execution}."
+                    )
+                    yield {"QueryExecution": query_execution}
+            if finished:
+                delay = interval
+            elif running:
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                delay = min(delay * backoff_rate, max_interval)
+
+    def _poll_query_executions(
+        self, query_executions: dict[str, str], batch_size: int = 50
+    ) -> Iterator[dict]:
+        """Get the query executions in batches, the query executions which BatchGetQueryExecution can not process
+           are got by GetQueryExecution one by one, and are returned as FAILED when GetQueryExecution is failed too.
+
+        :param query_executions (dict[str, str]): The unique IDs of the query executions and their SQL statements.
+        :param batch_size (int, optional): The number of query executions each BatchGetQueryExecution call contains. Defaults to 50.
+
+        Yields:
+            Iterator[dict]: QueryExecution of each query execution id.
+        """
+        query_execution_ids = list(query_executions.keys())
+        for idx in range(0, len(query_execution_ids), batch_size):
+            response = self.batch_get_query_execution(
+                query_execution_ids=query_execution_ids[idx : idx + batch_size]
+            )
+            for query_execution in response["QueryExecutions"]:
+                yield query_execution
+            for unprocessed in response["UnprocessedQueryExecutionIds"]:
+                query_execution_id = unprocessed["QueryExecutionId"]
+                query_execution = self.get_query_execution(
+                    query_execution_id=query_execution_id
+                )["QueryExecution"]
+                if not query_execution["QueryExecutionId"]:
+                    query_execution = self._get_failed_query_execution(
+                        query_string=query_executions[query_execution_id],
+                        query_execution_id=query_execution_id,
+                    )["QueryExecution"]
+                yield query_execution
+
+    def _submit_query_execution(
+        self,
+        query_string: str,
+        work_group: Union[str, None] = None,
+        output_location: Union[str, None] = None,
+    ) -> str:
+        """Call start_query_execution to submit SQL statement.
+
+        :param query_string (str): SQL statement need to execution.
+        :param work_group (Union[str, None], optional): Required when query_string is a DML statement. Defaults to None.
+        :param output_location (Union[str, None], optional): Required when query_string is a DML statement. Defaults to None.
+
+        Returns:
+            str: query execution id, return empty string if the submission is failed.
+        """
+        kwargs = {}
+        if work_group is not None:
+            kwargs["WorkGroup"] = work_group
+        if output_location is not None:
+            kwargs["ResultConfiguration"] = {"OutputLocation": output_location}
+
+        logger.debug(
+            f"Starting Athena query execution, this queryString is {query_string}."
+        )
+        try:
+            query_execution_response = self._athena_client.start_query_execution(
+                QueryString=query_string, **kwargs
+            )
+        except Exception as e:
+            logger.error(e)
+            return ""
+        return query_execution_response["QueryExecutionId"]
+
+    @staticmethod
+    def _get_failed_query_execution(
+        query_string: str, query_execution_id: str = ""
+    ) -> dict:
+        return {
+            "QueryExecution": {
+                "QueryExecutionId": query_execution_id,
+                "Query": query_string,
+                "Status": {
+                    "State": "FAILED",
+                    "SubmissionDateTime": datetime.datetime.now(datetime.UTC),
+                    "CompletionDateTime": datetime.datetime.now(datetime.UTC),
+                },
+            }
+        }
+
     def get_named_query(self, named_query_id: str) -> dict:
         """Get a named query.
 
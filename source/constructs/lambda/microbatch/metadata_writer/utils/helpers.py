@@ -9,11 +9,13 @@ import boto3
 import types
 import shutil
 import logging
+import collections
 import urllib.parse
 from enum import Enum
 from pathlib import Path
 from datetime import datetime, UTC
 from botocore import config
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urlparse
 from typing import Union, TextIO, Callable
 from binaryornot.check import is_binary
@@ -395,18 +397,68 @@ def detect_file_extension_by_header(file_path: Path) -> str:
         return "text"
 
 
+_ENRICHMENT_WORKER = {}
+
+
+def _init_enrichment_worker(enrich_func: Callable, enrich_plugins: set) -> None:
+    _ENRICHMENT_WORKER["enrich_func"] = enrich_func
+    _ENRICHMENT_WORKER["enrich_plugins"] = enrich_plugins
+
+
+def _enrich_records(
+    records: list[str],
+    enrich_func: Union[Callable, None] = None,
+    enrich_plugins: Union[set, None] = None,
+) -> str:
+    """Enrich a chunk of records, the enriched records are joined so that they can be written at once.
+    When enrich_func is None, the function is run in a subprocess, and enrich_func and enrich_plugins are taken from
+    the subprocess initializer.
+    """
+    if enrich_func is None:
+        enrich_func = _ENRICHMENT_WORKER["enrich_func"]
+        enrich_plugins = _ENRICHMENT_WORKER["enrich_plugins"]
+    return "".join(
+        [enrich_func(record=record, enrich_plugins=enrich_plugins) for record in records]
+    )
+
+
+def _get_enrichment_executor(
+    max_workers: int, enrich_func: Callable, enrich_plugins: set
+) -> Union[ProcessPoolExecutor, None]:
+    if max_workers <= 1:
+        return None
+    try:
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_enrichment_worker,
+            initargs=(enrich_func, enrich_plugins),
+        )
+    except (OSError, NotImplementedError, ImportError) as e:
+        # e.g. AWS Lambda does not provide /dev/shm, multiprocessing.Queue is not supported.
+        logger.warning(
+            f"Can not create subprocesses for enrichment, fall back to the current process, the error message: {e}"
+        )
+        return None
+
+
 def enrichment(
     input_file_path: Path,
     output_file_path: Path,
     enrich_func: Callable,
     enrich_plugins: set = set(),
+    chunk_size: int = 1024 * 1024,
+    max_workers: int = 1,
 ) -> Path:
-    """Enrich data.
+    """Enrich data. The decompressed file is read and enriched in chunks of lines, when max_workers is greater than 1,
+    chunks are enriched in subprocesses and written in the original order, so the output is the same as enriching the
+    file line by line in the current process.
 
     :param input_file_path: The File input path.
     :param output_file_path: The file output path.
-    :param enrich_func: A callable function for data enrichment.
+    :param enrich_func: A callable function for data enrichment, it must be picklable when max_workers is greater than 1.
     :param enrich_plugins: A tuple of enrich plugins.
+    :param chunk_size: The approximate size of decompressed data in each chunk, in bytes.
+    :param max_workers: The number of subprocesses used to enrich data, 1 means enriching data in the current process.
 
     :return: output_file_path
     """
@@ -420,11 +472,32 @@ def enrichment(
         logger.error("Unsupported file extension, only gz, text is supported.")
         return input_file_path
 
+    input_file_object = file_reader(input_file_path.as_posix(), extension=extension)
     output_file_object = file_writer(output_file_path, extension=extension)
-    for record in file_reader(input_file_path.as_posix(), extension=extension):
-        output_file_object.write(
-            enrich_func(record=record, enrich_plugins=enrich_plugins)
-        )
+    chunks = iter(lambda: input_file_object.readlines(chunk_size), [])
+
+    executor = _get_enrichment_executor(
+        max_workers=max_workers, enrich_func=enrich_func, enrich_plugins=enrich_plugins
+    )
+    if executor is None:
+        for records in chunks:
+            output_file_object.write(
+                _enrich_records(
+                    records, enrich_func=enrich_func, enrich_plugins=enrich_plugins
+                )
+            )
+    else:
+        with executor:
+            # keep a bounded number of chunks in flight, the results are written in the submission order.
+            futures = collections.deque()
+            for records in chunks:
+                futures.append(executor.submit(_enrich_records, records))
+                if len(futures) >= max_workers * 2:
+                    output_file_object.write(futures.popleft().result())
+            while futures:
+                output_file_object.write(futures.popleft().result())
+
+    input_file_object.close()
     output_file_object.close()
 
     if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > 0:
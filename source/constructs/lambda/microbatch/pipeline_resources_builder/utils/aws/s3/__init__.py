@@ -99,12 +99,88 @@ class S3Client:
     def upload_file(self, filename: str, bucket: str, key: str) -> None:
         return self._s3_client.upload_file(Filename=filename, Bucket=bucket, Key=key)
 
+    def create_multipart_upload(self, bucket: str, key: str) -> str:
+        """Initiates a multipart upload and returns an upload ID.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/create_multipart_upload.html
+
+        :param bucket: The name of the bucket where the multipart upload is initiated.
+        :param key: Object key for which the multipart upload is to be initiated.
+        :return: The upload ID.
+        """
+        return self._s3_client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+
+    def upload_part(
+        self, bucket: str, key: str, upload_id: str, part_number: int, body: bytes
+    ) -> dict:
+        """Uploads a part in a multipart upload.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/upload_part.html
+
+        :param bucket: The name of the bucket to which the multipart upload was initiated.
+        :param key: Object key for which the multipart upload was initiated.
+        :param upload_id: Upload ID identifying the multipart upload whose part is being uploaded.
+        :param part_number: Part number of part being uploaded, a positive integer between 1 and 10,000.
+        :param body: Object data, each part except the last one must be at least 5 MiB.
+        :return: The part can be passed to complete_multipart_upload, e.g. {"ETag": "", "PartNumber": 1}.
+        """
+        response = self._s3_client.upload_part(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def complete_multipart_upload(
+        self, bucket: str, key: str, upload_id: str, parts: list[dict]
+    ) -> dict:
+        """Completes a multipart upload by assembling previously uploaded parts.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/complete_multipart_upload.html
+
+        :param bucket: Name of the bucket to which the multipart upload was initiated.
+        :param key: Object key for which the multipart upload was initiated.
+        :param upload_id: ID for the initiated multipart upload.
+        :param parts: The uploaded parts, e.g. [{"ETag": "", "PartNumber": 1}], they are sorted by PartNumber.
+        """
+        return self._s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": sorted(parts, key=lambda part: part["PartNumber"])
+            },
+        )
+
+    def abort_multipart_upload(self, bucket: str, key: str, upload_id: str) -> None:
+        """Aborts a multipart upload, the uploaded parts are deleted, exceptions are logged rather than raised.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/abort_multipart_upload.html
+
+        :param bucket: The bucket name to which the upload was taking place.
+        :param key: Key of the object for which the multipart upload was initiated.
+        :param upload_id: Upload ID that identifies the multipart upload.
+        """
+        try:
+            self._s3_client.abort_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to abort multipart upload, the bucket: {bucket}, key: {key}, upload id: {upload_id}, error: {e}"
+            )
+
     def batch_copy_objects(
         self,
         tasks: list[dict],
         delete_on_success: bool = False,
         enrich_func: Union[Callable, None] = None,
         enrich_plugins: set = set(),
+        enrich_max_workers: int = 1,
     ) -> Status:
         """Batch copy S3 files to another Bucket or prefix. When replication fails, there is no need to retry,
            just retry the next batch.
@@ -113,6 +189,9 @@ class S3Client:
             'destination': {'bucket': 'stagingbucket', 'key': 'archive/centralized/aws_apigateway_logs_gz/apigateway1.gz'}}]
         :param delete_on_success: When the value is True, the source file will be deleted after the copy is completed;
             when the value is False, the source file will not be deleted after the copy is completed.
+        :param enrich_func: A callable function for data enrichment, see utils.helpers.enrichment.
+        :param enrich_plugins: A tuple of enrich plugins.
+        :param enrich_max_workers: The number of subprocesses used to enrich each file.
         :return: None
         """
         logger.debug(
@@ -149,6 +228,7 @@ class S3Client:
                             / local_file_uid,
                             enrich_func=enrich_func,
                             enrich_plugins=enrich_plugins,
+                            max_workers=enrich_max_workers,
                         )
                     self._s3_client.upload_file(
                         Filename=local_output_filename.as_posix(),
@@ -10,14 +10,18 @@ from functools import cached_property
 from utils import logger
 
 
+ALB_PATTERN = '([^ ]*) ([^ ]*) ([^ ]*) ([^ ]*):([0-9]*) ([^ ]*)[:-]([0-9]*) ([-.0-9]*) ([-.0-9]*) ([-.0-9]*) (|[-0-9]*) (-|[-0-9]*) ([-0-9]*) ([-0-9]*) "([^ ]*) (.*) (- |[^ ]*)" "([^"]*)" ([A-Z0-9-_]+) ([A-Za-z0-9.-]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^"]*)" ([-.0-9]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^ ]*)" "([^s]+?)" "([^s]+)" "([^ ]*)" "([^ ]*)"'
+ALB_REGEX = re.compile(ALB_PATTERN)
+
+
 class Alb(object):
 
     def __init__(self, record: str):
         self.field_delimiter = " "
         self.line_delimiter = "\n"
         self.record = record.strip(self.line_delimiter)
-        self.pattern = '([^ ]*) ([^ ]*) ([^ ]*) ([^ ]*):([0-9]*) ([^ ]*)[:-]([0-9]*) ([-.0-9]*) ([-.0-9]*) ([-.0-9]*) (|[-0-9]*) (-|[-0-9]*) ([-0-9]*) ([-0-9]*) "([^ ]*) (.*) (- |[^ ]*)" "([^"]*)" ([A-Z0-9-_]+) ([A-Za-z0-9.-]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^"]*)" ([-.0-9]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^ ]*)" "([^s]+?)" "([^s]+)" "([^ ]*)" "([^ ]*)"'
-        self.match = re.match(pattern=self.pattern, string=self.record)
+        self.pattern = ALB_PATTERN
+        self.match = ALB_REGEX.match(self.record)
 
     def is_record(self) -> bool:
         if self.match is not None:
@@ -43,30 +47,23 @@ class CloudFront(object):
         self.field_delimiter = "\t"
         self.line_delimiter = "\n"
         self.record = record.strip(self.line_delimiter)
+        self.fields = self.record.split(self.field_delimiter)
 
     def is_record(self) -> bool:
         if self.record.startswith("#Version") or self.record.startswith("#Fields"):
             return False
-        elif len(self.record.split(self.field_delimiter)) == 33:
+        elif len(self.fields) == 33:
             return True
         else:
             return False
 
     @cached_property
     def ip_address(self) -> str:
-        return (
-            self.record.split(self.field_delimiter)[4]
-            if len(self.record.split(self.field_delimiter)) >= 5
-            else ""
-        )
+        return self.fields[4] if len(self.fields) >= 5 else ""
 
     @cached_property
     def user_agent(self) -> str:
-        return (
-            self.record.split(self.field_delimiter)[10]
-            if len(self.record.split(self.field_delimiter)) >= 11
-            else ""
-        )
+        return self.fields[10] if len(self.fields) >= 11 else ""
 
     def enrich_record(self, enrich_data: dict) -> str:
         return f'{self.field_delimiter.join([self.record, json.dumps(enrich_data, separators=(",", ":"))])}{self.line_delimiter}'
@@ -80,7 +77,7 @@ SOURCE_PARSER_MAPPING = {
 
 class EnrichProcessor:
 
-    def __init__(self, source_type: str):
+    def __init__(self, source_type: str, cache_size: int = 65536):
         if source_type not in SOURCE_PARSER_MAPPING.keys():
             raise ValueError(
                 f"Do not supported source type: {source_type}. Supported source type: {list(SOURCE_PARSER_MAPPING.keys())}."
@@ -88,6 +85,37 @@ class EnrichProcessor:
 
         self.source_type = source_type
         self.source_parser_cls = SOURCE_PARSER_MAPPING[source_type]
+        # The same client ip address and user agent appear in many records, the enriched data is cached by them,
+        # a cache is cleared when it is full, cache_size <= 0 disables the cache.
+        self.cache_size = cache_size
+        self._geo_ip_cache = {}
+        self._user_agent_cache = {}
+        self._plugins_cache = {}
+
+    def __getstate__(self) -> dict:
+        # MaxMind DB reader can not be pickled, it is reopened in the subprocess when needed.
+        state = self.__dict__.copy()
+        state.pop("maxminddb_reader", None)
+        return state
+
+    def _get_plugins(self, enrich_plugins: set) -> list[str]:
+        key = frozenset(enrich_plugins)
+        if key not in self._plugins_cache:
+            self._plugins_cache[key] = [
+                plugin for plugin in sorted(enrich_plugins) if hasattr(self, plugin)
+            ]
+        return self._plugins_cache[key]
+
+    @staticmethod
+    def _get_cached(cache: dict, key: str, func, cache_size: int) -> dict:
+        if cache_size <= 0:
+            return func()
+        if key in cache:
+            return cache[key]
+        if len(cache) >= cache_size:
+            cache.clear()
+        cache[key] = func()
+        return cache[key]
 
     def get_maxminddb_path(self) -> str:
         if os.environ.get("ENV", "LAMBDA") == "LAMBDA":
@@ -102,6 +130,14 @@ class EnrichProcessor:
         return maxminddb.open_database(database=maxminddb_path)
 
     def geo_ip(self, cls) -> dict:
+        return self._get_cached(
+            self._geo_ip_cache,
+            cls.ip_address,
+            lambda: self._geo_ip(cls),
+            self.cache_size,
+        )
+
+    def _geo_ip(self, cls) -> dict:
         enriched_data = {}
         try:
             # if address not found, AddressNotFoundError will be raised.
@@ -130,6 +166,14 @@ class EnrichProcessor:
         return enriched_data
 
     def user_agent(self, cls) -> dict:
+        return self._get_cached(
+            self._user_agent_cache,
+            cls.user_agent,
+            lambda: self._user_agent(cls),
+            self.cache_size,
+        )
+
+    def _user_agent(self, cls) -> dict:
         enriched_data = {}
 
         ua = user_agents.parse(user_agent_string=cls.user_agent)
@@ -160,9 +204,7 @@ class EnrichProcessor:
             if source_parser.is_record() is True:
                 enrich_data = {}
 
-                for plugin in sorted(enrich_plugins):
-                    if hasattr(self, plugin) is False:
-                        continue
+                for plugin in self._get_plugins(enrich_plugins):
                     enrich_data.update(getattr(self, plugin)(cls=source_parser))
 
                 return source_parser.enrich_record(enrich_data=enrich_data)
@@ -19,6 +19,7 @@ STAGING_BUCKET = os.environ["STAGING_BUCKET_NAME"]
 STAGING_BUCKET_PREFIX = os.environ["STAGING_BUCKET_PREFIX"]
 SOURCE_TYPE = os.environ["SOURCE_TYPE"].lower()
 ENRICHMENT_PLUGINS = [x for x in os.environ["ENRICHMENT_PLUGINS"].split(",") if x]
+ENRICHMENT_MAX_WORKERS = int(os.environ.get("ENRICHMENT_MAX_WORKERS", "1"))
 TTL_CACHE = TTLCache(maxsize=1024, ttl=900)
 
 
@@ -81,4 +82,5 @@ def lambda_handler(event, _):
         delete_on_success=False,
         enrich_func=enrichment_processor,
         enrich_plugins=set(ENRICHMENT_PLUGINS),
+        enrich_max_workers=ENRICHMENT_MAX_WORKERS,
     )
@@ -118,6 +118,36 @@ class GlueClient:
             DatabaseName=database, TableName=table_name
         )
 
+    def batch_create_partition(
+        self,
+        database: str,
+        table_name: str,
+        partition_input_list: list[dict],
+        catalog_id: Optional[str] = None,
+    ) -> dict:
+        """Creates one or more partitions in a batch operation, up to 100 partitions per call.
+
+        see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/glue/client/batch_create_partition.html
+
+        Args:
+            database (str): The name of the database in the catalog in which the table resides. For Hive compatibility, this name is entirely lowercase.
+            table_name (str): The name of the table for which to create partitions. For Hive compatibility, this name is entirely lowercase.
+            partition_input_list (list[dict]): A list of PartitionInput structures that define the partitions to be created.
+            catalog_id (optional): The ID of the catalog in which the partition is to be created.
+
+        Returns:
+            dict: The response contains Errors, a list of PartitionError, one for each partition which could not be created.
+        """
+        kwargs = dict(
+            DatabaseName=database,
+            TableName=table_name,
+            PartitionInputList=partition_input_list,
+        )
+        if catalog_id:
+            kwargs["CatalogId"] = catalog_id
+
+        return self._glue_client.batch_create_partition(**kwargs)
+
     def _convert_to_spark_sql_data_type(self, input_string: str) -> str:
         """Convert glue data type to spark sql data type.
 
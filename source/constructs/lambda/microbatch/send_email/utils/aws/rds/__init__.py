@@ -1,7 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from typing import Union
+from typing import Union, Iterator
 from datetime import datetime
 from utils.helpers import logger, AWSConnection
 
@@ -106,6 +106,37 @@ class RDSClient:
         Returns:
             dict: This data type is used as a response element to DownloadDBLogFilePortion
         """
+        response = dict(Marker="", LogFileData="", AdditionalDataPending=False)
+        log_file_data = []
+        for portion in self.download_db_log_file_portions(
+            db_instance_identifier=db_instance_identifier,
+            log_file_name=log_file_name,
+            marker=marker,
+        ):
+            response["Marker"] = portion["Marker"]
+            response["AdditionalDataPending"] = portion["AdditionalDataPending"]
+            log_file_data.append(portion["LogFileData"])
+        response["LogFileData"] = "".join(log_file_data)
+        return response
+
+    def download_db_log_file_portions(
+        self,
+        db_instance_identifier: str,
+        log_file_name: str,
+        marker: Union[str, None] = None,
+    ) -> Iterator[dict]:
+        """Downloads the specified log file portion by portion, each portion is up to 1 MB in size and is yielded as soon as
+           it is downloaded, so that the whole log file does not need to be held in memory.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/rds/client/download_db_log_file_portion.html
+
+        :param db_instance_identifier (str): The customer-assigned name of the DB instance that contains the log files you want to list.
+        :param log_file_name (str): The name of the log file to be downloaded.
+        :param marker (str, optional): The pagination token provided in the previous request or “0”. If the Marker parameter is specified the response includes only records beyond the marker until the end of the file or up to NumberOfLines.
+
+        Yields:
+            Iterator[dict]: Marker, LogFileData and AdditionalDataPending of each portion, the Marker of the last portion is the marker of the next download.
+        """
         kwargs = dict(
             DBInstanceIdentifier=db_instance_identifier,
             LogFileName=log_file_name,
@@ -113,18 +144,18 @@ class RDSClient:
         if marker:
             kwargs["Marker"] = marker
 
-        response = dict(Marker="", LogFileData="", AdditionalDataPending=False)
         try:
             paginator = self._rds_client.get_paginator("download_db_log_file_portion")
             for page_iterator in paginator.paginate(**kwargs):
-                response["Marker"] = page_iterator.get("Marker", "")
-                response["LogFileData"] += page_iterator["LogFileData"]
-                response["AdditionalDataPending"] = page_iterator.get(
-                    "AdditionalDataPending", False
+                yield dict(
+                    Marker=page_iterator.get("Marker", ""),
+                    LogFileData=page_iterator.get("LogFileData", ""),
+                    AdditionalDataPending=page_iterator.get(
+                        "AdditionalDataPending", False
+                    ),
                 )
         except Exception as e:
             logger.warning(f"Error while download DB Log File Portion: {e}")
-        return response
 
     def describe_db_instance_log_files(
         self,
@@ -132,7 +163,8 @@ class RDSClient:
         filename_contains_set: set = set(),
         file_last_written: int = int((datetime.now().timestamp() - 300) * 1000),
     ) -> dict:
-        """Using this API, you can get a list of DB log files for the DB Instance.
+        """Using this API, you can get a list of DB log files for the DB Instance. The log files are listed once and filtered
+           by filename_contains_set locally, rather than calling DescribeDBLogFiles once per filename pattern.
 
         :param db_instance_identifier (str): The user-supplied DB instance identifier or the Amazon Resource Name (ARN) of the DB instance.
         :param filename_contains_set (set): Filters the available log files for log file names that contain the specified string, default: set().
@@ -143,21 +175,16 @@ class RDSClient:
         """
         db_instance_log_files = dict()
 
-        if filename_contains_set:
-            for filename_contains in filename_contains_set:
-                log_files = self.describe_db_log_files(
-                    db_instance_identifier=db_instance_identifier,
-                    filename_contains=filename_contains,
-                    file_last_written=file_last_written,
-                )
-                for log_file in log_files["DescribeDBLogFiles"]:
-                    db_instance_log_files[log_file["LogFileName"]] = log_file
-        else:
-            log_files = self.describe_db_log_files(
-                db_instance_identifier=db_instance_identifier,
-                file_last_written=file_last_written,
-            )
-            for log_file in log_files["DescribeDBLogFiles"]:
-                db_instance_log_files[log_file["LogFileName"]] = log_file
+        log_files = self.describe_db_log_files(
+            db_instance_identifier=db_instance_identifier,
+            file_last_written=file_last_written,
+        )
+        for log_file in log_files["DescribeDBLogFiles"]:
+            if filename_contains_set and not any(
+                filename_contains in log_file["LogFileName"]
+                for filename_contains in filename_contains_set
+            ):
+                continue
+            db_instance_log_files[log_file["LogFileName"]] = log_file
 
         return db_instance_log_files
@@ -1,11 +1,22 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-from typing import Iterator
+import time
+import random
+from typing import Iterator, Union
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import ClientError
 from utils.helpers import logger, AWSConnection, iso8601_strftime
 
 
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "WAFLimitsExceededException",
+)
+
+
 class WAFV2Client:
     """Amazon WAFV2 Client, used to interact with Amazon WAF."""
 
@@ -55,52 +66,199 @@ class WAFV2Client:
                 web_acls.append(web_acl)
         return web_acls
 
+    def get_web_acl_metric_names(self, web_acl: dict, scope: str = "REGIONAL") -> list[str]:
+        """Retrieves the metric names of the web ACL and its rules which have SampledRequests enabled.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/wafv2/client/get_web_acl.html
+
+        :param web_acl (dict): The WebACLSummary of the web ACL, e.g. {"Name": "", "Id": "", "ARN": ""}.
+        :param scope (str): Specifies whether this is for an Amazon CloudFront distribution or for a regional application.
+
+        """
+        response = self._wafv2_client.get_web_acl(
+            Name=web_acl["Name"],
+            Scope=scope,
+            Id=web_acl["Id"],
+        )
+
+        rules = [response["WebACL"]]
+        rules.extend(response["WebACL"].get("Rules", []))
+
+        return [
+            rule["VisibilityConfig"]["MetricName"]
+            for rule in rules
+            if rule["VisibilityConfig"]["SampledRequestsEnabled"]
+        ]
+
+    def get_web_acls_metadata(
+        self,
+        web_acl_names: list[str],
+        scope: str = "REGIONAL",
+        cache: Union[dict, None] = None,
+        cache_expire_minutes: int = 60,
+    ) -> list[dict]:
+        """Retrieves the Name, Id, ARN and the metric names of rules with SampledRequests enabled of web ACLs, the metadata
+           is looked up in cache first, ListWebACLs and GetWebACL are only called for the web ACLs which are not cached
+           or expired. The cache is updated in place, so it can be persisted and passed in by the next run.
+
+        :param web_acl_names (list[str]): The names of the web ACLs to retrieve.
+        :param scope (str): Specifies whether this is for an Amazon CloudFront distribution or for a regional application.
+        :param cache (Union[dict, None], optional): The metadata of web ACLs retrieved before, keyed by web ACL name. Defaults to None.
+        :param cache_expire_minutes (int, optional): How long the cached metadata is valid. Defaults to 60.
+
+        Returns: list[dict], e.g. [{"Name": "", "Id": "", "ARN": "", "MetricNames": [], "UpdatedAt": 1704357600484}]
+        """
+        cache = {} if cache is None else cache
+        current_epoch_time_in_ms = int(datetime.now().timestamp() * 1000)
+        expired_epoch_time_in_ms = (
+            current_epoch_time_in_ms - cache_expire_minutes * 60 * 1000
+        )
+
+        for web_acl_name in list(cache.keys()):
+            if (
+                web_acl_name not in web_acl_names
+                or cache[web_acl_name].get("UpdatedAt", 0) <= expired_epoch_time_in_ms
+            ):
+                cache.pop(web_acl_name)
+
+        uncached_web_acl_names = [
+            web_acl_name for web_acl_name in web_acl_names if web_acl_name not in cache
+        ]
+        if uncached_web_acl_names:
+            for web_acl in self.get_web_acls_by_name(
+                web_acl_names=uncached_web_acl_names, scope=scope
+            ):
+                try:
+                    metric_names = self.get_web_acl_metric_names(
+                        web_acl=web_acl, scope=scope
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Error while get web ACL: {web_acl['Name']}, error: {e}"
+                    )
+                    continue
+                cache[web_acl["Name"]] = dict(
+                    Name=web_acl["Name"],
+                    Id=web_acl["Id"],
+                    ARN=web_acl["ARN"],
+                    MetricNames=metric_names,
+                    UpdatedAt=current_epoch_time_in_ms,
+                )
+
+        return [cache[name] for name in web_acl_names if name in cache]
+
+    def get_sampled_requests(
+        self,
+        web_acl_arn: str,
+        rule_metric_name: str,
+        scope: str,
+        time_window: dict,
+        max_items: int = 500,
+        max_attempts: int = 5,
+        interval: float = 1,
+        backoff_rate: float = 2,
+    ) -> list[dict]:
+        """Gets detailed information about a specified number of requests--a sample--that WAF randomly selects from among
+           the first 5,000 requests that your Amazon Web Services resource received during a time range. When the request
+           is throttled, retry with exponential backoff and jitter.
+
+        @see https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/wafv2/client/get_sampled_requests.html
+
+        :param web_acl_arn (str): The Amazon resource name (ARN) of the WebACL.
+        :param rule_metric_name (str): The metric name assigned to the Rule or RuleGroup dimension.
+        :param scope (str): Specifies whether this is for an Amazon CloudFront distribution or for a regional application.
+        :param time_window (dict): The start date and time and the end date and time of the range.
+        :param max_items (int, optional): The number of requests that you want WAF to return. Defaults to 500.
+        :param max_attempts (int, optional): The maximum number of attempts when the request is throttled. Defaults to 5.
+        :param interval (float, optional): The initial retry interval in seconds. Defaults to 1.
+        :param backoff_rate (float, optional): The multiplier by which the retry interval increases. Defaults to 2.
+
+        Returns: list[dict], the SampledRequests. The error is raised when the request fails, or it's still throttled
+                 after max_attempts attempts.
+        """
+        delay = interval
+        for attempt in range(1, max_attempts + 1):
+            try:
+                response = self._wafv2_client.get_sampled_requests(
+                    WebAclArn=web_acl_arn,
+                    RuleMetricName=rule_metric_name,
+                    Scope=scope,
+                    TimeWindow=time_window,
+                    MaxItems=max_items,
+                )
+                return response.get("SampledRequests", [])
+            except ClientError as e:
+                if (
+                    e.response["Error"]["Code"] not in THROTTLING_ERROR_CODES
+                    or attempt == max_attempts
+                ):
+                    logger.error(
+                        f"Error while get sampled requests, WebAclArn: {web_acl_arn}, RuleMetricName: {rule_metric_name}, error: {e}"
+                    )
+                    raise
+                time.sleep(random.uniform(0, delay))
+                delay = delay * backoff_rate
+        return []
+
     def get_sampled_requests_by_acl_names(
-        self, web_acl_names: list[str], scope: str = "REGIONAL", interval: int = 60
+        self,
+        web_acl_names: list[str],
+        scope: str = "REGIONAL",
+        interval: int = 60,
+        cache: Union[dict, None] = None,
+        cache_expire_minutes: int = 60,
+        max_workers: int = 8,
     ) -> Iterator[dict]:
-        """Use WEB ACL name to retrieve the log of the Rule with SampledRequests enabled.
+        """Use WEB ACL name to retrieve the log of the Rule with SampledRequests enabled. The sampled requests of rules
+           are fetched concurrently with the same time window, and each rule's requests are returned as soon as they arrive.
 
         :param web_acl_names (list[str]): The names of the web ACLs to retrieve.
         :param scope (str): Specifies whether this is for an Amazon CloudFront distribution or for a regional application.
         :param interval (int): The time interval for retrieving Sampled logs, in seconds.
+        :param cache (Union[dict, None], optional): The metadata of web ACLs, see get_web_acls_metadata. Defaults to None.
+        :param cache_expire_minutes (int, optional): How long the cached metadata is valid. Defaults to 60.
+        :param max_workers (int, optional): The maximum number of concurrent GetSampledRequests calls. Defaults to 8.
 
         """
-        web_acls = self.get_web_acls_by_name(web_acl_names, scope=scope)
-
-        for web_acl in web_acls:
-            response = self._wafv2_client.get_web_acl(
-                Name=web_acl["Name"],
-                Scope=scope,
-                Id=web_acl["Id"],
-            )
-
-            rules = [response["WebACL"]]
-            rules.extend(response["WebACL"]["Rules"])
-            if len(rules) == 0:
-                logger.info("No metrics found for %s", web_acl["Name"])
-                return []
-
-            for rule in rules:
-                if rule["VisibilityConfig"]["SampledRequestsEnabled"]:
-                    # Delay for 5 minute + interval
-                    response = self._wafv2_client.get_sampled_requests(
-                        WebAclArn=web_acl["ARN"],
-                        RuleMetricName=rule["VisibilityConfig"]["MetricName"],
-                        Scope=scope,
-                        TimeWindow={
-                            "StartTime": datetime.now()
-                            - timedelta(seconds=300 + interval),
-                            "EndTime": datetime.now() - timedelta(seconds=300),
-                        },
-                        MaxItems=500,
+        web_acls = self.get_web_acls_metadata(
+            web_acl_names=web_acl_names,
+            scope=scope,
+            cache=cache,
+            cache_expire_minutes=cache_expire_minutes,
+        )
+
+        # Delay for 5 minute + interval
+        now = datetime.now()
+        time_window = {
+            "StartTime": now - timedelta(seconds=300 + interval),
+            "EndTime": now - timedelta(seconds=300),
+        }
+
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            futures = {}
+            for web_acl in web_acls:
+                if not web_acl["MetricNames"]:
+                    logger.info("No metrics found for %s", web_acl["Name"])
+                    continue
+
+                for metric_name in web_acl["MetricNames"]:
+                    future = executor.submit(
+                        self.get_sampled_requests,
+                        web_acl_arn=web_acl["ARN"],
+                        rule_metric_name=metric_name,
+                        scope=scope,
+                        time_window=time_window,
                     )
+                    futures[future] = web_acl
 
-                    for req in response["SampledRequests"]:
-                        req["Timestamp"] = iso8601_strftime(
-                            req["Timestamp"],
-                            precision=6,
-                        )
-                        req["WebAclName"] = web_acl["Name"]
-                        req["WebAclArn"] = web_acl["ARN"]
-                        req["WebAclId"] = web_acl["Id"]
-                        yield req
+            for future in as_completed(futures):
+                web_acl = futures[future]
+                for req in future.result():
+                    req["Timestamp"] = iso8601_strftime(
+                        req["Timestamp"],
+                        precision=6,
+                    )
+                    req["WebAclName"] = web_acl["Name"]
+                    req["WebAclArn"] = web_acl["ARN"]
+                    req["WebAclId"] = web_acl["Id"]
+                    yield req
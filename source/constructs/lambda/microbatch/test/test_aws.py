@@ -2859,6 +2859,13 @@ class TestAthenaClient:
                     },
                     operation_name=operation_name,
                 )
+        elif operation_name == "BatchGetQueryExecution":
+            raise ClientError(
+                error_response={
+                    "Error": {"Code": "ThrottlingException", "Message": "Rate exceeded."}
+                },
+                operation_name=operation_name,
+            )
         elif operation_name == "CreateNamedQuery":
             if kwarg["name"] == "create_named_query_return_exception":
                 raise ClientError(
@@ -3163,6 +3170,212 @@ class TestAthenaClient:
             "CANCELLED",
         )
 
+    def test_batch_start_query_execution(self, mock_athena_context):
+        from utils.aws import AthenaClient
+        from unittest.mock import patch
+
+        output_location = os.environ["ATHENA_OUTPUT_LOCATION"]
+        work_group = os.environ["ATHENA_WORK_GROUP"]
+
+        athena_client = AthenaClient()
+
+        query_strings = [f"SELECT {i};" for i in range(3)]
+        responses = list(
+            athena_client.batch_start_query_execution(
+                query_strings,
+                work_group=work_group,
+                output_location=output_location,
+            )
+        )
+        assert sorted(x["QueryExecution"]["Query"] for x in responses) == query_strings
+        for response in responses:
+            assert response["QueryExecution"]["Status"]["State"] == "SUCCEEDED"
+            query_execution_status = athena_client.get_query_execution_status(
+                response
+            )
+            assert query_execution_status["state"] == "SUCCEEDED"
+
+        with patch(
+            "botocore.client.BaseClient._make_api_call", new=self.mock_athena_api_call
+        ):
+            responses = list(
+                athena_client.batch_start_query_execution(
+                    ["Not a SQL"],
+                    work_group=work_group,
+                    output_location=output_location,
+                )
+            )
+            assert len(responses) == 1
+            assert responses[0]["QueryExecution"]["QueryExecutionId"] == ""
+            assert responses[0]["QueryExecution"]["Status"]["State"] == "FAILED"
+
+            response = athena_client.batch_get_query_execution(["000000"])
+            assert response["QueryExecutions"] == []
+            assert response["UnprocessedQueryExecutionIds"] == [
+                {"QueryExecutionId": "000000"}
+            ]
+
+    def test_batch_start_query_execution_simulation(self):
+        import time
+        import collections
+        from utils.aws import AthenaClient
+
+        class FakeAthena:
+            """Simulate Athena, each query finishes duration seconds after it is submitted."""
+
+            def __init__(self, duration: float):
+                self.duration = duration
+                self.executions = {}
+                self.api_calls = collections.Counter()
+
+            def _query_execution(self, query_execution_id: str) -> dict:
+                query_string, submitted = self.executions[query_execution_id]
+                finished = time.monotonic() - submitted >= self.duration
+                return {
+                    "QueryExecutionId": query_execution_id,
+                    "Query": query_string,
+                    "Status": {
+                        "State": "SUCCEEDED" if finished else "RUNNING",
+                        "SubmissionDateTime": datetime.datetime.now(datetime.UTC),
+                    },
+                }
+
+            def start_query_execution(self, QueryString: str, **kwargs) -> dict:
+                self.api_calls["StartQueryExecution"] += 1
+                query_execution_id = str(uuid.uuid4())
+                self.executions[query_execution_id] = (QueryString, time.monotonic())
+                return {"QueryExecutionId": query_execution_id}
+
+            def get_query_execution(self, QueryExecutionId: str) -> dict:
+                self.api_calls["GetQueryExecution"] += 1
+                return {"QueryExecution": self._query_execution(QueryExecutionId)}
+
+            def batch_get_query_execution(self, QueryExecutionIds: list) -> dict:
+                self.api_calls["BatchGetQueryExecution"] += 1
+                assert len(QueryExecutionIds) <= 50
+                return {
+                    "QueryExecutions": [
+                        self._query_execution(x) for x in QueryExecutionIds
+                    ],
+                    "UnprocessedQueryExecutionIds": [],
+                }
+
+        query_strings = [f"ALTER TABLE t ADD PARTITION (p='{i}');" for i in range(60)]
+        athena_client = AthenaClient()
+
+        fake_athena = FakeAthena(duration=0.05)
+        athena_client._athena_client = fake_athena
+        start = time.monotonic()
+        for query_string in query_strings[:10]:
+            response = athena_client.start_query_execution(
+                query_string, asynchronous=False, interval=0.02
+            )
+            assert response["QueryExecution"]["Status"]["State"] == "SUCCEEDED"
+        serial_elapsed = time.monotonic() - start
+        serial_api_calls = sum(fake_athena.api_calls.values())
+
+        fake_athena = FakeAthena(duration=0.05)
+        athena_client._athena_client = fake_athena
+        start = time.monotonic()
+        responses = list(
+            athena_client.batch_start_query_execution(
+                query_strings, max_concurrency=60, interval=0.02, max_interval=0.1
+            )
+        )
+        batch_elapsed = time.monotonic() - start
+        batch_api_calls = sum(fake_athena.api_calls.values())
+        print(
+            f"serial: 10 queries, {serial_elapsed:.3f}s, {serial_api_calls} API calls; "
+            f"batch: 60 queries, {batch_elapsed:.3f}s, {batch_api_calls} API calls, {dict(fake_athena.api_calls)}."
+        )
+
+        assert len(responses) == 60
+        assert {x["QueryExecution"]["Query"] for x in responses} == set(query_strings)
+        assert fake_athena.api_calls["StartQueryExecution"] == 60
+        assert fake_athena.api_calls["GetQueryExecution"] == 0
+        # 6x more queries finish in less wall-clock time and with fewer polling calls than the serial polling.
+        assert batch_elapsed < serial_elapsed
+        assert batch_api_calls - 60 < serial_api_calls - 10
+
+        # with bounded concurrency, the next queries are submitted as soon as running queries finish.
+        fake_athena = FakeAthena(duration=0.05)
+        athena_client._athena_client = fake_athena
+        responses = list(
+            athena_client.batch_start_query_execution(
+                query_strings, max_concurrency=20, interval=0.01, max_interval=0.04
+            )
+        )
+        assert len(responses) == 60
+        assert fake_athena.api_calls["StartQueryExecution"] == 60
+        assert fake_athena.api_calls["BatchGetQueryExecution"] < 60
+
+    def test_batch_start_query_execution_unavailable(self):
+        from utils.aws import AthenaClient
+
+        class FakeAthena:
+            """Accept every query, but the query executions can never be got."""
+
+            def __init__(self, running: bool = False):
+                self.running = running
+                self.batch_get_calls = 0
+
+            def start_query_execution(self, QueryString: str, **kwargs) -> dict:
+                return {"QueryExecutionId": QueryString.split()[1].rstrip(";")}
+
+            def get_query_execution(self, QueryExecutionId: str) -> dict:
+                raise Exception("ThrottlingException")
+
+            def batch_get_query_execution(self, QueryExecutionIds: list) -> dict:
+                self.batch_get_calls += 1
+                if self.running:
+                    return {
+                        "QueryExecutions": [
+                            {
+                                "QueryExecutionId": x,
+                                "Query": f"SELECT {x};",
+                                "Status": {"State": "RUNNING"},
+                            }
+                            for x in QueryExecutionIds
+                        ],
+                        "UnprocessedQueryExecutionIds": [],
+                    }
+                raise Exception("ThrottlingException")
+
+        query_strings = [f"SELECT {i};" for i in range(3)]
+        athena_client = AthenaClient()
+
+        # the unprocessed query executions which GetQueryExecution can not get are returned as failed.
+        athena_client._athena_client = FakeAthena()
+        responses = list(
+            athena_client.batch_start_query_execution(query_strings, interval=0.01)
+        )
+        assert sorted(x["QueryExecution"]["Query"] for x in responses) == query_strings
+        assert {x["QueryExecution"]["QueryExecutionId"] for x in responses} == {
+            "0",
+            "1",
+            "2",
+        }
+        for response in responses:
+            assert response["QueryExecution"]["Status"]["State"] == "FAILED"
+
+        # the query executions which are not completed before the deadline are returned as failed.
+        fake_athena = FakeAthena(running=True)
+        athena_client._athena_client = fake_athena
+        responses = list(
+            athena_client.batch_start_query_execution(
+                query_strings, max_concurrency=2, interval=0.01, timeout=0.05
+            )
+        )
+        assert sorted(x["QueryExecution"]["Query"] for x in responses) == query_strings
+        assert sorted(x["QueryExecution"]["QueryExecutionId"] for x in responses) == [
+            "",
+            "0",
+            "1",
+        ]
+        for response in responses:
+            assert response["QueryExecution"]["Status"]["State"] == "FAILED"
+        assert fake_athena.batch_get_calls > 0
+
     def test_get_named_query(self, mock_athena_context):
         from utils.aws import AthenaClient
 
@@ -6954,6 +7167,50 @@ class TestRDSClient:
             )
             assert response["LogFileData"] == ""
 
+    def test_download_db_log_file_portions(self, mock_rds_context):
+        from unittest.mock import patch
+
+        self.init_default_parameter()
+
+        portions = {
+            None: {"Marker": "1", "LogFileData": "a\nb", "AdditionalDataPending": True},
+            "1": {"Marker": "2", "LogFileData": "c\n", "AdditionalDataPending": True},
+            "2": {"Marker": "3", "LogFileData": "d\n", "AdditionalDataPending": False},
+        }
+
+        def mock_api_call(self, operation_name, kwarg):
+            return portions[kwarg.get("Marker")]
+
+        with patch("botocore.client.BaseClient._make_api_call", new=mock_api_call):
+            response = list(
+                self.rds_client.download_db_log_file_portions(
+                    db_instance_identifier=self.aurora_mysql_instance_8,
+                    log_file_name="audit/audit.log",
+                )
+            )
+            assert [x["LogFileData"] for x in response] == ["a\nb", "c\n", "d\n"]
+            assert [x["Marker"] for x in response] == ["1", "2", "3"]
+            assert response[-1]["AdditionalDataPending"] is False
+
+            response = list(
+                self.rds_client.download_db_log_file_portions(
+                    db_instance_identifier=self.aurora_mysql_instance_8,
+                    log_file_name="audit/audit.log",
+                    marker="2",
+                )
+            )
+            assert [x["LogFileData"] for x in response] == ["d\n"]
+
+            response = self.rds_client.download_db_log_file_portion(
+                db_instance_identifier=self.aurora_mysql_instance_8,
+                log_file_name="audit/audit.log",
+            )
+            assert response == {
+                "Marker": "3",
+                "LogFileData": "a\nbc\nd\n",
+                "AdditionalDataPending": False,
+            }
+
     def test_describe_db_instance_log_files(self, mock_rds_context):
         from unittest.mock import patch
 
@@ -7022,3 +7279,251 @@ class TestWAFV2Client:
             )
             == []
         )
+
+    def test_get_web_acls_metadata(self, mock_wafv2_context):
+        from unittest.mock import patch
+
+        self.init_default_parameter()
+
+        cache = {}
+        web_acls = self.wafv2_client.get_web_acls_metadata(
+            web_acl_names=[self.web_acl_name_01, "do-not-exists"],
+            scope="CLOUDFRONT",
+            cache=cache,
+        )
+        assert len(web_acls) == 1
+        assert web_acls[0]["Name"] == self.web_acl_name_01
+        assert web_acls[0]["ARN"].startswith("arn:aws:wafv2:")
+        assert isinstance(web_acls[0]["MetricNames"], list)
+        assert list(cache.keys()) == [self.web_acl_name_01]
+
+        with patch.object(
+            self.wafv2_client, "get_web_acl_metric_names"
+        ) as mock_get_web_acl_metric_names:
+            assert (
+                self.wafv2_client.get_web_acls_metadata(
+                    web_acl_names=[self.web_acl_name_01],
+                    scope="CLOUDFRONT",
+                    cache=cache,
+                )
+                == web_acls
+            )
+            mock_get_web_acl_metric_names.assert_not_called()
+
+            self.wafv2_client.get_web_acls_metadata(
+                web_acl_names=[self.web_acl_name_02],
+                scope="CLOUDFRONT",
+                cache=cache,
+            )
+            assert mock_get_web_acl_metric_names.call_count == 1
+            assert list(cache.keys()) == [self.web_acl_name_02]
+
+        cache[self.web_acl_name_02]["UpdatedAt"] = 0
+        web_acls = self.wafv2_client.get_web_acls_metadata(
+            web_acl_names=[self.web_acl_name_02],
+            scope="CLOUDFRONT",
+            cache=cache,
+        )
+        assert web_acls[0]["Name"] == self.web_acl_name_02
+        assert cache[self.web_acl_name_02]["UpdatedAt"] > 0
+
+    def test_get_sampled_requests_by_acl_names(self):
+        import time
+        from unittest.mock import patch
+        import threading
+        import collections
+        from utils.aws.wafv2 import WAFV2Client
+        from botocore.exceptions import ClientError
+
+        class FakeWAFV2:
+            def __init__(self, web_acl_count, rule_count, latency):
+                self.web_acl_count = web_acl_count
+                self.rule_count = rule_count
+                self.latency = latency
+                self.api_calls = collections.Counter()
+                self.throttled = set()
+                self.lock = threading.Lock()
+
+            def list_web_acls(self, **kwargs):
+                with self.lock:
+                    self.api_calls["ListWebACLs"] += 1
+                time.sleep(self.latency)
+                return {
+                    "WebACLs": [
+                        {
+                            "Name": f"acl-{i}",
+                            "Id": f"id-{i}",
+                            "ARN": f"arn:aws:wafv2:us-east-1:123456789012:regional/webacl/acl-{i}/id-{i}",
+                        }
+                        for i in range(self.web_acl_count)
+                    ]
+                }
+
+            def get_web_acl(self, Name, Scope, Id):
+                with self.lock:
+                    self.api_calls["GetWebACL"] += 1
+                time.sleep(self.latency)
+                return {
+                    "WebACL": {
+                        "Name": Name,
+                        "VisibilityConfig": {
+                            "SampledRequestsEnabled": True,
+                            "MetricName": Name,
+                        },
+                        "Rules": [
+                            {
+                                "VisibilityConfig": {
+                                    "SampledRequestsEnabled": j % 4 != 3,
+                                    "MetricName": f"{Name}-rule-{j}",
+                                }
+                            }
+                            for j in range(self.rule_count)
+                        ],
+                    }
+                }
+
+            def get_sampled_requests(
+                self, WebAclArn, RuleMetricName, Scope, TimeWindow, MaxItems
+            ):
+                with self.lock:
+                    self.api_calls["GetSampledRequests"] += 1
+                    throttle = RuleMetricName.endswith("rule-0") and (
+                        RuleMetricName not in self.throttled
+                    )
+                    self.throttled.add(RuleMetricName)
+                time.sleep(self.latency)
+                if throttle:
+                    raise ClientError(
+                        {"Error": {"Code": "WAFLimitsExceededException"}},
+                        "GetSampledRequests",
+                    )
+                return {
+                    "SampledRequests": [
+                        {
+                            "Request": {"URI": f"/{RuleMetricName}/{k}"},
+                            "Weight": 1,
+                            "Timestamp": TimeWindow["EndTime"],
+                            "Action": "ALLOW",
+                        }
+                        for k in range(3)
+                    ]
+                }
+
+        web_acl_names = ["acl-0", "acl-1", "acl-2", "acl-3", "do-not-exists"]
+        wafv2_client = WAFV2Client()
+
+        results = {}
+        for max_workers in (1, 8):
+            fake_wafv2 = FakeWAFV2(web_acl_count=4, rule_count=8, latency=0.02)
+            wafv2_client._wafv2_client = fake_wafv2
+            cache = {}
+
+            start_time = time.time()
+            with patch("random.uniform", return_value=0.01):
+                requests = list(
+                    wafv2_client.get_sampled_requests_by_acl_names(
+                        web_acl_names=web_acl_names,
+                        scope="REGIONAL",
+                        cache=cache,
+                        max_workers=max_workers,
+                    )
+                )
+            duration = time.time() - start_time
+
+            results[max_workers] = dict(
+                requests=requests,
+                duration=duration,
+                api_calls=fake_wafv2.api_calls.copy(),
+            )
+
+            # 4 web ACLs * (1 web ACL + 6 rules with SampledRequests enabled) * 3 sampled requests
+            assert len(requests) == 4 * 7 * 3
+            assert fake_wafv2.api_calls["ListWebACLs"] == 1
+            assert fake_wafv2.api_calls["GetWebACL"] == 4
+            # each rule-0 is throttled once and retried.
+            assert fake_wafv2.api_calls["GetSampledRequests"] == 4 * 7 + 4
+            assert set(cache.keys()) == {"acl-0", "acl-1", "acl-2", "acl-3"}
+
+            # the metadata of web ACLs is cached, only GetSampledRequests are called in the next run.
+            fake_wafv2.api_calls.clear()
+            assert (
+                len(
+                    list(
+                        wafv2_client.get_sampled_requests_by_acl_names(
+                            web_acl_names=web_acl_names,
+                            scope="REGIONAL",
+                            cache=cache,
+                            max_workers=max_workers,
+                        )
+                    )
+                )
+                == 4 * 7 * 3
+            )
+            assert fake_wafv2.api_calls["ListWebACLs"] == 1
+            assert fake_wafv2.api_calls["GetWebACL"] == 0
+            assert fake_wafv2.api_calls["GetSampledRequests"] == 4 * 7
+
+        assert sorted(
+            (x["WebAclName"], x["Request"]["URI"]) for x in results[1]["requests"]
+        ) == sorted(
+            (x["WebAclName"], x["Request"]["URI"]) for x in results[8]["requests"]
+        )
+        assert results[8]["duration"] * 2 < results[1]["duration"]
+        assert results[1]["requests"][0]["WebAclName"] == "acl-0"
+        assert results[1]["requests"][0]["WebAclId"] == "id-0"
+
+    def test_get_sampled_requests(self):
+        from unittest.mock import patch
+        from utils.aws.wafv2 import WAFV2Client
+        from botocore.exceptions import ClientError
+
+        wafv2_client = WAFV2Client()
+        throttling_exception = ClientError(
+            {"Error": {"Code": "WAFLimitsExceededException"}}, "GetSampledRequests"
+        )
+        kwargs = dict(
+            web_acl_arn="arn",
+            rule_metric_name="metric",
+            scope="REGIONAL",
+            time_window={},
+            interval=0.01,
+        )
+
+        with patch.object(
+            wafv2_client._wafv2_client,
+            "get_sampled_requests",
+            side_effect=[throttling_exception, {"SampledRequests": [{"Weight": 1}]}],
+        ) as mock_get_sampled_requests:
+            assert wafv2_client.get_sampled_requests(**kwargs) == [{"Weight": 1}]
+            assert mock_get_sampled_requests.call_count == 2
+
+        with patch.object(
+            wafv2_client._wafv2_client,
+            "get_sampled_requests",
+            side_effect=throttling_exception,
+        ) as mock_get_sampled_requests:
+            with pytest.raises(ClientError):
+                wafv2_client.get_sampled_requests(**kwargs, max_attempts=3)
+            assert mock_get_sampled_requests.call_count == 3
+
+        # other errors are raised without retry instead of returning no sampled requests.
+        with patch.object(
+            wafv2_client._wafv2_client,
+            "get_sampled_requests",
+            side_effect=ClientError(
+                {"Error": {"Code": "WAFNonexistentItemException"}},
+                "GetSampledRequests",
+            ),
+        ) as mock_get_sampled_requests:
+            with pytest.raises(ClientError):
+                wafv2_client.get_sampled_requests(**kwargs)
+            assert mock_get_sampled_requests.call_count == 1
+
+        with patch.object(
+            wafv2_client._wafv2_client,
+            "get_sampled_requests",
+            side_effect=ValueError("invalid time window"),
+        ) as mock_get_sampled_requests:
+            with pytest.raises(ValueError):
+                wafv2_client.get_sampled_requests(**kwargs)
+            assert mock_get_sampled_requests.call_count == 1
@@ -12,6 +12,7 @@ from test.mock import (
     mock_iam_context,
     mock_ddb_context,
     mock_rds_context,
+    mock_s3_context,
     default_environment_variables,
 )
 
@@ -741,6 +742,121 @@ def test_parse_postgres_query_log(mock_rds_context):
     )
 
 
+def generate_rds_logs(log_type: str, size: int) -> str:
+    """Generate MySQL/PostgreSQL log fixtures with multiline records, about size characters."""
+    records = []
+    total, idx = 0, 0
+    while total < size:
+        second = f"{idx % 60:02d}"
+        if log_type == "slowquery":
+            record = (
+                f"# Time: 2024-01-03T07:15:{second}.660108Z\n"
+                f"# User@Host: admin[admin] @  [127.0.0.{idx % 255}]  Id: {idx}\n"
+                f"# Query_time: 2.000231  Lock_time: 0.000000 Rows_sent: 1  Rows_examined: {idx}\n"
+                f"use audit;\nSET timestamp=1704266136;\nselect *\nfrom t{idx}\n"
+                + "where a = 1\n" * (idx % 7)
+                + "limit 10;\n"
+            )
+        elif log_type == "error":
+            record = (
+                f"2023-11-28T09:13:{second}.112841Z {idx} [Note] [MY-010747] [Server] Plugin {idx} is disabled.\n"
+                + "231128  9:13:22 server_audit: Audit STARTED.\n" * (idx % 5)
+            )
+        elif log_type == "audit":
+            record = f"1703817810{idx % 1000000:06d},aurora-mysql-instance-1,rdsadmin,localhost,{idx},{idx},QUERY,mysql,'SELECT {idx}',0\n"
+        else:
+            record = (
+                f"2023-11-29 09:23:{second} UTC:10.0.2.55(57562):postgres@postgres:[{idx}]:LOG:  duration: {idx}.50 ms statement: SELECT d.datname as \"Name\",\n"
+                + '        pg_catalog.pg_get_userbyid(d.datdba) as "Owner",\n' * (idx % 6)
+                + "    ORDER BY 1;\n"
+            )
+        records.append(record)
+        total += len(record)
+        idx += 1
+    return "".join(records)
+
+
+@pytest.mark.parametrize(
+    "log_type, log_format_name",
+    [
+        ("slowquery", "MysqlSlowQueryLogFormat"),
+        ("error", "MysqlErrorLogFormat"),
+        ("audit", "AuroraMysqlAuditLogFormat"),
+        ("postgres", "PostgresQueryLogFormat"),
+    ],
+)
+def test_log_parser_parse_stream(log_type, log_format_name):
+    import time
+    import tracemalloc
+    from connector.source.rds import (
+        LogParser,
+        MysqlSlowQueryLogFormat,
+        MysqlErrorLogFormat,
+        AuroraMysqlAuditLogFormat,
+        PostgresQueryLogFormat,
+    )
+
+    log_formats = {
+        "MysqlSlowQueryLogFormat": MysqlSlowQueryLogFormat,
+        "MysqlErrorLogFormat": MysqlErrorLogFormat,
+        "AuroraMysqlAuditLogFormat": AuroraMysqlAuditLogFormat,
+        "PostgresQueryLogFormat": PostgresQueryLogFormat,
+    }
+    parser = LogParser(log_format=log_formats[log_format_name])
+    log_file_data = generate_rds_logs(log_type=log_type, size=1024 * 1024)
+    expected = list(parser.parse(string=log_file_data))
+    assert len(expected) > 1000
+
+    # records are split across portions at arbitrary positions.
+    portions = [log_file_data[i : i + 7] for i in range(0, 5000, 7)]
+    assert list(parser.parse_stream(strings=portions)) == list(
+        parser.parse(string="".join(portions))
+    )
+    for portion_size in (1000, 65536):
+        portions = [
+            log_file_data[i : i + portion_size]
+            for i in range(0, len(log_file_data), portion_size)
+        ]
+        assert list(parser.parse_stream(strings=portions)) == expected
+
+    # the carried over text is bounded, the parse does not keep the whole log data.
+    assert list(parser.parse_stream(strings=["no record\n" * 100], max_carry_size=50)) == []
+
+    portion_size = 128 * 1024
+    portions = [
+        log_file_data[i : i + portion_size]
+        for i in range(0, len(log_file_data), portion_size)
+    ]
+
+    def download_and_parse() -> int:
+        data = ""
+        for portion in portions:
+            data += portion
+        return sum(1 for _ in parser.parse(string=data))
+
+    def stream_parse() -> int:
+        return sum(1 for _ in parser.parse_stream(strings=iter(portions)))
+
+    benchmark = {}
+    for name, func in (("accumulate", download_and_parse), ("stream", stream_parse)):
+        start = time.perf_counter()
+        assert func() == len(expected)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        benchmark[name] = (elapsed, peak)
+    print(
+        f"{log_type}: {len(log_file_data)} bytes, {len(expected)} records, "
+        + ", ".join(
+            f"{name}: {elapsed * 1000:.1f} ms, peak {peak / 1024:.0f} KiB"
+            for name, (elapsed, peak) in benchmark.items()
+        )
+    )
+    assert benchmark["stream"][1] < benchmark["accumulate"][1] / 2
+
+
 def mock_rds_api_call(self, operation_name, kwarg):  # NOSONAR
     from test.mock import mock_rds_context, default_environment_variables
     from botocore.exceptions import ClientError
@@ -1035,41 +1151,6 @@ class TestRDSSource:
         assert rds_source.log_file_marker == {}
         assert rds_source.log_file_marker_expire_days == 3
 
-    def test_check_database_type(self, mock_rds_context):
-        from connector.source.rds import RDSSource, DatabaseType
-
-        aurora_mysql_cluster_8 = os.environ["AURORA_MYSQL8_CLUSTER_IDENTIFIER"]
-        aurora_postgresql_cluster = os.environ["AURORA_POSTGRESQL_CLUSTER_IDENTIFIER"]
-        mysql_instance_8 = os.environ["MYSQL8_INSTANCE_IDENTIFIER"]
-        postgresql_instance = os.environ["POSTGRESQL_INSTANCE_IDENTIFIER"]
-
-        context = dict(
-            DBIdentifiers=[
-                aurora_mysql_cluster_8,
-                aurora_postgresql_cluster,
-                "do-not-exists-cluster",
-                "do-not-exists-instance",
-            ],
-        )
-        rds_source = RDSSource(context=context)
-
-        assert (
-            rds_source._check_database_type(db_identifier=aurora_mysql_cluster_8)
-            == DatabaseType.CLUSTER
-        )
-        assert (
-            rds_source._check_database_type(db_identifier=aurora_postgresql_cluster)
-            == DatabaseType.CLUSTER
-        )
-        assert (
-            rds_source._check_database_type(db_identifier=mysql_instance_8)
-            == DatabaseType.INSTANCE
-        )
-        assert (
-            rds_source._check_database_type(db_identifier=postgresql_instance)
-            == DatabaseType.INSTANCE
-        )
-
     def test_get_log_parser(self):
         from connector.source.rds import (
             RDSSource,
@@ -1253,28 +1334,7 @@ class TestRDSSource:
             is None
         )
 
-    def test_get_db_cluster_logs(self, mock_rds_context):
-        from connector.source.rds import RDSSource
-        from unittest.mock import patch
-
-        aurora_mysql_cluster_8 = os.environ["AURORA_MYSQL8_CLUSTER_IDENTIFIER"]
-        aurora_postgresql_cluster = os.environ["AURORA_POSTGRESQL_CLUSTER_IDENTIFIER"]
-
-        context = dict(
-            DBIdentifiers=[
-                aurora_mysql_cluster_8,
-                aurora_postgresql_cluster,
-                "do-not-exists-cluster",
-                "do-not-exists-instance",
-            ],
-        )
-        rds_source = RDSSource(context=context)
-
-        with patch("botocore.client.BaseClient._make_api_call", new=mock_rds_api_call):
-            logs = list(rds_source.process())
-            assert len(logs) == 43
-
-    def test_get_db_instance_logs(self, mock_rds_context):
+    def test_process_db_instances(self, mock_rds_context):
         from connector.source.rds import RDSSource
         from unittest.mock import patch
 
@@ -1461,6 +1521,64 @@ class TestRDSSource:
             logs = list(rds_source.process())
             assert len(logs) == 43
 
+    def test_process_concurrently(self, mock_rds_context):
+        import time
+        import collections
+        from connector.source.rds import RDSSource
+        from unittest.mock import patch
+
+        aurora_mysql_cluster_8 = os.environ["AURORA_MYSQL8_CLUSTER_IDENTIFIER"]
+        postgresql_instance = os.environ["POSTGRESQL_INSTANCE_IDENTIFIER"]
+        db_identifiers = [
+            aurora_mysql_cluster_8,
+            postgresql_instance,
+            "do-not-exists-cluster",
+            "do-not-exists-instance",
+        ]
+
+        api_calls = collections.Counter()
+
+        def mock_rds_api_call_with_latency(self, operation_name, kwarg):
+            api_calls[operation_name] += 1
+            time.sleep(0.05)
+            return mock_rds_api_call(self, operation_name, kwarg)
+
+        with patch(
+            "botocore.client.BaseClient._make_api_call",
+            new=mock_rds_api_call_with_latency,
+        ):
+            rds_source = RDSSource(
+                context=dict(DBIdentifiers=db_identifiers, MaxWorkers=1)
+            )
+            start_time = time.time()
+            serial_logs = list(rds_source.process())
+            serial_duration = time.time() - start_time
+            serial_api_calls = api_calls.copy()
+
+            api_calls.clear()
+            rds_source = RDSSource(
+                context=dict(DBIdentifiers=db_identifiers, MaxWorkers=8)
+            )
+            start_time = time.time()
+            parallel_logs = list(rds_source.process())
+            parallel_duration = time.time() - start_time
+
+            assert len(serial_logs) == 43
+            assert sorted(parallel_logs) == sorted(serial_logs)
+            assert api_calls == serial_api_calls
+            assert parallel_duration < serial_duration
+
+            # the topology is cached in context, only the unknown DB identifiers are described again.
+            api_calls.clear()
+            rds_source = RDSSource(context=rds_source.context)
+            assert len(list(rds_source.process())) == 43
+            assert serial_api_calls["DescribeDBClusters"] == 4
+            assert api_calls["DescribeDBClusters"] == 2
+            assert (
+                api_calls["DescribeDBLogFiles"]
+                == serial_api_calls["DescribeDBLogFiles"]
+            )
+
     def test_context(self):
         from connector.source.rds import RDSSource
 
@@ -1578,6 +1696,29 @@ class TestWAFSampledSource:
     def test_process(self):
         pass
 
+    def test_context(self):
+        from connector.source.waf_sampled import WAFSampledSource
+
+        web_acls = {
+            "acl-1": {
+                "Name": "acl-1",
+                "Id": "id-1",
+                "ARN": "arn:aws:wafv2:us-east-1:123456789012:regional/webacl/acl-1/id-1",
+                "MetricNames": ["acl-1"],
+                "UpdatedAt": 1704357600484,
+            }
+        }
+        context = dict(webAclNames="acl-1", WebACLs=web_acls, MaxWorkers=4)
+
+        waf_sampled_source = WAFSampledSource(context=context)
+        assert waf_sampled_source.context["WebACLs"] == web_acls
+        assert waf_sampled_source.context["WebACLsExpireMinutes"] == 60
+        assert waf_sampled_source.context["MaxWorkers"] == 4
+
+        waf_sampled_source = WAFSampledSource(context=dict())
+        assert waf_sampled_source.context["WebACLs"] == {}
+        assert waf_sampled_source.context["MaxWorkers"] == 8
+
 
 class TestLogFormat:
     def test_log_format(self):
@@ -1629,6 +1770,147 @@ class TestAbstractSink:
         assert sink.context == {}
 
 
+class TestS3MultipartSink:
+
+    def generate_records(self, count: int, size: int):
+        from connector.source.base import AbstractSource
+
+        class GeneratedSource(AbstractSource):
+            def process(self):
+                for i in range(count):
+                    yield f'{{"id": {i}, "data": "{os.urandom(size // 2).hex()}"}}\n'
+
+        return GeneratedSource(context={})
+
+    def get_records(self, bucket: str, key: str) -> list[str]:
+        import gzip
+        import boto3
+
+        s3 = boto3.client("s3")
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+        return gzip.decompress(body).decode("utf-8").splitlines()
+
+    def test_init(self):
+        from connector.sink.s3 import S3MultipartSink
+
+        staging_bucket = os.environ["STAGING_BUCKET_NAME"]
+
+        sink = S3MultipartSink(context={"bucket": staging_bucket, "prefix": "test"})
+        assert sink.bucket == staging_bucket
+        assert sink.part_size == 8 * 1024 * 1024
+        assert sink.max_object_size == 512 * 1024 * 1024
+        assert sink.max_records == 0
+        assert sink.max_workers == 4
+
+        sink = S3MultipartSink(
+            context={
+                "bucket": staging_bucket,
+                "prefix": "test",
+                "partSize": 1024,
+                "maxRecords": 10,
+                "maxWorkers": 0,
+            }
+        )
+        assert sink.part_size == 5 * 1024 * 1024
+        assert sink.max_records == 10
+        assert sink.max_workers == 1
+
+    def test_process(self, mock_s3_context, monkeypatch):
+        import boto3
+        from connector.sink.base import Status
+        from connector.sink.s3 import S3MultipartSink
+
+        # the local S3 stand-in does not decode aws-chunked bodies with checksum trailers.
+        monkeypatch.setenv("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+        staging_bucket = os.environ["STAGING_BUCKET_NAME"]
+        s3 = boto3.client("s3")
+
+        # rollover by record count
+        sink = S3MultipartSink(
+            context={"bucket": staging_bucket, "prefix": "multipart", "maxRecords": 10000}
+        )
+        assert sink.process(source=self.generate_records(count=25000, size=64)) == (
+            Status.SUCCEEDED
+        )
+        assert len(sink.s3_objects) == 3
+        records = []
+        for key in sink.s3_objects:
+            assert re.match(
+                r"multipart/year=\d{4}/month=\d{2}/day=\d{2}/.+\.gz", key
+            )
+            records.extend(self.get_records(bucket=staging_bucket, key=key))
+        assert len(records) == 25000
+        assert [int(x[7 : x.index(",")]) for x in records] == list(range(25000))
+
+        # rollover by compressed size, each object is uploaded in several parts.
+        sink = S3MultipartSink(
+            context={
+                "bucket": staging_bucket,
+                "prefix": "multipart",
+                "partSize": 5 * 1024 * 1024,
+                "maxObjectSize": 11 * 1024 * 1024,
+                "maxWorkers": 4,
+            }
+        )
+        assert sink.process(source=self.generate_records(count=40000, size=1000)) == (
+            Status.SUCCEEDED
+        )
+        assert len(sink.s3_objects) == 2
+        count = 0
+        for key in sink.s3_objects:
+            response = s3.head_object(Bucket=staging_bucket, Key=key)
+            assert response["ContentLength"] >= 11 * 1024 * 1024 or key == (
+                sink.s3_objects[-1]
+            )
+            assert response["ETag"].strip('"').split("-")[-1] in ("2", "3")
+            count += len(self.get_records(bucket=staging_bucket, key=key))
+        assert count == 40000
+
+        # no record, no object
+        sink = S3MultipartSink(context={"bucket": staging_bucket, "prefix": "empty"})
+        assert sink.process(source=self.generate_records(count=0, size=64)) == (
+            Status.SUCCEEDED
+        )
+        assert sink.s3_objects == []
+        assert "Contents" not in s3.list_objects_v2(
+            Bucket=staging_bucket, Prefix="empty"
+        )
+
+        # failed to upload, the multipart upload is aborted.
+        sink = S3MultipartSink(
+            context={"bucket": "do-not-exists-bucket", "prefix": "multipart"}
+        )
+        assert sink.process(source=self.generate_records(count=10, size=64)) == (
+            Status.FAILED
+        )
+        assert sink.s3_objects == []
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket=staging_bucket)
+
+        # failed after a rollover, the completed objects are deleted as well.
+        from connector.source.base import AbstractSource
+
+        class FailingSource(AbstractSource):
+            def __init__(self, source):
+                super().__init__(context={})
+                self.source = source
+
+            def process(self):
+                yield from self.source.process()
+                raise RuntimeError("failed to read records")
+
+        sink = S3MultipartSink(
+            context={"bucket": staging_bucket, "prefix": "failed", "maxRecords": 10}
+        )
+        assert sink.process(
+            source=FailingSource(self.generate_records(count=25, size=64))
+        ) == Status.FAILED
+        assert sink.s3_objects == []
+        assert "Contents" not in s3.list_objects_v2(
+            Bucket=staging_bucket, Prefix="failed"
+        )
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket=staging_bucket)
+
+
 class TestParameters:
 
     def test_required_parameter_check(
@@ -1493,6 +1493,128 @@ def test_batch_update_partition(
         assert response["state"]["Failed"] == 1
 
 
+def test_batch_create_partition(
+    mock_s3_context,
+    mock_sqs_context,
+    mock_iam_context,
+    mock_ddb_context,
+    mock_glue_context,
+):
+    import boto3
+    from unittest.mock import patch
+    from etl_helper.lambda_function import Parameters, PartitionMode
+    from etl_helper.addons.helpers import (
+        batch_create_partition,
+        get_partition_watermark_meta_name,
+    )
+    from etl_helper.addons.resources import AWS_DDB_META, AWS_GLUE
+
+    aws_region = os.environ["AWS_REGION"]
+    database = os.environ["CENTRALIZED_DATABASE"]
+    batch_update_partition_event = json.loads(
+        os.environ["ETL_ALTER_ATHENA_PARTITION_EVENT"]
+    )
+
+    event = copy.deepcopy(batch_update_partition_event)
+    event["parameters"]["mode"] = "Glue"
+    param = Parameters(event)
+    assert param.parameters.mode == PartitionMode.GLUE
+
+    event = copy.deepcopy(batch_update_partition_event)
+    event["parameters"]["mode"] = "Unknown"
+    param = Parameters(event)
+    assert param.parameters.mode == PartitionMode.ATHENA
+
+    kwargs = dict(
+        bucket=param.parameters.location.bucket,
+        prefix=param.parameters.location.prefix,
+        partition_prefix=param.parameters.partition_prefix,
+        database=param.parameters.database,
+        table=param.parameters.table_name,
+    )
+
+    response = batch_create_partition(**kwargs)
+    assert response["status"] == "Failed"
+    assert response["totalSubTask"] == 0
+
+    glue_client = boto3.client("glue", region_name=aws_region)
+    glue_client.create_table(
+        DatabaseName=database,
+        TableInput={
+            "Name": param.parameters.table_name,
+            "StorageDescriptor": {
+                "Columns": [{"Name": "request_id", "Type": "string"}],
+                "Location": f"s3://{param.parameters.location.bucket}/{param.parameters.location.prefix}",
+                "InputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+                "OutputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+                "SerdeInfo": {
+                    "SerializationLibrary": "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+                },
+            },
+            "PartitionKeys": [
+                {"Name": "__ds__", "Type": "string"},
+                {"Name": "region", "Type": "string"},
+                {"Name": "__execution_name__", "Type": "string"},
+            ],
+        },
+    )
+
+    response = batch_create_partition(**kwargs, batch_num=1)
+    assert response["status"] == "Succeeded"
+    assert response["totalSubTask"] == 2
+    assert response["state"]["Succeeded"] == 2
+    assert response["partitions"] == {"Created": 2, "Existed": 0, "Failed": 0}
+
+    partitions = glue_client.get_partitions(
+        DatabaseName=database, TableName=param.parameters.table_name
+    )["Partitions"]
+    assert sorted(x["Values"][0] for x in partitions) == [
+        "2023-03-11-18-01",
+        "2023-03-11-20-01",
+    ]
+    assert partitions[0]["Values"][1] == aws_region
+    assert (
+        partitions[0]["Values"][2] == "b49a793b-38d2-40c0-af22-cfacf494732e"
+    )
+    assert partitions[0]["StorageDescriptor"]["Location"].startswith(
+        f"s3://{param.parameters.location.bucket}/{param.parameters.location.prefix}/__ds__=2023-03-11-"
+    )
+
+    meta_name = get_partition_watermark_meta_name(
+        database=database,
+        table=param.parameters.table_name,
+        bucket=param.parameters.location.bucket,
+        prefix=param.parameters.location.prefix,
+    )
+    watermark_info = AWS_DDB_META.get(meta_name=meta_name)
+    assert watermark_info["type"] == "PartitionWatermark"
+    assert param.parameters.partition_prefix in watermark_info["data"]
+
+    # objects within the lookback window are checked again, existing partitions are not failures.
+    response = batch_create_partition(**kwargs)
+    assert response["status"] == "Succeeded"
+    assert response["totalSubTask"] == 1
+    assert response["partitions"] == {"Created": 0, "Existed": 2, "Failed": 0}
+
+    # no object is newer than the watermark, nothing needs to be registered.
+    response = batch_create_partition(**kwargs, lookback=datetime.timedelta(0))
+    assert response["status"] == "Succeeded"
+    assert response["totalSubTask"] == 0
+    assert response["partitions"] == {"Created": 0, "Existed": 0, "Failed": 0}
+
+    AWS_DDB_META.delete(meta_name=meta_name)
+    with patch.object(
+        AWS_GLUE._glue_client,
+        "batch_create_partition",
+        side_effect=Exception("Throttling"),
+    ):
+        response = batch_create_partition(**kwargs)
+    assert response["status"] == "Failed"
+    assert response["state"]["Failed"] == 1
+    assert response["partitions"] == {"Created": 0, "Existed": 0, "Failed": 2}
+    assert AWS_DDB_META.get(meta_name=meta_name) is None
+
+
 def test_update_partition_ddl_generator(
     mock_s3_context,
     mock_sqs_context,
@@ -718,3 +718,82 @@ def test_get_sts_role_by_object(
         )
         == replication_role_arn
     )
+
+
+@pytest.mark.parametrize("source_type", ["alb", "cloudfront"])
+def test_enrichment_benchmark(source_type):
+    import time
+    import random
+    import shutil
+    from pathlib import Path
+    from utils.helpers import enrichment
+    from s3_object_replication.enrichment import EnrichProcessor
+
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    tmp_path = f"/tmp/{str(uuid.uuid4())}"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    with gzip.open(f"{current_path}/data/{source_type}.log.gz", "rt") as reader:
+        lines = reader.readlines()
+    headers = [line for line in lines if line.startswith("#")]
+    records = [line for line in lines if line.strip() and not line.startswith("#")]
+    user_agents = [
+        "Mozilla/5.0 (Macintosh; PPC Mac OS X 10_9_4) AppleWebKit/536.2 (KHTML, like Gecko) Chrome/35.0.847.0 Safari/536.2",
+        "Mozilla/5.0 (iPad; CPU iPad OS 12_4_8 like Mac OS X) AppleWebKit/532.2 (KHTML, like Gecko) FxiOS/13.9n5321.0 Mobile/11T585 Safari/532.2",
+        "Mozilla/5.0 (iPod; U; CPU iPhone OS 3_0 like Mac OS X; yi-US) AppleWebKit/531.9.3 (KHTML, like Gecko) Version/3.0.5 Mobile/8B117 Safari/6531.9.3",
+        "Mozilla/5.0 (compatible; spider/2.0)",
+    ]
+
+    random.seed(0)
+    input_filename = Path(f"{tmp_path}/{source_type}.log.gz")
+    with gzip.open(input_filename, "wt") as writer:
+        writer.write("".join(headers))
+        for i in range(50000):
+            record = random.choice(records)
+            for user_agent in user_agents:
+                record = record.replace(user_agent, random.choice(user_agents))
+            writer.write(record if i % 1000 else "\n")
+
+    enrich_plugins = {"user_agent"}
+
+    # the original implementation, each line is parsed, enriched and written one by one.
+    start_time = time.time()
+    enrich_processor = EnrichProcessor(source_type=source_type, cache_size=0)
+    with gzip.open(input_filename, "rt") as reader, gzip.open(
+        f"{tmp_path}/{source_type}-line-by-line.log.gz", "wt"
+    ) as writer:
+        for record in reader:
+            writer.write(
+                enrich_processor.process(record=record, enrich_plugins=enrich_plugins)
+            )
+    line_by_line_duration = time.time() - start_time
+
+    with gzip.open(f"{tmp_path}/{source_type}-line-by-line.log.gz", "rt") as reader:
+        expected = reader.read()
+
+    durations = {}
+    for max_workers in (1, 2):
+        output_filename = Path(f"{tmp_path}/{source_type}-{max_workers}.log.gz")
+        start_time = time.time()
+        assert (
+            enrichment(
+                input_file_path=input_filename,
+                output_file_path=output_filename,
+                enrich_func=EnrichProcessor(source_type=source_type).process,
+                enrich_plugins=enrich_plugins,
+                chunk_size=64 * 1024,
+                max_workers=max_workers,
+            )
+            == output_filename
+        )
+        durations[max_workers] = time.time() - start_time
+
+        with gzip.open(output_filename, "rt") as reader:
+            assert reader.read() == expected
+
+    print(
+        f"{source_type}: line by line {line_by_line_duration:.3f}s, chunked {durations[1]:.3f}s, 2 subprocesses {durations[2]:.3f}s"
+    )
+    assert durations[1] < line_by_line_duration
+
+    shutil.rmtree(tmp_path)
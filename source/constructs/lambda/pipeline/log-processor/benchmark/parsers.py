@@ -0,0 +1,453 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Lines per second of single log parsers, without S3, Kinesis or OpenSearch.
+
+Each benchmark parses the same lines with its variants, e.g. the current parser and the reference
+implementation it replaced, so that the variants can be compared on the same machine.
+
+Usage, in the log-processor directory:
+
+    python -m benchmark.parsers --list
+    python -m benchmark.parsers --benchmark cloudfront-rt --lines 200000
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import argparse
+from dataclasses import dataclass
+from copy import deepcopy
+from typing import Callable, Dict, Iterable, List, Optional
+
+from benchmark.scenarios import CLOUDFRONT_RT_FIELDS, cloudfront_rt_lines, read_concatenated_json
+
+
+@dataclass
+class ParserBenchmark:
+    env: Dict[str, str]
+    lines: Callable[[], List[str]]
+    # variant name -> function which returns a function to parse a list of lines into records
+    variants: Dict[str, Callable[[], Callable[[List[str]], Iterable]]]
+    default_lines: int = 100000
+    # the variants which return the same records, all by default
+    parity: Optional[List[str]] = None
+
+
+def waf_lines(headers: int = 40) -> List[str]:
+    """WAF logs of a few web ACLs with many request headers"""
+    lines = []
+    for i in range(100):
+        request_headers = [{"name": f"x-custom-header-{j}", "value": f"value-{i}-{j}"} for j in range(headers - 3)]
+        request_headers.insert(headers // 3, {"name": "Host", "value": f"www{i % 3}.example.com"})
+        request_headers.insert(headers // 2, {"name": "User-Agent", "value": f"Mozilla/5.0 (benchmark {i})"})
+        request_headers.append({"name": "accept", "value": "*/*"})
+        record = {
+            "timestamp": 1648179682260 + i,
+            "formatVersion": 1,
+            "webaclId": f"arn:aws:wafv2:us-east-1:123456789012:regional/webacl/benchmark-acl-{i % 4}/5451d59c-9607-4d72-a39a-6267f61fe75{i % 4}",
+            "terminatingRuleId": "Default_Action",
+            "terminatingRuleType": "REGULAR",
+            "action": "BLOCK" if i % 10 == 0 else "ALLOW",
+            "httpSourceName": "ALB",
+            "ruleGroupList": [],
+            "httpRequest": {
+                "clientIp": f"10.0.{i % 255}.1",
+                "country": "US",
+                "headers": request_headers,
+                "uri": f"/api/items/{i}",
+                "args": "",
+                "httpVersion": "HTTP/1.1",
+                "httpMethod": "GET",
+                "requestId": f"request-{i}",
+            },
+        }
+        lines.append(json.dumps(record))
+    return lines
+
+
+def _cloudtrail_event(i: int) -> dict:
+    event = {
+        "eventVersion": "1.08",
+        "userIdentity": {
+            "type": "AssumedRole",
+            "principalId": f"AROAEXAMPLE{i % 7}:session-{i % 7}",
+            "arn": f"arn:aws:sts::123456789012:assumed-role/role-{i % 7}/session-{i % 7}",
+            "accountId": "123456789012",
+            "accessKeyId": f"ASIAEXAMPLE{i:08d}",
+            "sessionContext": {
+                "sessionIssuer": {"type": "Role", "principalId": f"AROAEXAMPLE{i % 7}", "arn": f"arn:aws:iam::123456789012:role/role-{i % 7}", "accountId": "123456789012", "userName": f"role-{i % 7}"},
+                "webIdFederationData": {},
+                "attributes": {"creationDate": "2024-01-13T10:00:00Z", "mfaAuthenticated": "false"},
+            },
+        },
+        "eventTime": f"2024-01-13T10:{i % 60:02d}:00Z",
+        "awsRegion": "us-east-1",
+        "sourceIPAddress": f"10.0.{i % 255}.1",
+        "userAgent": "aws-cli/2.15.0 Python/3.11.6 Linux/6.1 exe/x86_64",
+        "requestID": f"request-{i}",
+        "eventID": f"event-{i}",
+        "readOnly": False,
+        "eventType": "AwsApiCall",
+        "managementEvent": True,
+        "recipientAccountId": "123456789012",
+        "eventCategory": "Management",
+        "tlsDetails": {"tlsVersion": "TLSv1.3", "cipherSuite": "TLS_AES_128_GCM_SHA256", "clientProvidedHostHeader": "ec2.us-east-1.amazonaws.com"},
+    }
+    kind = i % 4
+    if kind == 0:
+        instances = [
+            {
+                "instanceId": f"i-{i:08x}{n}",
+                "imageId": "ami-0123456789abcdef0",
+                "instanceState": {"code": 0, "name": "pending"},
+                "privateIpAddress": f"10.1.{n}.{i % 255}",
+                "instanceType": "m5.large",
+                "placement": {"availabilityZone": "us-east-1a", "tenancy": "default"},
+                "networkInterfaceSet": {"items": [{"networkInterfaceId": f"eni-{i:08x}{n}", "subnetId": "subnet-0123", "vpcId": "vpc-0123", "groupSet": {"items": [{"groupId": "sg-0123", "groupName": "default"}]}}]},
+                "blockDeviceMapping": {},
+                "tagSet": {"items": [{"key": "Name", "value": f"worker-{n}"}, {"key": "team", "value": "data"}]},
+            }
+            for n in range(4)
+        ]
+        event.update(eventSource="ec2.amazonaws.com", eventName="RunInstances")
+        event["requestParameters"] = {"instancesSet": {"items": [{"imageId": "ami-0123456789abcdef0", "minCount": 4, "maxCount": 4}]}, "instanceType": "m5.large", "subnetId": "subnet-0123"}
+        event["responseElements"] = {"requestId": f"request-{i}", "reservationId": f"r-{i:08x}", "ownerId": "123456789012", "instancesSet": {"items": instances}}
+    elif kind == 1:
+        event.update(eventSource="sts.amazonaws.com", eventName="AssumeRole")
+        event["requestParameters"] = {"roleArn": f"arn:aws:iam::123456789012:role/role-{i % 7}", "roleSessionName": f"session-{i % 7}", "durationSeconds": 3600}
+        event["responseElements"] = {"credentials": {"accessKeyId": f"ASIAEXAMPLE{i:08d}", "sessionToken": "IQoJb3JpZ2luX2VjE" * 20, "expiration": "Jan 13, 2024, 11:00:00 AM"}, "assumedRoleUser": {"assumedRoleId": f"AROAEXAMPLE{i % 7}:session-{i % 7}", "arn": f"arn:aws:sts::123456789012:assumed-role/role-{i % 7}/session-{i % 7}"}}
+    elif kind == 2:
+        event.update(eventSource="s3.amazonaws.com", eventName="PutObject", eventCategory="Data", managementEvent=False)
+        event["requestParameters"] = {"bucketName": "example-bucket", "Host": "example-bucket.s3.us-east-1.amazonaws.com", "key": f"data/{i}.parquet"}
+        event["responseElements"] = {"x-amz-server-side-encryption": "AES256"}
+        event["additionalEventData"] = {"SignatureVersion": "SigV4", "bytesTransferredIn": 1024.0 * i, "bytesTransferredOut": 0.0, "x-amz-id-2": "a" * 76}
+        event["resources"] = [{"type": "AWS::S3::Object", "ARN": f"arn:aws:s3:::example-bucket/data/{i}.parquet"}, {"accountId": "123456789012", "type": "AWS::S3::Bucket", "ARN": "arn:aws:s3:::example-bucket"}]
+    else:
+        event.update(eventSource="ec2.amazonaws.com", eventName="DescribeInstances", readOnly=True)
+        event["requestParameters"] = {"instancesSet": {}, "filterSet": {"items": [{"name": "tag:team", "valueSet": {"items": [{"value": "data"}]}}]}}
+        event["responseElements"] = None
+    return event
+
+
+def cloudtrail_lines(objects: int = 10, records: int = 100) -> List[str]:
+    """CloudTrail log files, one file per line, of RunInstances, AssumeRole, PutObject and
+    DescribeInstances events"""
+    return [json.dumps({"Records": [_cloudtrail_event(n * records + i) for i in range(records)]}) for n in range(objects)]
+
+
+def _cloudtrail(**kwargs):
+    def factory():
+        from log_processor.log_parser import CloudTrailWithS3
+
+        return CloudTrailWithS3(**kwargs).parse
+
+    return factory
+
+
+def _cloudtrail_reference():
+    """The CloudTrail parser before the nested and excluded fields were configurable"""
+
+    def parse(lines):
+        for line in lines:
+            for event in json.loads(line)["Records"]:
+                for field in ("requestParameters", "responseElements"):
+                    if field in event and isinstance(event[field], dict):
+                        event[field] = json.dumps(event[field])
+                yield event
+
+    return parse
+
+
+def _cloudfront_rt():
+    from log_processor.log_parser import CloudFrontWithRT
+
+    parse = CloudFrontWithRT().parse
+    return lambda lines: map(parse, lines)
+
+
+def _cloudfront_rt_csv():
+    from log_processor.log_parser import CloudFrontWithRT, _tsv_schema
+
+    parser = CloudFrontWithRT()
+    field_names = list(_tsv_schema(os.environ["FIELD_NAMES"]))
+    return lambda lines: (parser._parse_csv(line, field_names) for line in lines)
+
+
+def _waf():
+    from log_processor.log_parser import WAFWithS3
+
+    return WAFWithS3().parse
+
+
+def _waf_reference():
+    """The WAF parser before the web ACL names were memoized"""
+
+    def parse(lines):
+        for line in lines:
+            json_record = json.loads(line)
+            json_record["webaclName"] = re.search("[^/]/webacl/([^/]*)", json_record["webaclId"]).group(1)
+            for header in json_record["httpRequest"]["headers"]:
+                if header["name"].lower() == "host":
+                    json_record["host"] = header["value"]
+                elif header["name"].lower() == "user-agent":
+                    json_record["userAgent"] = header["value"]
+            yield json_record
+
+    return parse
+
+
+def rds_lines(objects: int = 10, copies: int = 5) -> List[str]:
+    """Firehose objects of concatenated CloudWatch Logs messages, one object per line, of the
+    MySQL slow query, error (with a deadlock), audit and PostgreSQL logs"""
+    messages = [json.loads(x) for x in read_concatenated_json("rds.log")]
+    errors = [
+        f"2024-01-13T10:{i % 60:02d}:00.000000Z 0 [Warning] [MY-010055] [Server] IP address '10.0.0.{i % 255}' could not be resolved"
+        for i in range(50)
+    ]
+    statements = [
+        f"2024-01-13 10:{i % 60:02d}:00 UTC:10.0.0.{i % 255}(5{i:04d}):app@orders:[{1000 + i}]:LOG:  duration: {i}.5 ms  statement: "
+        + "SELECT * FROM orders\n  WHERE id = " + str(i)
+        for i in range(50)
+    ]
+    for log_group, lines in (("/aws/rds/instance/mydb/error", errors), ("/aws/rds/instance/pgdb/postgresql", statements)):
+        messages.append(
+            {
+                "messageType": "DATA_MESSAGE",
+                "logGroup": log_group,
+                "logStream": "mydb",
+                "logEvents": [{"id": str(i), "timestamp": 1705140000000 + i, "message": x} for i, x in enumerate(lines)],
+            }
+        )
+    data = "".join(json.dumps(x, separators=(",", ":")) for x in messages) * copies
+    return [data] * objects
+
+
+def _rds():
+    from log_processor.log_parser import RDSWithS3
+
+    return RDSWithS3().parse
+
+
+def _rds_reference():
+    """The RDS parser before the messages were decoded one at a time"""
+    from log_processor.log_parser import RDSWithS3
+
+    class RDSReference(RDSWithS3):
+        def parse(self, lines):
+            for line in lines:
+                data_json = json.loads("[{}]".format(line.replace("}{", "},{")))
+                for message in data_json:
+                    if message["messageType"] == "DATA_MESSAGE":
+                        yield from self.parse_log_event(message)
+
+        def _parse_rds_log_multi_lines(self, log_sub_type, log_message, log_pattern, log_fields, timestamp, db_identifier):
+            _json_records, _json_record, json_record = [], {}, {}
+            for result in log_pattern.finditer(log_message):
+                for i, attr in enumerate(log_fields):
+                    if result.group(i + 1) is not None:
+                        _json_record[attr] = result.group(i + 1).strip('"')
+                _json_records.append(deepcopy(_json_record))
+            for n, record in enumerate(_json_records[:2], start=1):
+                for attr in log_fields:
+                    json_record[f"{attr}-{n}"] = record[attr]
+            json_record["db-identifier"] = db_identifier
+            json_record["time"] = timestamp
+            json_record["log-detail"] = log_message
+            return json_record
+
+    return RDSReference().parse
+
+
+SPRING_BOOT_REGEX = (
+    r"(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+(?P<level>[A-Z]+)\s+(?P<pid>\d+) --- "
+    r"\[\s*(?P<thread>[^\]]+)\] (?P<logger>\S+)\s+: (?P<message>.*)"
+)
+
+
+def spring_boot_lines(records: int = 100, frames: int = 40) -> List[str]:
+    """A Spring Boot log of the default console format, every third record is an error with a stack
+    trace of a cause and frames lines, the lines keep their line endings like the lines of S3 objects"""
+    lines = []
+    for i in range(records):
+        time = f"2024-01-13 10:{i % 60:02d}:{i % 60:02d}.{i % 1000:03d}"
+        thread = f"nio-8080-exec-{i % 10}"
+        if i % 3:
+            lines.append(f"{time}  INFO 12345 --- [{thread}] c.e.demo.web.OrderController     : GET /api/orders/{i} completed in {i % 97} ms\n")
+            continue
+        lines.append(f"{time} ERROR 12345 --- [{thread}] o.a.c.c.C.[.[.[/].[dispatcherServlet]    : Servlet.service() for servlet [dispatcherServlet] threw exception\n")
+        lines.append(f"java.lang.IllegalStateException: Order {i} could not be processed\n")
+        for n in range(frames // 2):
+            lines.append(f"\tat com.example.demo.service.OrderService.process{n}(OrderService.java:{100 + n}) ~[classes/:na]\n")
+        lines.append(f"Caused by: java.sql.SQLTransientConnectionException: HikariPool-1 - Connection is not available, request timed out after {30000 + i}ms.\n")
+        for n in range(frames - frames // 2):
+            lines.append(f"\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:{150 + n}) ~[HikariCP-5.0.1.jar:na]\n")
+        lines.append(f"\t... {frames} common frames omitted\n")
+    return lines
+
+
+def _spring_boot(**kwargs):
+    def factory():
+        from log_processor.log_parser import MultiLineTextWithS3
+
+        parser = MultiLineTextWithS3()
+        parser.__dict__.update(kwargs)
+        return lambda lines: parser.parse_for_s3_event(lines, SPRING_BOOT_REGEX, "time", "%Y-%m-%d %H:%M:%S.%L")
+
+    return factory
+
+
+def _spring_boot_reference():
+    """The multiline parser before the pattern was compiled and the lines were buffered in a list"""
+    from log_processor.log_parser import LogEntry
+
+    def parse(lines):
+        log = None
+        last_key = None
+        for line in lines:
+            match = re.match(SPRING_BOOT_REGEX, line, re.MULTILINE)
+            if match:
+                if log:
+                    yield log
+                last_key = match.lastgroup
+                log = LogEntry(**match.groupdict())
+                log.set_time("time", "%Y-%m-%d %H:%M:%S.%L")
+            elif log and last_key:
+                log[last_key] += line
+            else:
+                yield LogEntry(log=line)
+        if log:
+            yield log
+
+    return parse
+
+
+def kpl_records(records: int = 100, user_records: int = 500) -> List[bytes]:
+    """The data of Kinesis records aggregated by the Kinesis Producer Library, each one packs user_records json logs"""
+    from test.test_kpl_aggregation import aggregate
+
+    logs = [
+        json.dumps({"time": "2024-01-01T00:00:00Z", "log": f"GET /index.html {i}" * 10}).encode()
+        for i in range(user_records)
+    ]
+    return [aggregate(logs, partition_key=str(i)) for i in range(records)]
+
+
+def _deaggregate():
+    from event.kpl_aggregation import deaggregate
+
+    def parse(lines):
+        for data in lines:
+            yield from deaggregate(data)
+
+    return parse
+
+
+BENCHMARKS: Dict[str, ParserBenchmark] = {
+    "cloudfront-rt": ParserBenchmark(
+        {"FIELD_NAMES": CLOUDFRONT_RT_FIELDS},
+        lambda: [line + "\n" for line in cloudfront_rt_lines()],
+        {"tsv": _cloudfront_rt, "csv": _cloudfront_rt_csv},
+    ),
+    "waf": ParserBenchmark({}, waf_lines, {"memoized": _waf, "reference": _waf_reference}),
+    "rds": ParserBenchmark({}, rds_lines, {"streaming": _rds, "reference": _rds_reference}, default_lines=100),
+    "cloudtrail": ParserBenchmark(
+        {},
+        cloudtrail_lines,
+        {
+            "keyword": _cloudtrail(),
+            "reference": _cloudtrail_reference,
+            "flattened": _cloudtrail(nested_field_type="flattened"),
+            "projected": _cloudtrail(excluded_fields="responseElements,tlsDetails,additionalEventData"),
+            "keyword-all": _cloudtrail(nested_fields="requestParameters,responseElements,additionalEventData,userIdentity,tlsDetails,resources"),
+        },
+        default_lines=1000,
+        parity=["keyword", "reference"],
+    ),
+    "kpl": ParserBenchmark({}, kpl_records, {"deaggregate": _deaggregate}, default_lines=100),
+    "multiline": ParserBenchmark(
+        {},
+        spring_boot_lines,
+        {"compiled": _spring_boot(), "reference": _spring_boot_reference, "line-at-a-time": _spring_boot(_chunk_lines=1)},
+    ),
+}
+
+
+def _leaf_count(value) -> int:
+    """The number of leaf values, i.e. the fields which would be indexed without a mapping"""
+    if isinstance(value, dict):
+        return sum(_leaf_count(x) for x in value.values())
+    if isinstance(value, list):
+        return sum(_leaf_count(x) for x in value)
+    return 1
+
+
+def _output_size(parse, sample: List[str]) -> tuple:
+    """The json bytes and leaf values per record of the sample lines"""
+    nbytes, leaves, records = 0, 0, 0
+    for record in parse(sample):
+        nbytes += len(json.dumps(record, default=str).encode("utf-8"))
+        leaves += _leaf_count(record)
+        records += 1
+    return nbytes / max(records, 1), leaves / max(records, 1)
+
+
+def run_benchmark(name: str, count: Optional[int] = None) -> List[dict]:
+    """Parse count lines with each variant of a benchmark, the lines are repeated as needed.
+
+    The size of the records is measured on the sample lines, it's reported as the json bytes and
+    leaf values per record, and the bytes relative to the first variant."""
+    benchmark = BENCHMARKS[name]
+    count = count or benchmark.default_lines
+    os.environ.update(benchmark.env)
+    sample = benchmark.lines()
+    lines = (sample * (count // len(sample) + 1))[:count]
+
+    results = []
+    for variant, factory in benchmark.variants.items():
+        parse = factory()
+        records = 0
+        start = time.perf_counter()
+        for _ in parse(lines):
+            records += 1
+        elapsed = time.perf_counter() - start
+        bytes_per_record, leaves_per_record = _output_size(factory(), sample)
+        results.append(
+            {
+                "benchmark": name,
+                "variant": variant,
+                "lines": count,
+                "elapsed_seconds": round(elapsed, 3),
+                "lines_per_second": round(count / elapsed, 1),
+                "records": records,
+                "records_per_second": round(records / elapsed, 1),
+                "bytes_per_record": round(bytes_per_record, 1),
+                "leaves_per_record": round(leaves_per_record, 1),
+                "relative_bytes": round(bytes_per_record / results[0]["bytes_per_record"], 3) if results else 1.0,
+            }
+        )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmark", action="append", choices=sorted(BENCHMARKS), help="benchmarks to run, all by default")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    parser.add_argument("--lines", type=int, help="lines parsed by each variant, the default of each benchmark by default")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, benchmark in sorted(BENCHMARKS.items()):
+            print(f"{name}\t{','.join(benchmark.variants)}")
+        return 0
+
+    for name in args.benchmark or sorted(BENCHMARKS):
+        for result in run_benchmark(name, args.lines):
+            print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""CPU time of handling a _bulk response, without S3 or OpenSearch.
+
+The full response decoded item by item, as before filter_path was used, is compared with the
+filtered response handled by `AosIdxService._get_failed_records`, which skips decoding the items
+when the response reports no errors.
+
+Usage, in the log-processor directory:
+
+    python -m benchmark.responses
+    python -m benchmark.responses --items 5000 --rounds 50
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List
+
+from benchmark.run import BASE_ENV
+
+# the positions of the failed items of the responses with errors
+FAILED_ITEMS = (10, 5000, 9999)
+
+
+def _get_failed_records_full(content: bytes, records: list, index_name: str) -> list:
+    """The response handling before filter_path was used"""
+    failed_records = []
+    for idx, item in enumerate(json.loads(content)["items"]):
+        if item["index"]["status"] >= 300:
+            records[idx]["index_name"] = index_name
+            records[idx]["error_type"] = item["index"]["error"]["type"]
+            records[idx]["error_reason"] = item["index"]["error"]["reason"]
+            failed_records.append(records[idx])
+    return failed_records
+
+
+def run_benchmark(items: int, rounds: int) -> List[dict]:
+    """Handle a response of items items rounds times, with and without failed items"""
+    os.environ.update({k: v for k, v in BASE_ENV.items() if k not in os.environ})
+    from idx.idx_svc import AosIdxService
+    from test.test_idx_svc import _bulk_response
+
+    aos_service = AosIdxService()
+    results = []
+    for failed in ((), tuple(x for x in FAILED_ITEMS if x < items)):
+        records = [{"id": i} for i in range(items)]
+        variants = {
+            "full": (_bulk_response(items, failed=failed, filtered=False), _get_failed_records_full),
+            "filtered": (_bulk_response(items, failed=failed), aos_service._get_failed_records),
+        }
+        for variant, (content, handle) in variants.items():
+            start = time.process_time()
+            for _ in range(rounds):
+                handle(content, records, "benchmark")
+            cpu = time.process_time() - start
+            results.append(
+                {
+                    "variant": variant,
+                    "items": items,
+                    "errors": bool(failed),
+                    "response_bytes": len(content),
+                    "cpu_ms_per_response": round(cpu / rounds * 1000, 3),
+                }
+            )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="items of each _bulk response")
+    parser.add_argument("--rounds", type=int, default=10, help="times each response is handled")
+    args = parser.parse_args(argv)
+
+    for result in run_benchmark(args.items, args.rounds):
+        print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
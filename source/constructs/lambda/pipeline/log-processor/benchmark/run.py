@@ -0,0 +1,230 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Offline end-to-end benchmark of the log processor.
+
+Each scenario replays generated log data through the real `lambda_function.lambda_handler` against
+in-process S3 and OpenSearch stand-ins. The log processor reads its configuration from environment
+variables when its modules are imported, so every scenario runs in a fresh Python process.
+
+Usage, in the log-processor directory:
+
+    python -m benchmark.run --list
+    python -m benchmark.run --size-mb 16 --s3-latency-ms 20 --bulk-latency-ms 10 --output result.json
+    python -m benchmark.run --scenario sqs-elb --scenario kds-json-flb --bulk-item-error-rate 0.01
+
+Large uncompressed objects are read by concurrent ranged GETs, compare the number of workers on a
+bandwidth-limited S3, e.g.
+
+    python -m benchmark.run --scenario sqs-s3 --size-mb 64 --s3-bandwidth-mbps 20 --env RANGED_GET_MAX_WORKERS=1
+    python -m benchmark.run --scenario sqs-s3 --size-mb 64 --s3-bandwidth-mbps 20 --env RANGED_GET_MAX_WORKERS=8
+
+The result is a json object per scenario, one per line: records/sec, MB/s of uncompressed log data,
+peak RSS, the time and bytes of each stage, and the share of the CPU time spent by the stage timer.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+from benchmark.scenarios import SCENARIOS, LOG_BUCKET, BACKUP_BUCKET, build_events
+
+BASE_ENV = {
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_SESSION_TOKEN": "benchmark",
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "SOLUTION_ID": "SO8025",
+    "SOLUTION_VERSION": "benchmark",
+    "LOG_LEVEL": "ERROR",
+    "POWERTOOLS_METRICS_NAMESPACE": "Solution/Benchmark",
+    "STACK_NAME": "CL-benchmark",
+    "INDEX_PREFIX": "benchmark",
+    "ENDPOINT": "benchmark.us-east-1.es.amazonaws.com",
+    "ENGINE": "OpenSearch",
+    "LOG_BUCKET_NAME": LOG_BUCKET,
+    "BACKUP_BUCKET_NAME": BACKUP_BUCKET,
+    "FUNCTION_NAME": "benchmark",
+    # the index environment is initialized once per function, it is not part of the benchmark
+    "INIT_MASTER_ROLE_JOB": "1",
+    "INIT_ISM_JOB": "1",
+    "INIT_TEMPLATE_JOB": "1",
+    "INIT_DASHBOARD_JOB": "1",
+    "INIT_ALIAS_JOB": "1",
+    "INIT_INDEX_PATTERN_JOB": "1",
+    "ROLLOVER_INDEX_JOB": "1",
+    "STAGE_METRICS_SAMPLE_RATE": "1",
+}
+
+
+class BenchmarkContext:
+    aws_request_id = "benchmark"
+
+    def get_remaining_time_in_millis(self):
+        return 900000
+
+
+def _add_stages(total: dict, stages: dict) -> None:
+    for name, value in stages.items():
+        stage = total.setdefault(name, {"ms": 0.0, "bytes": 0})
+        stage["ms"] = round(stage["ms"] + value["ms"], 3)
+        stage["bytes"] += value["bytes"]
+
+
+def timed_block_seconds(blocks: int = 10000) -> float:
+    """The CPU time of a block timed by an enabled StageTimer"""
+    from event.stage_timer import StageTimer
+
+    timer = StageTimer()
+    timer.start(sample_rate=1)
+    start = time.process_time()
+    for _ in range(blocks):
+        with timer.stage("Bulk"):
+            pass
+    return (time.process_time() - start) / blocks
+
+
+def run_scenario(name: str, options: dict) -> dict:
+    """Run a scenario in the current process, the environment variables must have been set"""
+    from benchmark.standins import S3StandIn, OpenSearchStandIn
+
+    with S3StandIn(
+        [LOG_BUCKET, BACKUP_BUCKET],
+        latency_ms=options["s3_latency_ms"],
+        bandwidth_mbps=options["s3_bandwidth_mbps"],
+    ) as s3, OpenSearchStandIn(
+        latency_ms=options["bulk_latency_ms"],
+        item_error_rate=options["bulk_item_error_rate"],
+        request_error_rate=options["bulk_request_error_rate"],
+    ) as aos:
+        import idx.idx_svc
+        import lambda_function
+        from event.stage_timer import stage_timer
+
+        # retry the injected request errors without waiting
+        idx.idx_svc.SLEEP_INTERVAL = 0
+
+        events, input_bytes = build_events(
+            name, SCENARIOS[name], int(options["size_mb"] * 1024 * 1024), s3.client
+        )
+        stages = {}
+        errors = []
+        timed_blocks = 0
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for event in events:
+            try:
+                lambda_function.lambda_handler(event, BenchmarkContext())
+            except Exception as e:
+                errors.append(repr(e))
+            _add_stages(stages, stage_timer.summary())
+            timed_blocks += stage_timer.count
+        elapsed = time.perf_counter() - start
+        cpu_seconds = time.process_time() - cpu_start
+
+    records = aos.documents + aos.failed_items
+    return {
+        "scenario": name,
+        "source": SCENARIOS[name].source,
+        "invocations": len(events),
+        "failed_invocations": len(errors),
+        "first_error": errors[0] if errors else "",
+        "input_bytes": input_bytes,
+        "records": records,
+        "failed_records": aos.failed_items,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(records / elapsed, 1),
+        "mb_per_second": round(input_bytes / 1024 / 1024 / elapsed, 3),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "s3_get_requests": s3.get_requests,
+        "bulk_requests": aos.requests,
+        "bulk_request_bytes": aos.request_bytes,
+        "failed_bulk_requests": aos.failed_requests,
+        "index_documents": dict(aos.index_documents),
+        "index_settings": aos.indices,
+        "stages": stages,
+        "timed_blocks": timed_blocks,
+        # the share of the CPU time spent by the stage timer, the timed blocks are chunks of an object
+        # or batches of records, so it's expected to stay well below 1%
+        "stage_timer_overhead": round(timed_blocks * timed_block_seconds() / cpu_seconds, 6) if cpu_seconds else 0,
+        "options": options,
+    }
+
+
+def run_in_subprocess(name: str, options: dict, extra_env: dict) -> dict:
+    scenario = SCENARIOS[name]
+    # the log processor is configured by the scenario only, other variables of the current process are dropped
+    inherited = {k: v for k, v in os.environ.items() if k in ("PATH", "PYTHONPATH", "HOME", "LANG", "TMPDIR")}
+    env = {**inherited, **BASE_ENV, "SOURCE": scenario.source, **scenario.env, **extra_env}
+    with tempfile.NamedTemporaryFile(suffix=".json") as f:
+        subprocess.run(
+            [sys.executable, "-m", "benchmark.run", "--child", name, "--child-output", f.name, "--options", json.dumps(options)],
+            env=env,
+            cwd=os.path.join(os.path.dirname(__file__), ".."),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenarios to run, all by default")
+    parser.add_argument("--list", action="store_true", help="list the scenarios")
+    parser.add_argument("--size-mb", type=float, default=8, help="uncompressed log data of each scenario")
+    parser.add_argument("--s3-latency-ms", type=float, default=0)
+    parser.add_argument("--s3-bandwidth-mbps", type=float, default=0, help="MiB/s per connection, 0 for unlimited")
+    parser.add_argument("--bulk-latency-ms", type=float, default=0)
+    parser.add_argument("--bulk-item-error-rate", type=float, default=0)
+    parser.add_argument("--bulk-request-error-rate", type=float, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra environment variables of the log processor")
+    parser.add_argument("--output", help="write the results to a file instead of stdout")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.child:
+        result = run_scenario(args.child, json.loads(args.options))
+        with open(args.child_output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.list:
+        for name, scenario in sorted(SCENARIOS.items()):
+            print(f"{name}\t{scenario.source}\t{scenario.env['LOG_TYPE']}")
+        return 0
+
+    options = {
+        "size_mb": args.size_mb,
+        "s3_latency_ms": args.s3_latency_ms,
+        "s3_bandwidth_mbps": args.s3_bandwidth_mbps,
+        "bulk_latency_ms": args.bulk_latency_ms,
+        "bulk_item_error_rate": args.bulk_item_error_rate,
+        "bulk_request_error_rate": args.bulk_request_error_rate,
+    }
+    extra_env = dict(x.split("=", 1) for x in args.env)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for name in args.scenario or sorted(SCENARIOS):
+            result = run_in_subprocess(name, options, extra_env)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
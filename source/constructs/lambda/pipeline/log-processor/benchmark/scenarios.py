@@ -0,0 +1,273 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark scenarios, each one is a log type with its Lambda environment, the source of the
+events and the log lines which are replicated up to the requested size."""
+
+import gzip
+import json
+import base64
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+DATAFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "test", "datafile")
+LOG_BUCKET = "benchmark-log-bucket"
+BACKUP_BUCKET = "benchmark-backup-bucket"
+
+CLOUDFRONT_RT_FIELDS = (
+    "timestamp,c-ip,time-to-first-byte,sc-status,sc-bytes,cs-method,cs-protocol,cs-host,"
+    "cs-uri-stem,cs-bytes,x-edge-location,x-edge-request-id,x-host-header,time-taken"
+)
+VPC_FLOW_FIELDS = (
+    "version,account-id,interface-id,srcaddr,dstaddr,srcport,dstport,protocol,packets,"
+    "bytes,start,end,action,log-status"
+)
+TEXT_LOG_REGEX = r"(?<timestamp>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z)\s+(?<level>\w+)\s+(?<message>.+)"
+
+
+def read_datafile(name: str) -> List[str]:
+    path = os.path.join(DATAFILE_DIR, name)
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def read_concatenated_json(name: str) -> List[str]:
+    """Read a file of concatenated json objects, e.g. CloudWatch Logs messages delivered by Firehose,
+    as one object per line"""
+    with open(os.path.join(DATAFILE_DIR, name), encoding="utf-8") as f:
+        data = f.read()
+    decoder, pos, lines = json.JSONDecoder(), 0, []
+    while pos < len(data):
+        obj, end = decoder.raw_decode(data, pos)
+        lines.append(data[pos:end])
+        pos = end
+        while pos < len(data) and data[pos].isspace():
+            pos += 1
+    return lines
+
+
+def cloudfront_rt_lines() -> List[str]:
+    return [
+        "\t".join(
+            [
+                f"1700000000.{i:03d}",
+                f"10.0.{i % 255}.{i % 7}",
+                "0.002",
+                "200",
+                str(1000 + i),
+                "GET",
+                "https",
+                "d111111abcdef8.cloudfront.net",
+                f"/images/{i}.png",
+                "120",
+                "IAD89-C1",
+                f"request-{i}",
+                "example.com",
+                "0.003",
+            ]
+        )
+        for i in range(100)
+    ]
+
+
+def vpc_flow_lines() -> List[str]:
+    return [
+        f"2 123456789012 eni-0477053d545f22d48 10.0.0.{i % 255} 10.0.1.{i % 127} "
+        f"{40000 + i} 443 6 {i % 20 + 1} {i * 40} 1651646498 1651646529 ACCEPT OK"
+        for i in range(100)
+    ]
+
+
+def text_lines() -> List[str]:
+    return [
+        f"2024-01-13T10:{i % 60:02d}:00Z {'ERROR' if i % 10 == 0 else 'INFO'} request {i} served in {i % 97}ms"
+        for i in range(100)
+    ]
+
+
+def json_lines() -> List[str]:
+    return [
+        json.dumps(
+            {
+                "time": f"2024-01-13T10:{i % 60:02d}:00Z",
+                "level": "INFO",
+                "log": f"GET /api/items/{i} 200",
+                "kubernetes": {"pod_name": f"app-{i % 5}", "namespace_name": "default"},
+            }
+        )
+        for i in range(100)
+    ]
+
+
+def rds_lines() -> List[str]:
+    """The json lines which the RDS connector writes to S3, LOG_TYPE=RDS objects are parsed by JSONWithS3"""
+    metadata = {
+        "db_cluster_identifier": "",
+        "db_instance_identifier": "mydb",
+        "engine": "mysql",
+        "engine_version": "8.0.35",
+        "endpoint_address": "mydb.abcdefghijkl.us-east-1.rds.amazonaws.com",
+        "endpoint_port": 3306,
+    }
+    lines = []
+    for i in range(100):
+        timestamp = f"2024-01-13T10:{i % 60:02d}:00.000000Z"
+        if i % 2 == 0:
+            record = {
+                "timestamp": timestamp,
+                "username": "admin",
+                "host": f"10.0.0.{i % 255}",
+                "query_id": str(i),
+                "query_time": f"{i % 10}.000123",
+                "lock_time": "0.000001",
+                "rows_sent": "1",
+                "rows_examined": str(i * 100),
+                "object": f"use orders;\nSET timestamp=1705140000;\nSELECT * FROM orders WHERE id = {i}",
+                "log_type": "SlowQuery",
+            }
+        else:
+            record = {
+                "timestamp": timestamp,
+                "connection_id": str(i),
+                "priority": "Warning",
+                "return_code": "MY-010055",
+                "subsystem": "Server",
+                "object": f"IP address '10.0.0.{i % 255}' could not be resolved",
+                "log_type": "Error",
+            }
+        lines.append(json.dumps({**record, **metadata}))
+    return lines
+
+
+def replicate(lines: List[str], size: int) -> bytes:
+    """Repeat the lines until the data has at least size bytes"""
+    block = ("\n".join(lines) + "\n").encode("utf-8")
+    return block * max(1, -(-size // len(block)))
+
+
+@dataclass
+class Scenario:
+    source: str
+    env: Dict[str, str]
+    lines: Callable[[], List[str]]
+    gzip: bool = False
+    # records per event of a stream source
+    records_per_event: int = 500
+    # the data of a stream record is the gzip compressed CloudWatch Logs message of N lines
+    cwl_lines_per_record: int = 0
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "sqs-cloudfront": Scenario("SQS", {"LOG_TYPE": "CloudFront", "SUB_CATEGORY": "S3"}, lambda: read_datafile("cloudfront.log"), gzip=True),
+    "sqs-elb": Scenario("SQS", {"LOG_TYPE": "ELB", "SUB_CATEGORY": "S3"}, lambda: read_datafile("elb.log.gz"), gzip=True),
+    "sqs-s3": Scenario("SQS", {"LOG_TYPE": "S3", "SUB_CATEGORY": "S3"}, lambda: read_datafile("s3.log")),
+    "sqs-cloudtrail": Scenario("SQS", {"LOG_TYPE": "CloudTrail", "SUB_CATEGORY": "S3"}, lambda: read_datafile("cloudtrail.log"), gzip=True),
+    "sqs-config": Scenario("SQS", {"LOG_TYPE": "Config", "SUB_CATEGORY": "S3"}, lambda: read_datafile("config-history.log"), gzip=True),
+    "sqs-vpcflow": Scenario("SQS", {"LOG_TYPE": "VPCFlow", "SUB_CATEGORY": "S3"}, lambda: read_datafile("vpcflow.log"), gzip=True),
+    "sqs-waf": Scenario("SQS", {"LOG_TYPE": "WAF", "SUB_CATEGORY": "S3"}, lambda: read_datafile("waf.log"), gzip=True),
+    "sqs-rds": Scenario("SQS", {"LOG_TYPE": "RDS", "SUB_CATEGORY": "S3"}, rds_lines, gzip=True),
+    "sqs-single-line-text": Scenario(
+        "SQS",
+        {
+            "LOG_TYPE": "SingleLineText",
+            "SUB_CATEGORY": "S3",
+            "STACK_NAME": "AppPipe-benchmark",
+            "CONFIG_JSON": json.dumps({"parser": "regex", "regex": TEXT_LOG_REGEX, "time_key": "", "time_format": "", "time_offset": "", "is_gzip": False}),
+        },
+        text_lines,
+    ),
+    "sqs-json": Scenario(
+        "SQS",
+        {
+            "LOG_TYPE": "JSON",
+            "SUB_CATEGORY": "S3",
+            "STACK_NAME": "AppPipe-benchmark",
+            "CONFIG_JSON": json.dumps({"parser": "json", "time_key": "", "time_format": "", "time_offset": "", "is_gzip": True}),
+        },
+        json_lines,
+        gzip=True,
+    ),
+    "kds-cloudfront-rt": Scenario("KDS", {"LOG_TYPE": "CloudFront", "SUB_CATEGORY": "RT", "FIELD_NAMES": CLOUDFRONT_RT_FIELDS}, cloudfront_rt_lines),
+    "kds-vpcflow-cwl": Scenario("KDS", {"LOG_TYPE": "VPCFlow", "SUB_CATEGORY": "CWL", "LOG_FORMAT": VPC_FLOW_FIELDS}, vpc_flow_lines, records_per_event=50, cwl_lines_per_record=100),
+    "kds-json-flb": Scenario("KDS", {"LOG_TYPE": "JSON", "SUB_CATEGORY": "FLB", "STACK_NAME": "AppPipe-benchmark"}, json_lines),
+    "msk-json-flb": Scenario("MSK", {"LOG_TYPE": "JSON", "SUB_CATEGORY": "FLB", "STACK_NAME": "AppPipe-benchmark"}, json_lines),
+}
+
+
+def _sqs_event(bucket: str, key: str, size: int, etag: str) -> dict:
+    message = {"Records": [{"s3": {"bucket": {"name": bucket}, "object": {"key": key, "size": size, "eTag": etag}}}]}
+    return {
+        "Records": [
+            {
+                "eventSource": "aws:sqs",
+                "receiptHandle": "benchmark",
+                "attributes": {"ApproximateReceiveCount": "1"},
+                "body": json.dumps(message),
+            }
+        ]
+    }
+
+
+def _kinesis_records(data: List[bytes]) -> list:
+    return [
+        {
+            "eventSource": "aws:kinesis",
+            "eventID": f"shardId-000000000000:{i}",
+            "kinesis": {"sequenceNumber": str(i), "data": base64.b64encode(x).decode()},
+        }
+        for i, x in enumerate(data)
+    ]
+
+
+def _cwl_message(lines: List[str]) -> bytes:
+    return gzip.compress(
+        json.dumps(
+            {
+                "messageType": "DATA_MESSAGE",
+                "logEvents": [{"id": str(i), "timestamp": 1651646498000, "message": line} for i, line in enumerate(lines)],
+            }
+        ).encode()
+    )
+
+
+def build_events(name: str, scenario: Scenario, size: int, s3_client) -> tuple:
+    """Upload the objects of the scenario and build its Lambda events
+
+    Returns:
+        tuple: (events, input bytes), the input bytes are the uncompressed log lines
+    """
+    data = replicate(scenario.lines(), size)
+    lines = data.decode("utf-8").splitlines()
+
+    if scenario.source == "SQS":
+        key = f"AWSLogs/benchmark/{name}.log" + (".gz" if scenario.gzip else "")
+        body = gzip.compress(data) if scenario.gzip else data
+        etag = s3_client.put_object(Bucket=LOG_BUCKET, Key=key, Body=body)["ETag"].strip('"')
+        return [_sqs_event(LOG_BUCKET, key, len(body), etag)], len(data)
+
+    if scenario.cwl_lines_per_record:
+        n = scenario.cwl_lines_per_record
+        payloads = [_cwl_message(lines[i : i + n]) for i in range(0, len(lines), n)]
+    else:
+        payloads = [line.encode("utf-8") for line in lines]
+
+    events = []
+    for start in range(0, len(payloads), scenario.records_per_event):
+        chunk = payloads[start : start + scenario.records_per_event]
+        if scenario.source == "KDS":
+            events.append({"Records": _kinesis_records(chunk)})
+        else:
+            events.append(
+                {
+                    "eventSource": "aws:kafka",
+                    "records": {
+                        "benchmark-0": [
+                            {"offset": start + i, "value": base64.b64encode(x).decode()}
+                            for i, x in enumerate(chunk)
+                        ]
+                    },
+                }
+            )
+    return events, len(data)
@@ -0,0 +1,190 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""In-process stand-ins of S3 and the OpenSearch _bulk API with latency and error injection."""
+
+import re
+import json
+import time
+import random
+import threading
+from collections import Counter
+from urllib.parse import unquote
+
+import boto3
+import requests_mock
+from botocore.client import BaseClient
+from moto import mock_aws
+
+
+class S3StandIn:
+    """S3 served by moto, a GetObject call takes latency_ms plus its bytes at bandwidth_mbps
+    (MiB per second per connection, 0 for unlimited)."""
+
+    def __init__(self, buckets, latency_ms: float = 0, bandwidth_mbps: float = 0):
+        self._buckets = buckets
+        self._latency = latency_ms / 1000
+        self._bandwidth = bandwidth_mbps * 1024 * 1024
+        self._mock = mock_aws()
+        self._make_api_call = None
+        self.get_requests = 0
+        self.get_bytes = 0
+        self.client = None
+
+    def __enter__(self):
+        self._mock.start()
+        self.client = boto3.client("s3")
+        for bucket in self._buckets:
+            self.client.create_bucket(Bucket=bucket)
+
+        original = self._make_api_call = BaseClient._make_api_call
+        stand_in = self
+
+        def _make_api_call(client, operation_name, api_params):
+            response = original(client, operation_name, api_params)
+            if (
+                client.meta.service_model.service_name == "s3"
+                and operation_name == "GetObject"
+            ):
+                size = response.get("ContentLength", 0)
+                stand_in.get_requests += 1
+                stand_in.get_bytes += size
+                delay = stand_in._latency
+                if stand_in._bandwidth:
+                    delay += size / stand_in._bandwidth
+                time.sleep(delay)
+            return response
+
+        BaseClient._make_api_call = _make_api_call
+        return self
+
+    def __exit__(self, *exc):
+        BaseClient._make_api_call = self._make_api_call
+        self._mock.stop()
+
+
+class OpenSearchStandIn:
+    """The _bulk API of an OpenSearch domain, other APIs return an empty object.
+
+    Each _bulk request takes latency_ms, fails with 429 at request_error_rate, and each item of a
+    successful request fails with a mapper_parsing_exception at item_error_rate.
+
+    The indices created, the calls of the settings, refresh and aliases APIs, and the documents
+    of each index are recorded.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        item_error_rate: float = 0,
+        request_error_rate: float = 0,
+        seed: int = 0,
+    ):
+        self._latency = latency_ms / 1000
+        self._item_error_rate = item_error_rate
+        self._request_error_rate = request_error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._mocker = requests_mock.Mocker()
+        self.requests = 0
+        self.request_bytes = 0
+        self.documents = 0
+        self.failed_items = 0
+        self.failed_requests = 0
+        # index name -> settings of the create index request and the settings updates
+        self.indices = {}
+        # (index name, settings) of each create index and update settings request
+        self.settings_calls = []
+        self.refreshed = []
+        self.alias_actions = []
+        # index name -> the id of the ISM policy attached by the add policy API
+        self.ism_policies = {}
+        self.index_documents = Counter()
+
+    def __enter__(self):
+        self._mocker.start()
+        self._mocker.register_uri(requests_mock.ANY, re.compile(".*"), json={})
+        index_url = re.compile(r"https://[^/]+/[^_/][^/?]*$")
+        self._mocker.register_uri("HEAD", index_url, text=self._head_index)
+        self._mocker.register_uri("PUT", index_url, json=self._create_index)
+        self._mocker.register_uri("PUT", re.compile(r".*/_settings$"), json=self._update_settings)
+        self._mocker.register_uri("POST", re.compile(r".*/_refresh$"), json=self._refresh)
+        self._mocker.register_uri("POST", re.compile(r".*/_aliases$"), json=self._aliases)
+        self._mocker.register_uri("POST", re.compile(r".*/_ism/add/[^/]+$"), json=self._add_ism_policy)
+        self._mocker.register_uri(
+            requests_mock.ANY, re.compile(r".*/_bulk"), json=self._bulk
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self._mocker.stop()
+
+    @staticmethod
+    def _index_name(request) -> str:
+        return unquote(request.path.split("/")[1])
+
+    def _head_index(self, request, context):
+        context.status_code = 200 if self._index_name(request) in self.indices else 404
+        return ""
+
+    def _create_index(self, request, context):
+        name = self._index_name(request)
+        with self._lock:
+            if name in self.indices:
+                context.status_code = 400
+                return {"error": {"type": "resource_already_exists_exception"}, "status": 400}
+            settings = (request.json() or {}).get("settings", {}).get("index", {})
+            self.indices[name] = dict(settings)
+            self.settings_calls.append((name, settings))
+        return {"acknowledged": True, "index": name}
+
+    def _update_settings(self, request, context):
+        name = self._index_name(request)
+        settings = request.json().get("index", {})
+        with self._lock:
+            self.indices.setdefault(name, {}).update(settings)
+            self.settings_calls.append((name, settings))
+        return {"acknowledged": True}
+
+    def _refresh(self, request, context):
+        with self._lock:
+            self.refreshed.append(self._index_name(request))
+        return {"_shards": {"failed": 0}}
+
+    def _aliases(self, request, context):
+        with self._lock:
+            self.alias_actions.extend(request.json()["actions"])
+        return {"acknowledged": True}
+
+    def _add_ism_policy(self, request, context):
+        name = unquote(request.path.rsplit("/", 1)[1])
+        with self._lock:
+            if name not in self.indices:
+                failed = [{"index_name": name, "reason": "no such index"}]
+                return {"updated_indices": 0, "failures": True, "failed_indices": failed}
+            self.ism_policies[name] = request.json()["policy_id"]
+        return {"updated_indices": 1, "failures": False, "failed_indices": []}
+
+    def _bulk(self, request, context):
+        time.sleep(self._latency)
+        with self._lock:
+            self.requests += 1
+            self.request_bytes += len(request.body or b"")
+            if self._random.random() < self._request_error_rate:
+                self.failed_requests += 1
+                context.status_code = 429
+                return {"error": "rejected_execution_exception", "status": 429}
+
+            lines = request.text.splitlines()
+            items = []
+            for action in lines[::2]:
+                action_name = next(iter(json.loads(action)))
+                if self._random.random() < self._item_error_rate:
+                    self.failed_items += 1
+                    error = {"type": "mapper_parsing_exception", "reason": "injected error"}
+                    items.append({action_name: {"status": 400, "error": error}})
+                else:
+                    self.documents += 1
+                    self.index_documents[self._index_name(request)] += 1
+                    items.append({action_name: {"status": 201}})
+        return {"took": 1, "errors": any("error" in next(iter(x.values())) for x in items), "items": items}
@@ -0,0 +1,89 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import json
+from typing import NamedTuple
+from botocore.exceptions import ClientError
+from commonlib.logging import get_logger
+from commonlib import AWSConnection
+from event.lazy import LazyClient
+
+
+logger = get_logger(__name__)
+
+checkpoint_bucket_name = os.environ.get("BACKUP_BUCKET_NAME")
+index_prefix = os.environ.get("INDEX_PREFIX", "").lower()
+conn = AWSConnection()
+s3_client = LazyClient(conn, "s3")
+
+
+class Position(NamedTuple):
+    """The position of the first record not loaded yet of a log object.
+
+    The object is read again from byte_offset, the start of a line, and the first `skip` records
+    read from there are dropped, so the first record read is the record offset - skip of the object.
+    """
+
+    offset: int = 0  # the number of records before it
+    byte_offset: int = 0
+    skip: int = 0
+
+
+# position of an object which has been fully processed
+COMPLETED = Position(-1)
+
+
+class Checkpoint:
+    """Store the position of the records already loaded from a log object, so that a redelivered
+    message of the same object resumes from there instead of from the beginning.
+
+    The checkpoint is a small json object in the backup bucket, it is bound to the ETag of
+    the log object, a checkpoint of another version of the object is ignored.
+    """
+
+    def __init__(self, bucket: str = checkpoint_bucket_name) -> None:
+        self._bucket = bucket
+
+    def _get_key(self, log_bucket: str, log_key: str) -> str:
+        return f"checkpoint/index-prefix={index_prefix}/{log_bucket}/{log_key}.json"
+
+    def get(self, log_bucket: str, log_key: str, etag: str = "") -> Position:
+        """Get the saved position of a log object
+
+        Returns:
+            Position: the position of the first record not loaded yet, COMPLETED if the object
+                has been fully processed, the start of the object if there is no checkpoint.
+        """
+        try:
+            response = s3_client.get_object(
+                Bucket=self._bucket, Key=self._get_key(log_bucket, log_key)
+            )
+            checkpoint = json.loads(response["Body"].read())
+        except ClientError as e:
+            # other errors, e.g. AccessDenied, must not restart the object from the beginning
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return Position()
+            raise
+
+        if checkpoint.get("etag", "") != etag:
+            logger.info("The object %s/%s has changed, ignore checkpoint", log_bucket, log_key)
+            return Position()
+        offset = int(checkpoint.get("offset", 0))
+        # a checkpoint without byte offset is read from the start of the object
+        return Position(
+            offset,
+            int(checkpoint.get("byte_offset", 0)),
+            int(checkpoint.get("skip", offset)),
+        )
+
+    def put(
+        self, log_bucket: str, log_key: str, position: Position, etag: str = ""
+    ) -> None:
+        logger.info("Save checkpoint of %s/%s, position: %s", log_bucket, log_key, position)
+        s3_client.put_object(
+            Bucket=self._bucket,
+            Key=self._get_key(log_bucket, log_key),
+            Body=json.dumps({"etag": etag, **position._asdict()}),
+            ACL="bucket-owner-full-control",
+        )
@@ -9,15 +9,25 @@ import gzip
 import os
 import urllib
 import urllib.parse
-import importlib
-import boto3
 from itertools import islice
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable
 from commonlib import AWSConnection
 from log_processor.log_parser import LogParser
 from idx.idx_svc import AosIdxService
 from event.failed_records_handler import Restorer
+from event.kpl_aggregation import deaggregate
+from event.checkpoint import Checkpoint, Position, COMPLETED
+from event.ranged_reader import iter_lines, iter_ranges
+from event.lazy import LazyClient, LazyPlugins
+from event.stage_timer import (
+    stage_timer,
+    S3_GET,
+    DECOMPRESS,
+    PLUGINS,
+    BULK_WAIT,
+)
 from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 
@@ -33,6 +43,23 @@ DEFAULT_MAX_PAYLOAD_SIZE = 100
 # batch size can be overwritten via Env. var.
 batch_size = int(os.environ.get("BULK_BATCH_SIZE", DEFAULT_BULK_BATCH_SIZE))
 MAX_PAYLOAD_SIZE = int(os.environ.get("MAX_HTTP_PAYLOAD_SIZE_IN_MB", DEFAULT_MAX_PAYLOAD_SIZE))
+# number of bulk requests sent concurrently for the records of a KDS or MSK event
+BULK_MAX_WORKERS = int(os.environ.get("BULK_MAX_WORKERS", "1"))
+# log objects larger than this are loaded with checkpoints, and processing stops when the
+# remaining time of the invocation is less than CHECKPOINT_REMAINING_TIME_IN_MS
+CHECKPOINT_MIN_OBJECT_SIZE = (
+    int(os.environ.get("CHECKPOINT_MIN_OBJECT_SIZE_IN_MB", "128")) * 1024 * 1024
+)
+CHECKPOINT_REMAINING_TIME_IN_MS = int(
+    os.environ.get("CHECKPOINT_REMAINING_TIME_IN_MS", "60000")
+)
+# uncompressed log objects larger than this are downloaded by concurrent ranged GETs
+RANGED_GET_MIN_OBJECT_SIZE = (
+    int(os.environ.get("RANGED_GET_MIN_OBJECT_SIZE_IN_MB", "32")) * 1024 * 1024
+)
+RANGED_GET_SIZE = int(os.environ.get("RANGED_GET_SIZE_IN_MB", "8")) * 1024 * 1024
+RANGED_GET_MAX_WORKERS = int(os.environ.get("RANGED_GET_MAX_WORKERS", "4"))
+READ_CHUNK_SIZE = 64 * 1024
 bucket_name = os.environ.get("LOG_BUCKET_NAME")
 
 default_region = os.environ.get("AWS_REGION")
@@ -46,13 +73,8 @@ IS_SVC_PIPELINE = not IS_APP_PIPELINE
 
 
 plugins = os.environ.get("PLUGINS", "")
-if plugins:
-    plugin_modules = [
-        importlib.import_module(plugin).Plugin(log_type)
-        for plugin in plugins.split(",")
-    ]
-else:
-    plugin_modules = []
+# the plugins and their dependencies, e.g. maxminddb, are imported with the first records
+plugin_modules = LazyPlugins(plugins, log_type)
 
 
 #
@@ -77,13 +99,21 @@ scope = os.environ.get("SCOPE", "REGIONAL")
 source = str(os.environ.get("SOURCE", "KDS"))
 idx_svc = AosIdxService()
 restorer = Restorer()
-lambda_client = boto3.client("lambda", region_name=default_region)
+checkpoint = Checkpoint()
+# the S3 resource of the log objects without an assumed role, it's created on the first SQS event
+s3_resource = LazyClient(conn, "s3", client_type="resource")
 
 sub_category = str(os.environ.get("SUB_CATEGORY", ""))
 
 
+class ProcessingInterrupted(Exception):
+    """Processing of a log object is stopped before the invocation times out,
+    the loaded position has been saved and the message should be redelivered."""
+
+
 class EventType(ABC):
     _log_buffer = ""
+    _lambda_context = None
 
     def __init__(
         self,
@@ -107,6 +137,9 @@ class EventType(ABC):
     def set_metrics(self, m: Metrics):
         self._metrics = m
 
+    def set_lambda_context(self, context):
+        self._lambda_context = context
+
     @abstractmethod
     def process_event(self, event):
         """Parse the lambda events, and return processed json record(s).
@@ -119,27 +152,114 @@ class EventType(ABC):
     def log_parser(self):
         return self._log_parser
 
-    def _bulk(self, records):
+    def _bulk(self, records, ids=None):
         if len(records) == 0:
             return [], []
         if self._log_buffer:
-            return idx_svc.bulk_load_idx_records(self._process_by_plugins(records))
+            records, ids = self._process_by_plugins_with_ids(records, ids)
+            return idx_svc.bulk_load_idx_records(records, ids=ids)
         else:
-            return idx_svc.bulk_load_idx_records(records, True)
+            return idx_svc.bulk_load_idx_records(records, True, ids=ids)
+
+    def _get_max_payload_size_bytes(self) -> int:
+        # If configured MAX_PAYLOAD_SIZE is >= 100MB, reserve 5MB buffer
+        # Otherwise for smaller payload sizes (10 MB), reserve 1MB buffer
+        buffer_mb = 5 if MAX_PAYLOAD_SIZE >= 100 else 1
+        ## Calculate actual usable payload size in bytes by subtracting buffer from max payload size
+        return (MAX_PAYLOAD_SIZE - buffer_mb) * 1024 * 1024
+
+    def _chunk_iter(self, records: list, ids=None):
+        """Split records into chunks bounded by the bulk payload size and BULK_BATCH_SIZE,
+        a record larger than the payload size is sent in a chunk of its own."""
+        max_payload_size_bytes = self._get_max_payload_size_bytes()
+        start, current_size = 0, 0
+        for idx, record in enumerate(records):
+            record_size = idx_svc.calculate_record_size(record)
+            if idx > start and (
+                current_size + record_size > max_payload_size_bytes
+                or idx - start >= idx_svc.bulk_batch_size(batch_size)
+            ):
+                yield records[start:idx], ids[start:idx] if ids else None
+                start, current_size = idx, 0
+            current_size += record_size
+        if start < len(records):
+            yield records[start:], ids[start:] if ids else None
+
+    def _bulk_in_chunks(self, records, ids=None):
+        """Bulk load the records of a stream event in size bounded chunks, the chunks are sent
+        concurrently by BULK_MAX_WORKERS threads, and the failed records of all chunks are returned."""
+        if len(records) == 0:
+            return [], []
+        need_json_serial = not self._log_buffer
+        if self._log_buffer:
+            records, ids = self._process_by_plugins_with_ids(records, ids)
+
+        chunks = list(self._chunk_iter(records, ids))
+        logger.debug(f"Bulk load {len(records)} records in {len(chunks)} chunks")
+
+        def _bulk_chunk(chunk):
+            return idx_svc.bulk_load_idx_records(
+                chunk[0], need_json_serial=need_json_serial, ids=chunk[1]
+            )
+
+        total, failed_records = [], []
+        with stage_timer.stage(BULK_WAIT), ThreadPoolExecutor(
+            max_workers=max(min(BULK_MAX_WORKERS, len(chunks)), 1)
+        ) as executor:
+            for chunk_total, chunk_failed_records in executor.map(_bulk_chunk, chunks):
+                total.extend(chunk_total)
+                failed_records.extend(chunk_failed_records)
+        return total, failed_records
+
+    def _valid_record_iter(self, iterable: Iterable, excluded_counter: "Counter"):
+        """Drop the empty placeholder records yielded by parsers, e.g. `{}` for header rows or unparsable lines,
+        so that they don't go through plugins and bulk requests."""
+        for record in iterable:
+            if record:
+                yield record
+            else:
+                excluded_counter.increment()
+
+    def _valid_records_with_ids(
+        self, records: list, sources: list, excluded_counter: "Counter"
+    ):
+        """Drop the empty placeholder records, and generate the document id of each record from
+        its source position if deterministic document ids are enabled."""
+        valid_records, ids = [], []
+        for record, source in zip(records, sources):
+            if not record:
+                excluded_counter.increment()
+                continue
+            valid_records.append(record)
+            if idx_svc.document_id_enabled:
+                ids.append(idx_svc.generate_document_id(source, record))
+        return valid_records, ids or None
 
     def _process_by_plugins(self, records):
-        if plugin_modules and len(records) > 0:
-            for p in plugin_modules:
-                records = p.process(records)
+        if len(records) > 0 and plugin_modules:
+            with stage_timer.stage(PLUGINS):
+                for p in plugin_modules:
+                    records = p.process(records)
         return records
 
-    def _put_metric(self, total, failed_number):
+    def _process_by_plugins_with_ids(self, records, ids=None):
+        records = self._process_by_plugins(records)
+        if ids and len(ids) != len(records):
+            logger.warning(
+                "Plugins changed the number of records, document ids are not used."
+            )
+            ids = None
+        return records, ids
+
+    def _put_metric(self, total, failed_number, excluded_number=0):
+        stage_timer.add_records(total)
         if self._metrics:
             # fmt: off
             self._metrics.add_dimension("StackName", stack_name)
             self._metrics.add_metric(name="TotalLogs", unit=MetricUnit.Count, value=total)
-            self._metrics.add_metric(name="LoadedLogs", unit=MetricUnit.Count, value=total - failed_number)
+            self._metrics.add_metric(name="LoadedLogs", unit=MetricUnit.Count, value=total - failed_number - excluded_number)
             self._metrics.add_metric(name="FailedLogs", unit=MetricUnit.Count, value=failed_number)
+            self._metrics.add_metric(name="ExcludedLogs", unit=MetricUnit.Count, value=excluded_number)
             # fmt: on
 
 
@@ -150,36 +270,53 @@ class KDS(EventType):
     def process_event(self, event):
         # only handle
         records = []
+        sources = []
         if self._log_buffer == "KDS" and "Records" in event:
             if log_type in ["CloudTrail", "VPCFlow"]:
                 return self._process_event_with_gzip(event)
 
             for record in event["Records"]:
-                # single record with FLB
-                record_str = base64.b64decode(record["kinesis"]["data"]).decode(
-                    "utf-8", errors="replace"
-                )
-                try:
-                    if IS_SVC_PIPELINE:
-                        # cloudfront with RT
-                        value = self._log_parser.parse(record_str)
-                    else:
-                        value = self._log_parser.parse_single_line(record_str)
-                except Exception:
-                    logger.info(f"this log is not imported: {record_str}")
-                    continue
-                records.append(value)
+                record_id = self._get_kinesis_record_id(record)
+                # a KPL aggregated record packs several user records, others are a single record with FLB
+                user_records = deaggregate(base64.b64decode(record["kinesis"]["data"]))
+                for idx, data in enumerate(user_records):
+                    record_str = data.decode("utf-8", errors="replace")
+                    try:
+                        if IS_SVC_PIPELINE:
+                            # cloudfront with RT
+                            value = self._log_parser.parse(record_str)
+                        else:
+                            value = self._log_parser.parse_single_line(record_str)
+                    except Exception:
+                        logger.info(f"this log is not imported: {record_str}")
+                        continue
+                    records.append(value)
+                    sources.append(
+                        record_id if len(user_records) == 1 else f"{record_id}:{idx}"
+                    )
 
-        total, failed_records = self._bulk(records)
+        excluded_logs_counter = Counter()
+        records, ids = self._valid_records_with_ids(
+            records, sources, excluded_logs_counter
+        )
+        total, failed_records = self._bulk_in_chunks(records, ids)
         restorer.export_failed_records(
             plugin_modules,
             failed_records,
             restorer._get_export_prefix(),
         )
-        self._put_metric(len(total), len(failed_records))
+        self._put_metric(
+            len(total) + excluded_logs_counter.value,
+            len(failed_records),
+            excluded_logs_counter.value,
+        )
+
+    def _get_kinesis_record_id(self, record: dict) -> str:
+        return record.get("eventID") or record["kinesis"]["sequenceNumber"]
 
     def _process_event_with_gzip(self, event):
         records = []
+        sources = []
         if self._log_buffer == "KDS" and self._parser_name in [
             "CloudTrailWithCWL",
             "VPCFlowWithCWL",
@@ -191,16 +328,26 @@ class KDS(EventType):
                         "utf-8", errors="replace"
                     )
                 )
-                for value in values:
+                record_id = self._get_kinesis_record_id(record)
+                for idx, value in enumerate(values):
                     records.append(value)
+                    sources.append(f"{record_id}:{idx}")
 
-        total, failed_records = self._bulk(records)
+        excluded_logs_counter = Counter()
+        records, ids = self._valid_records_with_ids(
+            records, sources, excluded_logs_counter
+        )
+        total, failed_records = self._bulk_in_chunks(records, ids)
         restorer.export_failed_records(
             plugin_modules,
             failed_records,
             restorer._get_export_prefix(),
         )
-        self._put_metric(len(total), len(failed_records))
+        self._put_metric(
+            len(total) + excluded_logs_counter.value,
+            len(failed_records),
+            excluded_logs_counter.value,
+        )
 
 
 class MSK(EventType):
@@ -209,6 +356,7 @@ class MSK(EventType):
 
     def process_event(self, event):
         records = []
+        sources = []
 
         if (
             self._log_buffer != "MSK"
@@ -232,14 +380,23 @@ class MSK(EventType):
                 )
                 # logger.info(value)
                 records.append(value)
+                sources.append(f"{k}:{msg.get('offset')}")
 
-        total, failed_records = self._bulk(records)
+        excluded_logs_counter = Counter()
+        records, ids = self._valid_records_with_ids(
+            records, sources, excluded_logs_counter
+        )
+        total, failed_records = self._bulk_in_chunks(records, ids)
         restorer.export_failed_records(
             plugin_modules,
             failed_records,
             restorer._get_export_prefix(),
         )
-        self._put_metric(len(total), len(failed_records))
+        self._put_metric(
+            len(total) + excluded_logs_counter.value,
+            len(failed_records),
+            excluded_logs_counter.value,
+        )
 
 
 class Counter:
@@ -277,32 +434,78 @@ class SQS(EventType):
         self._time_key = self._config.get("time_key", "")
         self._time_format = self._config.get("time_format", "")
         self._time_offset = self._config.get("time_offset", "")
-        if log_type in ("Lambda", "RDS") or IS_APP_PIPELINE:
-            self.s3_resource = conn.get_client("s3", client_type="resource")
+        # the time of a log entry falls back to the ingestion time, which changes on every delivery.
+        self._id_excluded_keys = (self._time_key or "time",) if CONFIG_JSON else ()
+        if log_type in ("Lambda", "RDS") or IS_APP_PIPELINE or not assume_role:
+            self.s3_resource = s3_resource
         else:
+            # the credentials of the assumed role expire, they are renewed for each invocation
             self.s3_resource = conn.get_client(
                 "s3", sts_role_arn=assume_role, client_type="resource"
-            )   
+            )
+        # the object info in the event, e.g. {"size": 1024, "eTag": "..."}
+        self._objects = dict()
+        # the byte offset of the line which is being parsed
+        self._line_start = 0
         super().__init__(log_source)
 
-    def s3_read_object_by_lines(self, bucket, object_key):
-        """Read a file from S3 Line by Line"""
+    def _track_lines(self, lines: Iterable[bytes], position: int, start: int):
+        """Decode the lines from byte offset start, the lines before it are dropped, the
+        offset of the current line is kept in `_line_start`."""
+        for line in lines:
+            line_start, position = position, position + len(line)
+            if line_start < start:
+                continue
+            self._line_start = line_start
+            yield line.decode("utf-8", errors="replace")
+
+    def s3_read_object_by_lines(self, bucket, object_key, start=0):
+        """Read a file from S3 Line by Line from byte offset start, the start of a line.
+
+        A gzip object is still decompressed from the beginning, start is the byte offset of the
+        decompressed data, the lines before it are not decoded.
+        """
         obj = self.s3_resource.Object(bucket, object_key)
+        object_info = self._objects.get((bucket, object_key), {})
+        size = object_info.get("size", 0)
         try:
             logger.info("Start reading file...")
-            body = obj.get()["Body"]
             if (
                 self._is_gzip
                 or object_key.endswith(".gz")
                 or log_type in ["RDS", "Lambda"]
             ):
-                with gzip.GzipFile(fileobj=body) as f:
-                    while line := f.readline():
-                        yield line.decode("utf-8", errors="replace")
+                with stage_timer.stage(S3_GET):
+                    body = obj.get()["Body"]
+                with gzip.GzipFile(fileobj=stage_timer.timed_reader(body, S3_GET)) as f:
+                    chunks = iter(lambda: f.read(READ_CHUNK_SIZE), b"")
+                    # split by b"\n" only, the same as GzipFile.readline()
+                    yield from self._track_lines(
+                        iter_lines(stage_timer.iter_timed(chunks, DECOMPRESS), b"\n"),
+                        0,
+                        start,
+                    )
 
             else:
-                for line in body.iter_lines(keepends=True):
-                    yield line.decode("utf-8", errors="replace")
+                if RANGED_GET_MAX_WORKERS > 1 and size >= RANGED_GET_MIN_OBJECT_SIZE:
+                    chunks = iter_ranges(
+                        self.s3_resource.meta.client,
+                        bucket,
+                        object_key,
+                        size,
+                        RANGED_GET_SIZE,
+                        RANGED_GET_MAX_WORKERS,
+                        object_info.get("eTag", object_info.get("etag", "")),
+                        start,
+                    )
+                else:
+                    kwargs = {"Range": f"bytes={start}-"} if start else {}
+                    with stage_timer.stage(S3_GET):
+                        body = obj.get(**kwargs)["Body"]
+                    chunks = body.iter_chunks(READ_CHUNK_SIZE)
+                yield from self._track_lines(
+                    iter_lines(stage_timer.iter_timed(chunks, S3_GET)), start, start
+                )
 
         except Exception as e:
             # unable to get
@@ -332,6 +535,7 @@ class SQS(EventType):
                     key = urllib.parse.unquote_plus(
                         event_record["s3"]["object"]["key"], encoding="utf-8"
                     )
+                    self._objects[(bucket, key)] = event_record["s3"]["object"]
 
                     yield (bucket, key)
         except Exception as e:
@@ -374,31 +578,80 @@ class SQS(EventType):
         for bucket, key in self.get_bucket_and_keys(event):
             self.process_s3_log_file(total_logs_counter, bucket, key)
 
+    def _is_checkpoint_enabled(self, object_info: dict) -> bool:
+        return (
+            self._lambda_context is not None
+            and object_info.get("size", 0) >= CHECKPOINT_MIN_OBJECT_SIZE
+        )
+
+    def _is_running_out_of_time(self, start: Position, position: Position) -> bool:
+        """The first batch is always loaded, so that each invocation makes progress"""
+        return (
+            position != start
+            and self._lambda_context.get_remaining_time_in_millis()
+            < CHECKPOINT_REMAINING_TIME_IN_MS
+        )
+
     def process_s3_log_file(self, total_logs_counter, bucket, key):
-        lines = self.s3_read_object_by_lines(bucket, key)
-        logs = self.get_log_records(total_logs_counter, lines)
+        object_info = self._objects.get((bucket, key), {})
+        etag = object_info.get("eTag", object_info.get("etag", ""))
+        checkpoint_enabled = self._is_checkpoint_enabled(object_info)
+        start = checkpoint.get(bucket, key, etag) if checkpoint_enabled else Position()
+        if start == COMPLETED:
+            logger.info(f"The object {bucket}/{key} has been processed, skip it")
+            return
+        start_offset = start.offset
+        if start_offset > 0:
+            logger.info(f"Resume the object {bucket}/{key} from {start}")
+        # the records of other parsers are read from the beginning and skipped by offset
+        seekable = self._log_parser.seekable
+
+        lines = self.s3_read_object_by_lines(bucket, key, start.byte_offset)
+        excluded_logs_counter = Counter()
+        logs = self._valid_record_iter(
+            self.get_log_records(total_logs_counter, lines), excluded_logs_counter
+        )
 
         failed_records_count = 0
         current_batch = []
+        current_ids = []
         current_batch_size = 0
         batch_number = 0
-        # If configured MAX_PAYLOAD_SIZE is >= 100MB, reserve 5MB buffer
-        # Otherwise for smaller payload sizes (10 MB), reserve 1MB buffer
-        if MAX_PAYLOAD_SIZE >= 100:
-            BUFFER_MB = 5
-        else:
-            BUFFER_MB = 1
-        ## Calculate actual usable payload size in bytes by subtracting buffer from max payload size
-        MAX_PAYLOAD_SIZE_BYTES = (MAX_PAYLOAD_SIZE - BUFFER_MB) * 1024 * 1024
-        for record in logs:
+        # position and counters when the first record of current batch is read, records before it have been loaded
+        batch_position, batch_total, batch_excluded = start, total_logs_counter.value, 0
+        # counters of the records loaded by previous invocations, they are not reported again
+        skipped_total, skipped_excluded = 0, 0
+        # the line of the current record, and the number of records read from the line before it
+        line_start, line_records = -1, 0
+        MAX_PAYLOAD_SIZE_BYTES = self._get_max_payload_size_bytes()
+        for offset, record in enumerate(logs, start_offset - start.skip):
+            if seekable:
+                if self._line_start != line_start:
+                    line_start, line_records = self._line_start, 0
+                else:
+                    line_records += 1
+            if offset < start_offset:
+                continue
+            if offset == start_offset and start_offset > 0:
+                skipped_total = total_logs_counter.value - 1 - batch_total
+                skipped_excluded = excluded_logs_counter.value
+                batch_total, batch_excluded = total_logs_counter.value - 1, skipped_excluded
             record_size = idx_svc.calculate_record_size(record)
             should_process_current_batch = (
                 current_batch_size + record_size > MAX_PAYLOAD_SIZE_BYTES or 
-                len(current_batch) == batch_size
+                len(current_batch) >= idx_svc.bulk_batch_size(batch_size)
             )
             if should_process_current_batch and current_batch:
+                if checkpoint_enabled and self._is_running_out_of_time(
+                    start, batch_position
+                ):
+                    self._interrupt(
+                        total_logs_counter, bucket, key, etag, batch_position,
+                        batch_total - skipped_total, failed_records_count,
+                        batch_excluded - skipped_excluded,
+                    )
                 logger.debug(f"Processing batch_number: {batch_number}, record_count: {len(current_batch)}")
-                _, failed_records = self._bulk(current_batch)
+                _, failed_records = self._bulk(current_batch, current_ids or None)
                 failed_records_count += len(failed_records)
                 if failed_records:
                     restorer.export_failed_records(
@@ -407,13 +660,35 @@ class SQS(EventType):
                             restorer._get_export_prefix(batch_number, bucket, key),
                         )
                 batch_number += 1
+                batch_position = (
+                    Position(offset, line_start, line_records)
+                    if seekable
+                    else Position(offset, 0, offset)
+                )
+                batch_total = total_logs_counter.value - 1
+                batch_excluded = excluded_logs_counter.value
                 current_batch = []
+                current_ids = []
                 current_batch_size = 0
             current_batch.append(record)
             current_batch_size += record_size
+            if idx_svc.document_id_enabled:
+                current_ids.append(
+                    idx_svc.generate_document_id(
+                        f"s3://{bucket}/{key}:{offset}", record, self._id_excluded_keys
+                    )
+                )
         if current_batch:
+            if checkpoint_enabled and self._is_running_out_of_time(
+                start, batch_position
+            ):
+                self._interrupt(
+                    total_logs_counter, bucket, key, etag, batch_position,
+                    batch_total - skipped_total, failed_records_count,
+                    batch_excluded - skipped_excluded,
+                )
             logger.debug(f"Processing batch_number: {batch_number}, record_count: {len(current_batch)}")
-            _, failed_records = self._bulk(current_batch)
+            _, failed_records = self._bulk(current_batch, current_ids or None)
             failed_records_count += len(failed_records)
             if failed_records:
                 restorer.export_failed_records(
@@ -421,7 +696,26 @@ class SQS(EventType):
                         failed_records,
                         restorer._get_export_prefix(batch_number, bucket, key),
                     )
-        self._put_metric(total_logs_counter.value, failed_records_count)
+        if checkpoint_enabled:
+            checkpoint.put(bucket, key, COMPLETED, etag)
+        total_logs_counter.set_value(total_logs_counter.value - skipped_total)
+        self._put_metric(
+            total_logs_counter.value,
+            failed_records_count,
+            excluded_logs_counter.value - skipped_excluded,
+        )
+
+    def _interrupt(
+        self, total_logs_counter, bucket, key, etag, position, total, failed, excluded
+    ):
+        """Save the position of the first record not loaded yet and stop processing, the
+        metrics only include the records loaded by this invocation."""
+        checkpoint.put(bucket, key, position, etag)
+        total_logs_counter.set_value(total)
+        self._put_metric(total, failed, excluded)
+        raise ProcessingInterrupted(
+            f"Stop processing {bucket}/{key} at {position} before timeout"
+        )
 
     def get_log_records(self, total_logs_counter, lines):
         if CONFIG_JSON:
@@ -474,6 +768,7 @@ class EventBridge(SQS):
         detail = eb_event["detail"]
         bucket = detail["bucket"]["name"]
         key = detail["object"]["key"]
+        self._objects[(bucket, key)] = detail["object"]
         return [(bucket, key)]
 
 
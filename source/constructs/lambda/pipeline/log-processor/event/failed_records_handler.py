@@ -9,6 +9,8 @@ from io import StringIO
 import csv
 
 from datetime import datetime
+from event.stage_timer import stage_timer, EXPORT
+from event.lazy import LazyClient
 
 
 logger = get_logger(__name__)
@@ -16,7 +18,7 @@ logger = get_logger(__name__)
 default_region = os.environ.get("AWS_REGION")
 failed_log_bucket_name = os.environ.get("BACKUP_BUCKET_NAME")
 conn = AWSConnection()
-s3_local = conn.get_client("s3", client_type="resource")
+s3_local = LazyClient(conn, "s3", client_type="resource")
 
 index_prefix = os.environ.get("INDEX_PREFIX").lower()
 
@@ -64,13 +66,15 @@ class Restorer:
 
         if len(failed_records) > 0 and key:
             logger.info("Export failed records to %s/%s", bucket, key)
-            export_obj = s3_local.Object(bucket, key)
-            if key.endswith(".json"):
-                body = json.dumps(failed_records, cls=DateTimeEncoder)
-            else:
-                body = self.write_to_csv(failed_records, plugin_modules)
+            with stage_timer.stage(EXPORT):
+                export_obj = s3_local.Object(bucket, key)
+                if key.endswith(".json"):
+                    body = json.dumps(failed_records, cls=DateTimeEncoder)
+                else:
+                    body = self.write_to_csv(failed_records, plugin_modules)
 
-            resp = export_obj.put(ACL="bucket-owner-full-control", Body=body)
+                resp = export_obj.put(ACL="bucket-owner-full-control", Body=body)
+            stage_timer.add_bytes(EXPORT, len(body))
             logger.info(resp)
 
     def write_to_csv(self, json_records: list, plugin_modules: list = []) -> str:
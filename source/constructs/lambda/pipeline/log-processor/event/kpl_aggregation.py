@@ -0,0 +1,129 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""De-aggregation of Kinesis Producer Library (KPL) aggregated records.
+
+An aggregated record is the KPL magic bytes, followed by a protobuf encoded AggregatedRecord
+message and the MD5 digest of that message:
+
+    message AggregatedRecord {
+        repeated string partition_key_table = 1;
+        repeated string explicit_hash_key_table = 2;
+        repeated Record records = 3;
+    }
+    message Record {
+        required uint64 partition_key_index = 1;
+        optional uint64 explicit_hash_key_index = 2;
+        required bytes data = 3;
+        repeated Tag tags = 4;
+    }
+
+see https://github.com/awslabs/amazon-kinesis-producer/blob/master/aggregation-format.md
+"""
+
+import hashlib
+from typing import List
+
+from commonlib.logging import get_logger
+
+logger = get_logger(__name__)
+
+KPL_AGGREGATED_RECORD_MAGIC = b"\xf3\x89\x9a\xc2"
+DIGEST_SIZE = 16
+
+AGGREGATED_RECORD_RECORDS_FIELD = 3
+RECORD_DATA_FIELD = 3
+
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_64BIT = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_32BIT = 5
+
+
+def _read_varint(buf: bytes, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise ValueError("Varint is too long")
+
+
+def _iter_fields(buf: bytes, start: int = 0, end: int = -1):
+    """Iterate the fields of a protobuf message, yield (field_number, wire_type, value), value is
+    an int for varint fields, or the (start, end) of the payload for length delimited fields."""
+    pos = start
+    end = len(buf) if end < 0 else end
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field_number, wire_type = key >> 3, key & 0x07
+        if wire_type == WIRE_TYPE_VARINT:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+            length, pos = _read_varint(buf, pos)
+            value = (pos, pos + length)
+            pos += length
+        elif wire_type == WIRE_TYPE_64BIT:
+            value, pos = None, pos + 8
+        elif wire_type == WIRE_TYPE_32BIT:
+            value, pos = None, pos + 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        if pos > end:
+            raise ValueError("Truncated protobuf message")
+        yield field_number, wire_type, value
+
+
+def is_aggregated(data: bytes) -> bool:
+    return (
+        len(data) > len(KPL_AGGREGATED_RECORD_MAGIC) + DIGEST_SIZE
+        and data[: len(KPL_AGGREGATED_RECORD_MAGIC)] == KPL_AGGREGATED_RECORD_MAGIC
+    )
+
+
+def deaggregate(data: bytes) -> List[bytes]:
+    """Return the user records packed in a KPL aggregated record.
+
+    The data is returned as the only user record if it is not an aggregated record, or the
+    MD5 digest doesn't match, or the protobuf message can't be decoded, so that records which
+    are not produced by KPL are processed as before.
+
+    Args:
+        data (bytes): The base64 decoded data of a Kinesis record
+
+    Returns:
+        List[bytes]: The data of the user records
+    """
+    if not is_aggregated(data):
+        return [data]
+
+    message = memoryview(data)[len(KPL_AGGREGATED_RECORD_MAGIC) : -DIGEST_SIZE]
+    if hashlib.md5(message, usedforsecurity=False).digest() != data[-DIGEST_SIZE:]:
+        logger.warning("The MD5 digest of the KPL aggregated record doesn't match")
+        return [data]
+
+    try:
+        user_records = []
+        for field_number, wire_type, value in _iter_fields(message):
+            if (
+                field_number != AGGREGATED_RECORD_RECORDS_FIELD
+                or wire_type != WIRE_TYPE_LENGTH_DELIMITED
+            ):
+                continue
+            for sub_field_number, sub_wire_type, sub_value in _iter_fields(
+                message, value[0], value[1]
+            ):
+                if (
+                    sub_field_number == RECORD_DATA_FIELD
+                    and sub_wire_type == WIRE_TYPE_LENGTH_DELIMITED
+                ):
+                    user_records.append(bytes(message[sub_value[0] : sub_value[1]]))
+        return user_records
+    except (ValueError, IndexError) as e:
+        logger.warning("Unable to decode the KPL aggregated record: %s", e)
+        return [data]
@@ -0,0 +1,93 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Deferred construction of boto3 clients and plugins.
+
+A cold start pays for every client and plugin created at import time, although an invocation
+only uses the ones of its source and log type, e.g. the events client is only used by scheduled
+WAF sampled events, and the plugins are only used when there are records to enrich.
+"""
+
+import importlib
+import threading
+from collections.abc import Sequence
+
+from commonlib.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class LazyClient:
+    """A boto3 client or resource created by `conn.get_client(*args, **kwargs)` on first use.
+
+    Usage:
+    ```
+    s3_client = LazyClient(conn, "s3")
+    # the client is created here
+    s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+    ```
+    """
+
+    def __init__(self, conn, *args, **kwargs) -> None:
+        self._conn = conn
+        self._args = args
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._client = None
+
+    def get(self):
+        if self._client is None:
+            # the client can be first used by the bulk or download threads at the same time
+            with self._lock:
+                if self._client is None:
+                    self._client = self._conn.get_client(*self._args, **self._kwargs)
+        return self._client
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name):
+        # e.g. copy and pickle probe dunder methods before __init__
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+class LazyPlugins(Sequence):
+    """The Plugin instances of a comma separated list of plugin modules, the modules are
+    imported on first access, e.g. `if plugin_modules:` or `for p in plugin_modules:`"""
+
+    def __init__(self, plugins: str, log_type: str) -> None:
+        self._names = [x for x in plugins.split(",") if x] if plugins else []
+        self._log_type = log_type
+        self._lock = threading.Lock()
+        self._plugins = None
+
+    def _load(self) -> list:
+        if self._plugins is None:
+            with self._lock:
+                if self._plugins is None:
+                    if self._names:
+                        logger.info("Load plugins: %s", self._names)
+                    self._plugins = [
+                        importlib.import_module(name).Plugin(self._log_type)
+                        for name in self._names
+                    ]
+        return self._plugins
+
+    @property
+    def loaded(self) -> bool:
+        return self._plugins is not None
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def __len__(self) -> int:
+        # no plugins are configured, there is nothing to import
+        if not self._names:
+            return 0
+        return len(self._load())
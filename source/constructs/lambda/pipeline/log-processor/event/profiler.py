@@ -0,0 +1,154 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Sampling profiler for a fraction of the log processor invocations.
+
+A daemon thread samples the stacks of the other threads every PROFILING_INTERVAL_MS milliseconds,
+the samples are written to the backup bucket as collapsed stacks, one `frame;frame;frame count`
+line per distinct stack, which can be rendered by flamegraph.pl or speedscope.
+
+The cost of the sampler thread is checked after each sample, the interval is doubled whenever its
+CPU time exceeds PROFILING_MAX_OVERHEAD of the elapsed time, and sampling stops if the interval
+reaches one second.
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+
+from commonlib.logging import get_logger
+from commonlib import AWSConnection
+from event.lazy import LazyClient
+
+logger = get_logger(__name__)
+
+profiling_bucket_name = os.environ.get("BACKUP_BUCKET_NAME")
+index_prefix = os.environ.get("INDEX_PREFIX", "").lower()
+conn = AWSConnection()
+s3_client = LazyClient(conn, "s3")
+
+# the fraction of invocations which are profiled, 0 to disable
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_MS = float(os.environ.get("PROFILING_INTERVAL_MS", "10"))
+PROFILING_MAX_OVERHEAD = float(os.environ.get("PROFILING_MAX_OVERHEAD", "0.01"))
+MAX_INTERVAL = 1.0
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        interval_ms: float = PROFILING_INTERVAL_MS,
+        max_overhead: float = PROFILING_MAX_OVERHEAD,
+    ) -> None:
+        self.interval = max(interval_ms, 1) / 1000
+        self.max_overhead = max_overhead
+        self.samples = 0
+        self._stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="log-processor-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def _sample(self) -> None:
+        current = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        while not self._stopped.wait(self.interval):
+            self._sample()
+            overhead = (time.thread_time() - cpu_started) / (
+                time.perf_counter() - started
+            )
+            if overhead > self.max_overhead:
+                self.interval *= 2
+                if self.interval >= MAX_INTERVAL:
+                    logger.warning(
+                        "Stop profiling, the overhead %.4f exceeds %.4f",
+                        overhead,
+                        self.max_overhead,
+                    )
+                    return
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.items())
+
+
+class InvocationProfiler:
+    """Profile a sample of invocations and upload the collapsed stacks of each to
+    s3://{backup bucket}/profiling/index-prefix={index prefix}/date={date}/{request id}.collapsed
+    """
+
+    def __init__(self, bucket: str = profiling_bucket_name) -> None:
+        self._bucket = bucket
+        self._profiler = None
+
+    def start(self, sample_rate: float = PROFILING_SAMPLE_RATE) -> bool:
+        """Start profiling the invocation if it's sampled"""
+        self._profiler = None
+        if sample_rate > 0 and random.random() < sample_rate:  # NOSONAR
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+        return self._profiler is not None
+
+    def _get_key(self, request_id: str) -> str:
+        date = datetime.now().strftime("%Y-%m-%d")
+        return f"profiling/index-prefix={index_prefix}/date={date}/{request_id}.collapsed"
+
+    def stop(self, request_id: str = "") -> str:
+        """Stop profiling and upload the collapsed stacks, the failures are logged only so that
+        they never fail the invocation.
+
+        Returns:
+            str: The key of the uploaded object, or "" if the invocation is not profiled
+        """
+        if self._profiler is None:
+            return ""
+        profiler, self._profiler = self._profiler, None
+        profiler.stop()
+
+        key = self._get_key(request_id or str(uuid.uuid4()))
+        try:
+            s3_client.put_object(
+                Bucket=self._bucket,
+                Key=key,
+                Body=profiler.collapsed().encode("utf-8"),
+                ACL="bucket-owner-full-control",
+            )
+            logger.info(
+                "Uploaded %d profiling samples to %s/%s", profiler.samples, self._bucket, key
+            )
+            return key
+        except Exception as e:
+            logger.warning("Unable to upload profiling samples: %s", e)
+            return ""
+
+
+invocation_profiler = InvocationProfiler()
@@ -0,0 +1,132 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Read an uncompressed S3 object line by line with concurrent ranged GETs.
+
+The object is split into fixed size byte ranges which are downloaded by a pool of threads, at most
+`max_workers` ranges are in flight or buffered at the same time. The ranges are consumed in order,
+and a line crossing the boundary of two ranges is joined with the rest of it in the next range, so
+the lines are exactly the same as `StreamingBody.iter_lines(keepends=True)` of a single GET.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+from commonlib.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_byte_ranges(
+    size: int, range_size: int, start: int = 0
+) -> List[Tuple[int, int]]:
+    """Split the bytes from start of an object of size bytes into inclusive (start, end) byte ranges"""
+    range_size = max(range_size, 1)
+    return [
+        (offset, min(offset + range_size, size) - 1)
+        for offset in range(start, size, range_size)
+    ]
+
+
+def _get_range(
+    s3_client, bucket: str, key: str, byte_range: Tuple[int, int], etag: str = ""
+) -> bytes:
+    kwargs = {"IfMatch": etag} if etag else {}
+    response = s3_client.get_object(
+        Bucket=bucket, Key=key, Range=f"bytes={byte_range[0]}-{byte_range[1]}", **kwargs
+    )
+    return response["Body"].read()
+
+
+def iter_lines(chunks: Iterable[bytes], separator: bytes = b"") -> Iterator[bytes]:
+    """Split a stream of bytes chunks into lines, the line endings are kept.
+
+    Lines are split by any line boundary like `StreamingBody.iter_lines(keepends=True)`, or only
+    by separator if it's specified, e.g. b"\\n" like `GzipFile.readline()`.
+    """
+    pending = b""
+    for chunk in chunks:
+        data = pending + chunk
+        if separator:
+            lines = data.split(separator)
+            pending = lines.pop()
+            for line in lines:
+                yield line + separator
+        else:
+            lines = data.splitlines(True)
+            pending = lines.pop() if lines else b""
+            yield from lines
+    if pending:
+        yield pending
+
+
+def iter_ranges(
+    s3_client,
+    bucket: str,
+    key: str,
+    size: int,
+    range_size: int,
+    max_workers: int = 4,
+    etag: str = "",
+    start: int = 0,
+) -> Iterator[bytes]:
+    """Yield the byte ranges of an object in order, the ranges are downloaded concurrently.
+
+    Args:
+        s3_client: The boto3 S3 client, it's shared by the download threads
+        bucket (str): Bucket name
+        key (str): Object key
+        size (int): Object size in bytes
+        range_size (int): Bytes of each ranged GET
+        max_workers (int, optional): Number of concurrent ranged GETs. Defaults to 4.
+        etag (str, optional): The ETag of the object, so that the ranges of an object overwritten
+            during the read are not mixed. Defaults to "".
+        start (int, optional): The first byte to read, e.g. the position of a checkpoint.
+            Defaults to 0.
+    """
+    byte_ranges = get_byte_ranges(size, range_size, start)
+    logger.info(
+        "Read %s/%s with %d ranged GETs, max workers: %d",
+        bucket,
+        key,
+        len(byte_ranges),
+        max_workers,
+    )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending_ranges = iter(byte_ranges)
+        futures = deque()
+        for byte_range in pending_ranges:
+            futures.append(executor.submit(_get_range, s3_client, bucket, key, byte_range, etag))
+            if len(futures) == max_workers:
+                break
+
+        try:
+            while futures:
+                chunk = futures.popleft().result()
+                # keep the window full while the current range is being consumed
+                byte_range = next(pending_ranges, None)
+                if byte_range is not None:
+                    futures.append(
+                        executor.submit(_get_range, s3_client, bucket, key, byte_range, etag)
+                    )
+                yield chunk
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def iter_lines_by_ranges(
+    s3_client,
+    bucket: str,
+    key: str,
+    size: int,
+    range_size: int,
+    max_workers: int = 4,
+    etag: str = "",
+) -> Iterator[bytes]:
+    """Yield the lines of an object read by concurrent ranged GETs, the line endings are kept."""
+    return iter_lines(
+        iter_ranges(s3_client, bucket, key, size, range_size, max_workers, etag)
+    )
@@ -0,0 +1,167 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Per-stage timing of a log processor invocation.
+
+The time of a stage excludes the time of the stages nested in it, e.g. the time spent in S3 reads
+while the gzip stream is decompressed is reported as S3Get instead of Decompress, and the time left
+in the Parse stage which wraps the processing of an event is the time spent by the log parsers.
+
+Timing is enabled for a sample of invocations only, a disabled timer costs a function call per
+timed block, the blocks are chunks of an object or batches of records, never single records.
+"""
+
+import os
+import time
+import random
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from commonlib.logging import get_logger
+
+logger = get_logger(__name__)
+
+# the fraction of invocations which emit stage metrics, 0 to disable, 1 for every invocation
+STAGE_METRICS_SAMPLE_RATE = float(os.environ.get("STAGE_METRICS_SAMPLE_RATE", "0"))
+
+PARSE = "Parse"
+S3_GET = "S3Get"
+DECOMPRESS = "Decompress"
+PLUGINS = "Plugins"
+SERIALIZE = "Serialize"
+BULK = "Bulk"
+BULK_WAIT = "BulkWait"
+EXPORT = "Export"
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._elapsed = defaultdict(float)
+        self._bytes = defaultdict(int)
+        self._records = 0
+        self._started = time.perf_counter()
+        self.count = 0
+
+    def start(self, sample_rate: float = STAGE_METRICS_SAMPLE_RATE) -> bool:
+        """Start timing an invocation if it's sampled"""
+        self._reset()
+        self._local.stack = []
+        self.enabled = sample_rate > 0 and random.random() < sample_rate  # NOSONAR
+        return self.enabled
+
+    def _enter(self) -> None:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+
+    def _exit(self, name: str, elapsed: float, nbytes: int = 0) -> None:
+        stack = self._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self._lock:
+            self._elapsed[name] += elapsed - nested
+            self._bytes[name] += nbytes
+            self.count += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        self._enter()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._exit(name, time.perf_counter() - start)
+
+    def iter_timed(self, iterable: Iterable[bytes], name: str) -> Iterator[bytes]:
+        """Time each next() of an iterable of bytes chunks as the stage name"""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            self._enter()
+            start = time.perf_counter()
+            chunk = None
+            try:
+                chunk = next(iterator, None)
+            finally:
+                self._exit(name, time.perf_counter() - start, len(chunk or b""))
+            if chunk is None:
+                return
+            yield chunk
+
+    def timed_reader(self, fileobj, name: str):
+        """Wrap a file object so that its read() calls are timed as the stage name"""
+        return _TimedReader(self, fileobj, name) if self.enabled else fileobj
+
+    def add_bytes(self, name: str, nbytes: int) -> None:
+        if self.enabled:
+            with self._lock:
+                self._bytes[name] += nbytes
+
+    def add_records(self, count: int) -> None:
+        if self.enabled:
+            with self._lock:
+                self._records += count
+
+    def summary(self) -> dict:
+        """Return the milliseconds and bytes of each stage, e.g. {"S3Get": {"ms": 1.5, "bytes": 1024}}"""
+        return {
+            name: {
+                "ms": round(max(self._elapsed[name], 0) * 1000, 3),
+                "bytes": self._bytes[name],
+            }
+            for name in sorted(set(self._elapsed) | set(self._bytes))
+        }
+
+    def put_metrics(self, metrics: Metrics) -> None:
+        """Add the milliseconds and bytes of each stage and the processed records per second to
+        the metrics, then stop timing."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        # fmt: off
+        for name, elapsed in self._elapsed.items():
+            metrics.add_metric(name=f"{name}Time", unit=MetricUnit.Milliseconds, value=round(max(elapsed, 0) * 1000, 3))
+        for name, nbytes in self._bytes.items():
+            if nbytes:
+                metrics.add_metric(name=f"{name}Bytes", unit=MetricUnit.Bytes, value=nbytes)
+        total_seconds = time.perf_counter() - self._started
+        if total_seconds > 0:
+            metrics.add_metric(name="RecordsPerSecond", unit=MetricUnit.CountPerSecond, value=round(self._records / total_seconds, 3))
+        # fmt: on
+
+
+class _TimedReader:
+    def __init__(self, timer: StageTimer, fileobj, name: str) -> None:
+        self._timer = timer
+        self._fileobj = fileobj
+        self._name = name
+
+    def read(self, size: int = -1) -> bytes:
+        self._timer._enter()
+        start = time.perf_counter()
+        data = b""
+        try:
+            data = self._fileobj.read(size)
+        finally:
+            self._timer._exit(self._name, time.perf_counter() - start, len(data))
+        return data
+
+
+stage_timer = StageTimer()
@@ -4,13 +4,18 @@
 from commonlib.logging import get_logger
 from commonlib import AWSConnection
 import os
+import re
 import time
 import json
 import gzip
 import base64
+import hashlib
+import threading
 from datetime import datetime, date
 from botocore.exceptions import ClientError
 from idx.opensearch_client import OpenSearchUtil
+from event.stage_timer import stage_timer, SERIALIZE, BULK
+from event.lazy import LazyClient
 from commonlib.exception import APIException, ErrorCode
 
 
@@ -24,6 +29,29 @@ SLEEP_INTERVAL = 10
 DEFAULT_BULK_BATCH_SIZE = "10000"
 batch_size = int(os.environ.get("BULK_BATCH_SIZE", DEFAULT_BULK_BATCH_SIZE))
 BULK_ACTION = "index"
+BULK_ERRORS_PATTERN = re.compile(rb'"errors"\s*:\s*(true|false)')
+# "hash": derive _id from the source position and content of each record and index with create,
+# so that replayed records become version conflicts instead of duplicated documents.
+# The _id is only unique within a backing index, a replay which arrives after the alias has been
+# rolled over by ISM is written to the new write index and duplicated again.
+DOCUMENT_ID_STRATEGY = os.environ.get("DOCUMENT_ID_STRATEGY", "").lower()
+VERSION_CONFLICT_ERROR = "version_conflict_engine_exception"
+RESOURCE_ALREADY_EXISTS_ERROR = "resource_already_exists_exception"
+# backfill mode: the records are loaded into a dedicated index {alias}-backfill-{BACKFILL_ID}, which
+# isn't refreshed or replicated until the function is invoked with {"action": "FinishBackfill"}
+BACKFILL_ID = os.environ.get("BACKFILL_ID", "")
+FINISH_BACKFILL_ACTION = "FinishBackfill"
+# the bulk batch size of a backfill is adapted to the bulk latency within [min, max]
+BACKFILL_BULK_BATCH_SIZE = int(os.environ.get("BACKFILL_BULK_BATCH_SIZE", "20000"))
+BACKFILL_MIN_BULK_BATCH_SIZE = int(
+    os.environ.get("BACKFILL_MIN_BULK_BATCH_SIZE", "1000")
+)
+BACKFILL_MAX_BULK_BATCH_SIZE = int(
+    os.environ.get("BACKFILL_MAX_BULK_BATCH_SIZE", "100000")
+)
+BACKFILL_BULK_TARGET_LATENCY_IN_MS = int(
+    os.environ.get("BACKFILL_BULK_TARGET_LATENCY_IN_MS", "10000")
+)
 
 log_type = os.environ.get("LOG_TYPE", "").lower()
 warm_age = os.environ.get("WARM_AGE", "")
@@ -46,8 +74,20 @@ endpoint = os.environ.get("ENDPOINT")
 
 create_dashboard = os.environ.get("CREATE_DASHBOARD", "No")
 INDEX_TEMPLATE_GZIP_BASE64 = os.environ.get("INDEX_TEMPLATE_GZIP_BASE64", "")
+# the nested CloudTrail fields which are indexed as flattened fields, see CloudTrail in log_parser
+CLOUDTRAIL_FLATTENED_FIELDS = (
+    [
+        x.strip()
+        for x in os.environ.get(
+            "CLOUDTRAIL_NESTED_FIELDS", "requestParameters,responseElements"
+        ).split(",")
+        if x.strip()
+    ]
+    if os.environ.get("CLOUDTRAIL_NESTED_FIELD_TYPE", "keyword").lower() == "flattened"
+    else []
+)
 
-lambda_client = conn.get_client("lambda", default_region)
+lambda_client = LazyClient(conn, "lambda", default_region)
 function_name = os.environ.get("FUNCTION_NAME")
 
 init_master_role_job = int(os.environ.get("INIT_MASTER_ROLE_JOB", "0"))
@@ -56,6 +96,8 @@ init_template_job = int(os.environ.get("INIT_TEMPLATE_JOB", "0"))
 init_dashboard_job = int(os.environ.get("INIT_DASHBOARD_JOB", "0"))
 init_alias_job = int(os.environ.get("INIT_ALIAS_JOB", "0"))
 init_index_pattern_job = int(os.environ.get("INIT_INDEX_PATTERN_JOB", "0"))
+# the backfill index is checked once per execution environment
+init_backfill_job = 0
 rollover_index_job = int(os.environ.get("ROLLOVER_INDEX_JOB", "1"))
 stack_name = os.environ.get("STACK_NAME", "")
 
@@ -75,6 +117,48 @@ opensearch_util = OpenSearchUtil(
 )
 
 
+class AdaptiveBatchSize:
+    """The number of records of a bulk request in backfill mode.
+
+    It grows by a quarter after a full batch is loaded within the target latency, shrinks by a
+    quarter after a slower batch and is halved when a batch is rejected, e.g. 413 or 429.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_ms: float):
+        self._minimum = max(minimum, 1)
+        self._maximum = max(maximum, self._minimum)
+        self._target_ms = target_ms
+        self._value = min(max(initial, self._minimum), self._maximum)
+        # the bulk requests of a stream event are sent by concurrent threads
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def _set(self, value: int):
+        self._value = min(max(value, self._minimum), self._maximum)
+
+    def update(self, records: int, elapsed_ms: float):
+        with self._lock:
+            if elapsed_ms > self._target_ms:
+                self._set(self._value - self._value // 4)
+            elif records >= self._value:
+                self._set(self._value + max(self._value // 4, 1))
+
+    def reject(self):
+        with self._lock:
+            self._set(self._value // 2)
+
+
+backfill_batch_size = AdaptiveBatchSize(
+    BACKFILL_BULK_BATCH_SIZE,
+    BACKFILL_MIN_BULK_BATCH_SIZE,
+    BACKFILL_MAX_BULK_BATCH_SIZE,
+    BACKFILL_BULK_TARGET_LATENCY_IN_MS,
+)
+
+
 class AosIdxService:
     def run_func_with_retry(
         self,
@@ -90,7 +174,7 @@ class AosIdxService:
             response = func(**kwargs)
             if response.status_code < 300:
                 logger.info("%s runs successfully", func_name)
-                break
+                return response
             logger.error("%s failed: %s", func_name, response.text)
             if response.status_code == 403 and retry >= total_retry:
                 self.map_backend_role()
@@ -131,6 +215,7 @@ class AosIdxService:
         self._init_template()
         self._init_alias()
         self._rollover_index()
+        self._init_backfill()
         if CONFIG_JSON and sub_category == "FLB":
             self.adjust_lambda_env_var(env_name="SUB_CATEGORY", val="S3")
 
@@ -167,12 +252,7 @@ class AosIdxService:
     def _init_ism(self):
         global init_ism_job
         if init_ism_job == 0:
-            if (
-                warm_age == ""
-                and cold_age == ""
-                and retain_age == ""
-                and rollover_size == ""
-            ):
+            if not self.ism_policy_enabled:
                 logger.info("No need to create ISM policy")
                 return None
 
@@ -197,6 +277,10 @@ class AosIdxService:
             if int(os.environ.get("INIT_ISM_JOB", "0")) == 0:
                 self.adjust_lambda_env_var(env_name="INIT_ISM_JOB", val=1)
 
+    @property
+    def ism_policy_enabled(self) -> bool:
+        return any((warm_age, cold_age, retain_age, rollover_size))
+
     def _decode_gzip_base64_json_safe(self, s: str):
         if not s:
             return None
@@ -213,7 +297,13 @@ class AosIdxService:
         else:
             logger.info("Using default index template")
             return opensearch_util.default_index_template(
-                number_of_shards, number_of_replicas, codec, refresh_interval
+                number_of_shards,
+                number_of_replicas,
+                codec,
+                refresh_interval,
+                flattened_fields=(
+                    CLOUDTRAIL_FLATTENED_FIELDS if log_type == "cloudtrail" else ()
+                ),
             )
 
     def _create_index_template(self, index_template):
@@ -314,11 +404,135 @@ class AosIdxService:
             if int(os.environ.get("ROLLOVER_INDEX_JOB", "0")) == 0:
                 self.adjust_lambda_env_var(env_name="ROLLOVER_INDEX_JOB", val=1)
 
-    def _create_bulk_records(self, records: list, need_json_serial=False) -> str:
-        """Helper function to create payload for bulk load"""
+    @property
+    def backfill_enabled(self) -> bool:
+        return bool(BACKFILL_ID)
+
+    def default_index_name(self) -> str:
+        """The index of the bulk requests, the dedicated index in backfill mode, otherwise the alias"""
+        if self.backfill_enabled:
+            return opensearch_util.backfill_index_name(BACKFILL_ID)
+        return opensearch_util.index_alias
+
+    def bulk_batch_size(self, default: int) -> int:
+        """The maximum number of records of a bulk request, it's adaptive in backfill mode"""
+        return backfill_batch_size.value if self.backfill_enabled else default
+
+    def _init_backfill(self):
+        global init_backfill_job
+        if not self.backfill_enabled or init_backfill_job == 1:
+            return
+        index_name = self.default_index_name()
+        if not opensearch_util.exist_index(index_name):
+            logger.info("Create backfill index %s", index_name)
+            response = opensearch_util.create_backfill_index(index_name)
+            # the index may have been created by a concurrent invocation
+            if (
+                response.status_code >= 300
+                and RESOURCE_ALREADY_EXISTS_ERROR not in response.text
+            ):
+                logger.error("Create backfill index failed: %s", response.text)
+                raise APIException(
+                    ErrorCode.UNKNOWN_ERROR,
+                    f"Unable to create the backfill index {index_name}, the message will be re-consumed and retried.",
+                )
+        init_backfill_job = 1
+
+    def _get_template_index_setting(self, name: str, default) -> str:
+        try:
+            index_template = self._get_index_template() or {}
+        except OSError:
+            # no default index template of the log type, e.g. application logs
+            index_template = {}
+        settings = index_template.get("template", {}).get("settings", {})
+        return str(
+            settings.get("index", {}).get(name, settings.get(f"index.{name}", default))
+        )
+
+    def finish_backfill(self) -> str:
+        """Restore the refresh interval and replicas of the backfill index to the settings of the
+        index template, refresh it, add it to the alias and attach the ISM policy, so that it's
+        searched, replicated, migrated and deleted like the indices written by live ingestion.
+
+        The backfill index isn't the write index of the alias, the rollover action of the policy
+        is skipped.
+
+        Returns:
+            str: The name of the backfill index
+        """
+        if not self.backfill_enabled:
+            raise APIException(
+                ErrorCode.UNKNOWN_ERROR, "BACKFILL_ID is not set, there is no backfill to finish"
+            )
+        index_name = self.default_index_name()
+        settings = {
+            "refresh_interval": self._get_template_index_setting(
+                "refresh_interval", refresh_interval
+            ),
+            "number_of_replicas": self._get_template_index_setting(
+                "number_of_replicas", number_of_replicas
+            ),
+        }
+        if self.ism_policy_enabled:
+            settings.update(opensearch_util.rollover_skip_settings())
+        logger.info("Finish backfill index %s with settings %s", index_name, settings)
+        self.run_func_with_retry(
+            opensearch_util.update_index_settings,
+            "Restore backfill index settings",
+            index_name=index_name,
+            settings=settings,
+        )
+        self.run_func_with_retry(
+            opensearch_util.refresh_index, "Refresh backfill index", index_name=index_name
+        )
+        self.run_func_with_retry(
+            opensearch_util.add_index_to_alias,
+            "Add backfill index to alias",
+            index_name=index_name,
+        )
+        if self.ism_policy_enabled:
+            response = self.run_func_with_retry(
+                opensearch_util.add_ism_policy,
+                "Attach ISM policy to backfill index",
+                index_name=index_name,
+            )
+            if response.json().get("failures"):
+                logger.error("Attach ISM policy failed: %s", response.text)
+                raise APIException(
+                    ErrorCode.UNKNOWN_ERROR,
+                    f"Unable to attach the ISM policy to the backfill index {index_name}",
+                )
+        return index_name
+
+    @property
+    def document_id_enabled(self) -> bool:
+        return DOCUMENT_ID_STRATEGY == "hash"
+
+    def generate_document_id(
+        self, source: str, record: dict, excluded_keys: tuple = ()
+    ) -> str:
+        """Generate a deterministic document id from the source position of a record,
+        e.g. s3://bucket/key:offset or a Kinesis sequence number, and its content.
+        excluded_keys are the fields which are not part of the original log, e.g. ingestion time."""
+        if excluded_keys:
+            record = {k: v for k, v in record.items() if k not in excluded_keys}
+        digest = hashlib.sha1(source.encode("utf-8"), usedforsecurity=False)
+        digest.update(
+            json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+        )
+        return digest.hexdigest()
+
+    def _create_bulk_records(
+        self, records: list, need_json_serial=False, ids=None
+    ) -> str:
+        """Helper function to create payload for bulk load, records are created with
+        the given document ids if ids is specified."""
         bulk_body = []
-        for record in records:
-            bulk_body.append(json.dumps({BULK_ACTION: {}}) + "\n")
+        for idx, record in enumerate(records):
+            if ids:
+                bulk_body.append(json.dumps({"create": {"_id": ids[idx]}}) + "\n")
+            else:
+                bulk_body.append(json.dumps({BULK_ACTION: {}}) + "\n")
             if need_json_serial:
                 bulk_body.append(json.dumps(record, default=self.json_serial) + "\n")
             else:
@@ -337,7 +551,10 @@ class AosIdxService:
             int: Size in bytes of the record including bulk format
         """
         try:
-            action_size = len(json.dumps({BULK_ACTION: {}}).encode('utf-8')) + 1
+            if self.document_id_enabled:
+                action_size = len(json.dumps({"create": {"_id": "0" * 40}})) + 1
+            else:
+                action_size = len(json.dumps({BULK_ACTION: {}}).encode('utf-8')) + 1
             
             record_size = len(json.dumps(record).encode('utf-8')) + 1
             total_size = action_size + record_size
@@ -358,13 +575,16 @@ class AosIdxService:
         self,
         records: list,
         need_json_serial=False,
-        index_name: str = opensearch_util.index_alias,
+        index_name: str = "",
+        ids=None,
     ):
         """Call AOS bulk load API to load data
 
         Args:
             records (list): A list of json records
-            index_name (str): index name in OpenSearch
+            index_name (str): index name in OpenSearch, the alias or the backfill index by default
+            ids (list, optional): Document ids of the records, records are created with
+                the ids and version conflicts of replayed records are treated as success
 
         Raises:
             RuntimeError: if bulk load api failed
@@ -375,26 +595,32 @@ class AosIdxService:
 
         if len(records) == 0:
             return []
+        index_name = index_name or self.default_index_name()
         failed_records = []
-        bulk_records = self._create_bulk_records(records, need_json_serial)
+        with stage_timer.stage(SERIALIZE):
+            bulk_records = self._create_bulk_records(records, need_json_serial, ids)
+        stage_timer.add_bytes(SERIALIZE, len(bulk_records))
 
         retry = 1
         while True:
             # Call bulk load
-            response = opensearch_util.bulk_load(bulk_records, index_name)
+            start = time.perf_counter()
+            with stage_timer.stage(BULK):
+                response = opensearch_util.bulk_load(bulk_records, index_name)
+                stage_timer.add_bytes(BULK, len(response.content))
+            if self.backfill_enabled:
+                if response.status_code in (413, 429):
+                    backfill_batch_size.reject()
+                elif response.status_code < 300:
+                    backfill_batch_size.update(
+                        len(records), (time.perf_counter() - start) * 1000
+                    )
             # Retry if status code is >= 300
             if response.status_code < 300:
-                resp_json = response.json()
-                for idx, item in enumerate(resp_json["items"]):
-                    # Check and store failed records with error message
-                    if item[BULK_ACTION]["status"] >= 300:
-                        records[idx]["index_name"] = index_name
-                        records[idx]["error_type"] = item[BULK_ACTION]["error"]["type"]
-                        records[idx]["error_reason"] = item[BULK_ACTION]["error"][
-                            "reason"
-                        ]
-                        failed_records.append(records[idx])
-
+                with stage_timer.stage(BULK):
+                    failed_records = self._get_failed_records(
+                        response.content, records, index_name
+                    )
                 break
             elif response.status_code == 413:
                 self.adjust_bulk_batch_size()
@@ -414,6 +640,37 @@ class AosIdxService:
 
         return records, failed_records
 
+    def _has_bulk_errors(self, content: bytes) -> bool:
+        """Read the top-level errors flag of a _bulk response without decoding the items,
+        returns True if the flag can't be found so that the response is fully checked."""
+        items_pos = content.find(b'"items"')
+        head = content[:items_pos] if items_pos >= 0 else content
+        match = BULK_ERRORS_PATTERN.search(head)
+        return match is None or match.group(1) == b"true"
+
+    def _get_failed_records(
+        self, content: bytes, records: list, index_name: str
+    ) -> list:
+        """Return the records whose items in the _bulk response have a status >= 300,
+        the items are only decoded when the response reports errors."""
+        failed_records = []
+        if not self._has_bulk_errors(content):
+            return failed_records
+
+        for idx, item in enumerate(json.loads(content).get("items", [])):
+            # Check and store failed records with error message
+            result = item.get(BULK_ACTION) or next(iter(item.values()))
+            if result["status"] >= 300:
+                error = result.get("error", {})
+                if error.get("type") == VERSION_CONFLICT_ERROR:
+                    # the document has been created by a previous delivery
+                    continue
+                records[idx]["index_name"] = index_name
+                records[idx]["error_type"] = error.get("type", "")
+                records[idx]["error_reason"] = error.get("reason", "")
+                failed_records.append(records[idx])
+        return failed_records
+
     def adjust_bulk_batch_size(self, func_name=function_name):
         global batch_size
         if batch_size >= 4000:
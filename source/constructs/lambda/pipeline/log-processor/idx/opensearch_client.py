@@ -11,20 +11,26 @@ import os
 from commonlib import AWSConnection
 
 from enum import Enum
+from typing import Sequence
 from abc import ABC, abstractmethod
 from urllib.parse import quote
 
 from requests_aws4auth import AWS4Auth
 from commonlib.exception import APIException, ErrorCode
 from commonlib import AWSConnection
+from event.lazy import LazyClient
 
 logger = get_logger(__name__)
 
 DEFAULT_TENANT = "global"
+# Only keep the fields needed to find failed items in the _bulk response, set BULK_FILTER_PATH to empty to disable.
+BULK_FILTER_PATH = os.environ.get(
+    "BULK_FILTER_PATH", "errors,took,items.*.error,items.*.status"
+)
 
 default_region = os.environ.get("AWS_REGION")
 conn = AWSConnection()
-aos_cli = conn.get_client("opensearch", default_region)
+aos_cli = LazyClient(conn, "opensearch", default_region)
 domain_name = os.environ.get("DOMAIN_NAME")
 
 
@@ -159,6 +165,19 @@ class OpenSearchUtil:
     def _create_policy_id(self):
         return f"{self._index_alias}-ism-policy"
 
+    def add_ism_policy(self, index_name: str) -> requests.Response:
+        """Attach the ISM policy of the alias to an index which isn't managed by the ISM template,
+        the response reports the indices which failed in "failures" and "failed_indices"."""
+        ism = "_plugins" if self.engine == "OpenSearch" else "_opendistro"
+        path = f"{ism}/_ism/add/{quote(index_name)}"
+        return self._request(
+            path,
+            "add_ism_policy",
+            action="POST",
+            json={"policy_id": self._create_policy_id()},
+            timeout=30,
+        )
+
     def _request(
         self, path: str, function: str, action="PUT", headers=None, **kwargs
     ) -> requests.Response:
@@ -180,7 +199,9 @@ class OpenSearchUtil:
         logger.info("--> %s response code %d", function, response.status_code)
         return response
 
-    def bulk_load(self, data: str, index_name: str) -> requests.Response:
+    def bulk_load(
+        self, data: str, index_name: str, filter_path: str = BULK_FILTER_PATH
+    ) -> requests.Response:
         """Use OpenSearch bulk load api to load the data
 
         The data must be in a format of
@@ -189,11 +210,16 @@ class OpenSearchUtil:
         {index: {}}
         {...}
 
+        Args:
+            filter_path (str, optional): Response filter, by default only errors, took,
+                and the status and error of each item are returned.
+
         Returns:
             requests.Response: request response object
         """
         path = f"{index_name}/_bulk"
-        return self._request(path, "bulk_load", data=data)
+        params = {"filter_path": filter_path} if filter_path else None
+        return self._request(path, "bulk_load", data=data, params=params)
 
     def exist_index_alias(
         self,
@@ -310,6 +336,7 @@ class OpenSearchUtil:
         number_of_replicas=1,
         codec: str = "best_compression",
         refresh_interval: str = "1s",
+        flattened_fields: Sequence[str] = (),
     ) -> dict:
         """Create an index template with default settings and mappings
 
@@ -318,6 +345,8 @@ class OpenSearchUtil:
             number_of_replicas (int, optional): Number of replicas for index. Defaults to 1.
             codec (str, optional): Codec. Defaults to "best_compression".
             refresh_interval (str, optional): refresh interval. Defaults to "1s".
+            flattened_fields (Sequence[str], optional): Object fields mapped as a single field,
+                flat_object in OpenSearch (2.7 or later) and flattened in Elasticsearch. Defaults to ().
 
         Returns:
             dict: A predefined index template in json
@@ -329,6 +358,10 @@ class OpenSearchUtil:
         with open(template_file_path, encoding="utf-8") as f:
             template = json.load(f)
 
+        flattened_type = "flat_object" if self.engine == "OpenSearch" else "flattened"
+        for field in flattened_fields:
+            template["mappings"]["properties"][field] = {"type": flattened_type}
+
         total_fields_limit = 1000
         ignore_malformed = "false"
         if self._log_type == "cloudtrail":
@@ -457,6 +490,77 @@ class OpenSearchUtil:
         path = quote(f"{self._index_alias}/_rollover")
         return self._request(path, "request_index_rollover", action="POST", timeout=30)
 
+    def backfill_index_name(self, backfill_id: str) -> str:
+        """The dedicated index of a backfill, it matches the index patterns of the index template"""
+        return f"{self._index_alias}-backfill-{backfill_id.lower()}"
+
+    def exist_index(self, index_name: str) -> bool:
+        """Check if an index exists or not
+
+        Returns:
+            bool: True if index exists, else False
+        """
+        response = self._request(quote(index_name), "exist_index", action="HEAD", timeout=30)
+        if response.status_code == 200:
+            return True
+        elif response.status_code == 404:
+            return False
+        else:
+            raise APIException(ErrorCode.UNKNOWN_ERROR, "error in exist_index")
+
+    def create_backfill_index(self, index_name: str) -> requests.Response:
+        """Create the dedicated index of a backfill, it's not refreshed, has no replicas and is
+        not managed by ISM, the rollover of ISM policy only applies to the write index of the alias.
+
+        The settings are restored by update_index_settings when the backfill is finished.
+        """
+        ism = "plugins" if self.engine == "OpenSearch" else "opendistro"
+        data = {
+            "settings": {
+                "index": {
+                    "refresh_interval": "-1",
+                    "number_of_replicas": "0",
+                    ism: {"index_state_management": {"auto_manage": "false"}},
+                }
+            }
+        }
+        return self._request(quote(index_name), "create_backfill_index", json=data, timeout=30)
+
+    def rollover_skip_settings(self) -> dict:
+        """The index settings to skip the rollover action of the ISM policy, e.g. for the backfill
+        index which isn't the write index of the alias. Only OpenSearch supports it."""
+        if self.engine == "OpenSearch":
+            return {"plugins.index_state_management.rollover_skip": "true"}
+        return {}
+
+    def update_index_settings(self, index_name: str, settings: dict) -> requests.Response:
+        """Update the dynamic index settings, e.g. {"refresh_interval": "1s"}"""
+        path = f"{quote(index_name)}/_settings"
+        return self._request(
+            path, "update_index_settings", json={"index": settings}, timeout=30
+        )
+
+    def refresh_index(self, index_name: str) -> requests.Response:
+        path = f"{quote(index_name)}/_refresh"
+        return self._request(path, "refresh_index", action="POST", timeout=120)
+
+    def add_index_to_alias(self, index_name: str) -> requests.Response:
+        """Add an index to the alias, the write index of the alias is not changed"""
+        data = {
+            "actions": [
+                {
+                    "add": {
+                        "index": index_name,
+                        "alias": self._index_alias,
+                        "is_write_index": False,
+                    }
+                }
+            ]
+        }
+        return self._request(
+            "_aliases", "add_index_to_alias", action="POST", json=data, timeout=30
+        )
+
 
 class ISM:
     """Index State Management State Machine"""
@@ -2,10 +2,14 @@
 # SPDX-License-Identifier: Apache-2.0
 import os
 import sys
+import json
 from commonlib.logging import get_logger
 from commonlib import AWSConnection
-from event.event_parser import KDS, MSK, EventBridge, SQS
-from idx.idx_svc import AosIdxService
+from event.event_parser import KDS, MSK, EventBridge, SQS, ProcessingInterrupted
+from idx.idx_svc import AosIdxService, FINISH_BACKFILL_ACTION
+from event.stage_timer import stage_timer, PARSE
+from event.profiler import invocation_profiler
+from event.lazy import LazyClient
 
 from aws_lambda_powertools import Metrics
 
@@ -22,7 +26,7 @@ idx_svc = AosIdxService()
 
 default_region = os.environ.get("REGION")
 conn = AWSConnection()
-sqs_client = conn.get_client("sqs", default_region)
+sqs_client = LazyClient(conn, "sqs", default_region)
 
 sqs_queue_url = str(os.environ.get("SQS_QUEUE_URL", ""))
 
@@ -32,21 +36,37 @@ write_idx_data = str(os.environ.get("WRITE_IDX_DATA", "True"))
 
 no_buffer_access_role_arn = str(os.environ.get("NO_BUFFER_ACCESS_ROLE_ARN", ""))
 
-event_bridge_client = conn.get_client("events", default_region)
+event_bridge_client = LazyClient(conn, "events", default_region)
+
+lambda_client = LazyClient(conn, "lambda", default_region)
 
 metrics = Metrics(namespace=f"Solution/{STACK_PREFIX}")
 
 
 @metrics.log_metrics
-def lambda_handler(event, _):  # NOSONAR
+def lambda_handler(event, context):  # NOSONAR
+    stage_timer.start()
+    invocation_profiler.start()
     try:
         idx_svc.init_idx_env()
+        if event.get("action") == FINISH_BACKFILL_ACTION:
+            logger.info("Finished backfill index %s", idx_svc.finish_backfill())
+            return "Ok"
         disable_event_bride_rule(event)
         if write_idx_data == str(True):
             func_name = "parse_" + source.lower() + "_event"
-            getattr(sys.modules[__name__], func_name)(event)
+            with stage_timer.stage(PARSE):
+                getattr(sys.modules[__name__], func_name)(event, context)
             idx_svc.put_index_pattern()
 
+    except ProcessingInterrupted as e:
+        # the loaded position has been saved, the object is resumed from it by another invocation
+        logger.warning(e)
+        if is_sqs_event(event):
+            # the failed batch is redelivered after the visibility timeout, the objects which
+            # have been completed are skipped by their checkpoints.
+            raise
+        resume_async(event, context)
     except Exception as e:
         if not (plugins or log_type in ("ELB", "CloudFront")) and "Records" in event:
             for event_record in event["Records"]:
@@ -57,9 +77,28 @@ def lambda_handler(event, _):  # NOSONAR
                 handle_sqs_retries(record)
         else:
             raise e
+    finally:
+        stage_timer.put_metrics(metrics)
+        invocation_profiler.stop(getattr(context, "aws_request_id", ""))
     return "Ok"
 
 
+def is_sqs_event(event) -> bool:
+    return bool(event.get("Records")) and event["Records"][0].get("eventSource") == "aws:sqs"
+
+
+def resume_async(event, context):
+    """Invoke the function itself asynchronously with the same event, an event of an async
+    invocation, e.g. from EventBridge, is not redelivered after a successful invocation, and
+    an error is only retried twice before it is sent to the DLQ."""
+    response = lambda_client.invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps(event),
+    )
+    logger.info("Resume the event by request %s", response["ResponseMetadata"]["RequestId"])
+
+
 def handle_sqs_retries(record):
     approximate_receive_count = int(
         record.get("attributes").get("ApproximateReceiveCount", "3")
@@ -92,30 +131,32 @@ def change_sqs_message_visibility(event_record):
             )
 
 
-def parse_kds_event(event):
+def parse_kds_event(event, context=None):
     kds: KDS = KDS(source)
     kds.set_metrics(metrics)
     kds.process_event(event)
 
 
-def parse_msk_event(event):
+def parse_msk_event(event, context=None):
     # parse event which is from MSK
     msk: MSK = MSK(source)
     msk.set_metrics(metrics)
     msk.process_event(event)
 
 
-def parse_event_bridge_event(event):
+def parse_event_bridge_event(event, context=None):
     # parse event which is from EventBridge
     evt = EventBridge(source)
     evt.set_metrics(metrics)
+    evt.set_lambda_context(context)
     evt.process_event(event)
 
 
-def parse_sqs_event(event):
+def parse_sqs_event(event, context=None):
     # parse event which is from S3 bucket
     sqs: SQS = SQS(source)
     sqs.set_metrics(metrics)
+    sqs.set_lambda_context(context)
     sqs.process_event(event)
 
 
@@ -11,17 +11,34 @@ import urllib.parse
 import os
 import io
 import csv
+import functools
 from typing import Dict, List, Sequence
 
 from abc import ABC, abstractmethod
-from copy import deepcopy
-from itertools import islice
+from itertools import islice, zip_longest
 from typing import Iterable
 
 from log_processor.protocol import get_protocal_code
 
 logger = get_logger(__name__)
 log_format = os.environ.get("LOG_FORMAT")
+waf_promoted_headers = os.environ.get(
+    "WAF_PROMOTED_HEADERS", "host=host,user-agent=userAgent"
+)
+# the nested fields of CloudTrail events which are indexed as a single field, either a json
+# string in a keyword field or a flattened field, and the top level fields which are not indexed
+cloudtrail_nested_fields = os.environ.get(
+    "CLOUDTRAIL_NESTED_FIELDS", "requestParameters,responseElements"
+)
+cloudtrail_nested_field_type = os.environ.get(
+    "CLOUDTRAIL_NESTED_FIELD_TYPE", "keyword"
+).lower()
+cloudtrail_excluded_fields = os.environ.get("CLOUDTRAIL_EXCLUDED_FIELDS", "")
+# the maximum characters of a multiline record of application logs from S3, the rest of a longer
+# record, e.g. a runaway stack trace, is split into records of its own
+multiline_max_record_size = int(
+    os.environ.get("MULTILINE_MAX_RECORD_SIZE", 1024 * 1024)
+)
 
 
 class LogType(ABC):
@@ -33,6 +50,9 @@ class LogType(ABC):
 
     _fields = []  # list of fields
     _format = "text"  # log file format, such as json, text, etc.
+    # the records of a line are parsed from the line alone and yielded before the next line is read,
+    # so that the parsing of an object can be resumed from the start of any line
+    _seekable = False
 
     @abstractmethod
     def parse(self, line: str):
@@ -71,13 +91,47 @@ class LogType(ABC):
         return log
 
 
+@functools.lru_cache(maxsize=8)
+def _tsv_schema(field_names: str) -> tuple:
+    """The field names of a comma delimited string, parsed once per container"""
+    return tuple(each.strip() for each in field_names.split(","))
+
+
 class CloudFrontWithRT(LogType):
+    """An implementation of LogType for CloudFront real-time logs, which are tab separated
+    values in the order of the FIELD_NAMES environment variable"""
+
+    def __init__(self) -> None:
+        self._field_names = os.environ.get("FIELD_NAMES", "")
+
     def parse(self, line: str) -> Dict:
-        if not os.environ.get("FIELD_NAMES", ""):
+        if not self._field_names:
             raise ValueError("Field names not defined")
-        field_names = self.comma_delimited_list_string(
-            os.environ.get("FIELD_NAMES", "")
-        )
+        field_names = _tsv_schema(self._field_names)
+
+        # a line without quotes, line breaks and NUL is split by tabs as is, the others go
+        # through csv.DictReader, e.g. a quoted value containing a tab
+        body = line[:-1] if line.endswith("\n") else line
+        if (
+            body
+            and '"' not in body
+            and "\n" not in body
+            and "\r" not in body
+            and "\0" not in body
+        ):
+            values = body.split("\t")
+            if len(values) > len(field_names):
+                raise ValueError(
+                    f"The field names({list(field_names)}) doesn't match the tsv data({line})"
+                )
+            # the missing values are None, the same as "-"
+            return {
+                name: None if value == "-" else value
+                for name, value in zip_longest(field_names, values)
+            }
+        return self._parse_csv(line, list(field_names))
+
+    def _parse_csv(self, line: str, field_names: List[str]) -> Dict:
         rows = self.fillna(self.tsv2json(line, fieldnames=field_names))
         if len(rows) != 1:
             raise ValueError(f"The tsv data({line}) contains more than one line")
@@ -118,6 +172,8 @@ class CloudFrontWithRT(LogType):
 class ELBWithS3(LogType):
     """An implementation of LogType for ELB Logs"""
 
+    _seekable = True
+
     _fields = [
         "type",
         "timestamp",
@@ -172,11 +228,32 @@ class ELBWithS3(LogType):
             yield json_record
 
 
+def _field_names(s: str) -> tuple:
+    return tuple(x.strip() for x in s.split(",") if x.strip())
+
+
 class CloudTrail(LogType):
     """An implementation of LogType for CloudTrail Logs"""
 
     _format = "json"
 
+    def __init__(
+        self,
+        nested_fields: str = cloudtrail_nested_fields,
+        nested_field_type: str = cloudtrail_nested_field_type,
+        excluded_fields: str = cloudtrail_excluded_fields,
+    ) -> None:
+        if nested_field_type not in ("keyword", "flattened"):
+            raise ValueError(
+                f"Unknown nested field type {nested_field_type}, it must be keyword or flattened"
+            )
+        self._excluded_fields = _field_names(excluded_fields)
+        # the nested fields are indexed as a json string by a keyword field, or as they are by
+        # a flat_object (flattened in Elasticsearch) field which doesn't map their sub fields
+        self._stringified_fields = (
+            _field_names(nested_fields) if nested_field_type == "keyword" else ()
+        )
+
     def _convert_event(self, cloudtrail_event: dict):
         """Unify all cloudtrail event format for different resources.
 
@@ -185,21 +262,14 @@ class CloudTrail(LogType):
         In order to load as much as possible
         Otherwise, different format may be rejected with mapper_parsing_exception
         """
-
-        # convert requestParameters.parameters from text to dict
-        if "requestParameters" in cloudtrail_event and isinstance(
-            cloudtrail_event["requestParameters"], dict
-        ):
-            cloudtrail_event["requestParameters"] = json.dumps(
-                cloudtrail_event["requestParameters"]
-            )
-        # convert requestParameters.parameters from text to dict
-        if "responseElements" in cloudtrail_event and isinstance(
-            cloudtrail_event["responseElements"], dict
-        ):
-            cloudtrail_event["responseElements"] = json.dumps(
-                cloudtrail_event["responseElements"]
-            )
+        for field in self._excluded_fields:
+            cloudtrail_event.pop(field, None)
+
+        # convert the nested fields, e.g. requestParameters and responseElements, to text
+        for field in self._stringified_fields:
+            value = cloudtrail_event.get(field)
+            if isinstance(value, dict):
+                cloudtrail_event[field] = json.dumps(value)
         return cloudtrail_event
 
     @abstractmethod
@@ -211,6 +281,7 @@ class CloudTrailWithS3(CloudTrail):
     """An implementation of LogType for CloudTrail Logs"""
 
     _format = "json"
+    _seekable = True
 
     def parse(self, lines: Iterable[str]):
         for line in lines:
@@ -246,6 +317,7 @@ class ConfigWithS3(LogType):
     """An implementation of LogType for Config Logs"""
 
     _format = "json"
+    _seekable = True
 
     def _convert_cfg(self, cfg: dict):
         """Unify all configuration format for different resources.
@@ -316,33 +388,55 @@ class ConfigWithS3(LogType):
                     yield rec
 
 
+WEB_ACL_NAME_PATTERN = re.compile("[^/]/webacl/([^/]*)")
+
+
+@functools.lru_cache(maxsize=1024)
+def _web_acl_name(web_acl_id: str) -> str:
+    """The name of a web ACL, a log file has the records of a few web ACLs only"""
+    return WEB_ACL_NAME_PATTERN.search(web_acl_id).group(1)
+
+
+def _header_fields(headers: str) -> Dict[str, str]:
+    """Parse a comma delimited list of `header-name=fieldName`, the field name defaults to the
+    header name, e.g. "user-agent=userAgent,referer" -> {"user-agent": "userAgent", "referer": "referer"}"""
+    fields = {}
+    for each in headers.split(","):
+        name, _, field = each.partition("=")
+        if name.strip():
+            fields[name.strip().lower()] = field.strip() or name.strip()
+    return fields
+
+
 class WAFWithS3(LogType):
     """An implementation of LogType for WAF Logs"""
 
     _format = "json"
+    _seekable = True
+
+    def __init__(self, promoted_headers: str = waf_promoted_headers) -> None:
+        # the request headers which are copied to fields of the record
+        self._header_fields = _header_fields(promoted_headers)
 
     def parse(self, lines: Iterable[str]):
+        header_fields = self._header_fields
         for line in lines:
             json_record = json.loads(line)
 
             # Extract web acl name, host and user agent
-            json_record["webaclName"] = re.search(
-                "[^/]/webacl/([^/]*)", json_record["webaclId"]
-            ).group(1)
-            headers = json_record["httpRequest"]["headers"]
-            for header in headers:
-                if header["name"].lower() == "host":
-                    json_record["host"] = header["value"]
-                elif header["name"].lower() == "user-agent":
-                    json_record["userAgent"] = header["value"]
-                else:
-                    continue
+            json_record["webaclName"] = _web_acl_name(json_record["webaclId"])
+            for header in json_record["httpRequest"]["headers"]:
+                field = header_fields.get(header["name"].lower())
+                if field:
+                    json_record[field] = header["value"]
             yield json_record
 
 
 class S3WithS3(LogType):
     """An implementation of LogType for S3 Access Logs"""
 
+    _seekable = True
+
     _fields = [
         "bucket_owner",
         "bucket",
@@ -401,6 +495,8 @@ class S3WithS3(LogType):
 class CloudFrontWithS3(LogType):
     """An implementation of LogType for CloudFront Logs"""
 
+    _seekable = True
+
     _fields = [
         "timestamp",
         "x-edge-location",
@@ -527,8 +623,15 @@ class VPCFlowWithS3(LogType):
         return json_record
 
 
+_WHITESPACE = re.compile(r"\s*")
+
+
 class RDSWithS3(LogType):
-    """An implementation of LogType for RDS Logs"""
+    """An implementation of LogType for RDS Logs in CloudWatch Logs messages delivered by Firehose.
+
+    The RDS pipeline doesn't use it, its S3 objects are the json lines of the RDS connector, which
+    are parsed by JSONWithS3, see EventType.
+    """
 
     _fields = [
         "time",
@@ -576,10 +679,16 @@ class RDSWithS3(LogType):
         "deadlock-user-2",
         "deadlock-action-2",
         "deadlock-query-2",
+        "pg-host-name",
+        "pg-user",
+        "pg-db-name",
+        "pg-pid",
+        "pg-level",
+        "pg-detail",
         "log-detail",
     ]
 
-    _slow_query_pattern = (
+    _slow_query_pattern = re.compile(
         r"^# Time: (\d+-\d+-\d+T\d+:\d+:\d+.\d+Z) # User@Host: (\w+)\[(\w+)\] @ ([\w\d\.-]*)\s? \[(.*?)\]"
         r"  Id:\s*(\d*) # Query_time: ([\d.]*)  Lock_time: ([\d.]*) Rows_sent: ([\d]*)"
         r"  Rows_examined: ([\d]*) (?:use )?([\w]*)?;? ?SET timestamp=(\d*);(.*);$"
@@ -600,7 +709,10 @@ class RDSWithS3(LogType):
         "sq-query",
     ]
 
-    _deadlock_log_pattern = r"MySQL thread\sid\s(\d+),\sOS\sthread\shandle\s(\w+),\squery\sid\s(\d+)\s(.*?)\s(\w+)\s(\w+)\s(.*)"
+    _deadlock_log_pattern = re.compile(
+        r"MySQL thread\sid\s(\d+),\sOS\sthread\shandle\s(\w+),\squery\sid\s(\d+)\s(.*?)\s(\w+)\s(\w+)\s(.*)",
+        re.MULTILINE,
+    )
 
     _deadlock_fields = [
         "deadlock-thread-id",
@@ -612,7 +724,9 @@ class RDSWithS3(LogType):
         "deadlock-query",
     ]
 
-    _error_pattern = r"(\d+-\d+-\d+T\d+:\d+:\d+.\d+Z)\s(\d+)\s(\[\w+\])\s(\[.*?\])?\s?(\[.*?\])?\s?(.*)"
+    _error_pattern = re.compile(
+        r"(\d+-\d+-\d+T\d+:\d+:\d+.\d+Z)\s(\d+)\s(\[\w+\])\s(\[.*?\])?\s?(\[.*?\])?\s?(.*)"
+    )
 
     _error_fields = [
         "time",
@@ -622,7 +736,9 @@ class RDSWithS3(LogType):
         "err-sub-system",
         "err-detail",
     ]
-    _general_pattern = r"(\d+-\d+-\d+T\d+:\d+:\d+.\d+Z)\s*(\d*)\s(\w*)\s*(.*)$"
+    _general_pattern = re.compile(
+        r"(\d+-\d+-\d+T\d+:\d+:\d+.\d+Z)\s*(\d*)\s(\w*)\s*(.*)$"
+    )
 
     _general_fields = [
         "time",
@@ -644,6 +760,25 @@ class RDSWithS3(LogType):
         "audit-retcode",
     ]
 
+    # the default log_line_prefix of RDS for PostgreSQL, `%t:%r:%u@%d:[%p]:`, e.g.
+    # 2022-02-18 06:02:22 UTC:10.0.0.1(52718):postgres@mydb:[1234]:LOG:  statement: select 1
+    _postgresql_pattern = re.compile(
+        r"(\d+-\d+-\d+ \d+:\d+:\d+(?:\.\d+)? \w+):([^:]*):([^@:]*)@([^:]*):\[(\d+)\]:(\w+):\s*(.*)$"
+    )
+
+    _postgresql_fields = [
+        "time",
+        "pg-host-name",
+        "pg-user",
+        "pg-db-name",
+        "pg-pid",
+        "pg-level",
+        "pg-detail",
+    ]
+
+    # the start of a CloudWatch Logs message in the concatenated messages
+    _message_start = re.compile(r'\{\s*"messageType"')
+
     def _parse_rds_log_singel_line(
         self,
         log_sub_type,
@@ -708,52 +843,18 @@ class RDSWithS3(LogType):
         timestamp,
         db_identifier,
     ) -> dict:
-        results = re.finditer(log_pattern, log_message, re.MULTILINE)
-
-        _json_records = []
-        _json_record = {}
+        # a deadlock log has the two transactions, the n-th one is saved as fields suffixed by -n
         json_record = {}
-        if results:
-            for _, result in enumerate(results, start=1):
-                for i, attr in enumerate(log_fields):
-                    if result.group(i + 1) is None:
-                        continue
-                    _json_record[attr] = result.group(i + 1).strip('"')
-
-                _json_records.append(deepcopy(_json_record))
-            try:
-                json_record["deadlock-thread-id-1"] = _json_records[0][
-                    "deadlock-thread-id"
-                ]
-                json_record["deadlock-os-thread-handle-1"] = _json_records[0][
-                    "deadlock-os-thread-handle"
-                ]
-                json_record["deadlock-query-id-1"] = _json_records[0][
-                    "deadlock-query-id"
-                ]
-                json_record["deadlock-ip-1"] = _json_records[0]["deadlock-ip"]
-                json_record["deadlock-user-1"] = _json_records[0]["deadlock-user"]
-                json_record["deadlock-action-1"] = _json_records[0]["deadlock-action"]
-                json_record["deadlock-query-1"] = _json_records[0]["deadlock-query"]
-                json_record["deadlock-thread-id-2"] = _json_records[1][
-                    "deadlock-thread-id"
-                ]
-                json_record["deadlock-os-thread-handle-2"] = _json_records[1][
-                    "deadlock-os-thread-handle"
-                ]
-                json_record["deadlock-query-id-2"] = _json_records[1][
-                    "deadlock-query-id"
-                ]
-                json_record["deadlock-ip-2"] = _json_records[1]["deadlock-ip"]
-                json_record["deadlock-user-2"] = _json_records[1]["deadlock-user"]
-                json_record["deadlock-action-2"] = _json_records[1]["deadlock-action"]
-                json_record["deadlock-query-2"] = _json_records[1]["deadlock-query"]
-            except IndexError:
-                logger.error(f"Failed to resolve {log_sub_type} Log")
-
-            json_record["db-identifier"] = db_identifier
-            json_record["time"] = timestamp
-            json_record["log-detail"] = log_message
+        for n, result in enumerate(islice(log_pattern.finditer(log_message), 2), start=1):
+            for attr, value in zip(log_fields, result.groups()):
+                if value is not None:
+                    json_record[f"{attr}-{n}"] = value.strip('"')
+        if "deadlock-thread-id-2" not in json_record:
+            logger.error(f"Failed to resolve {log_sub_type} Log")
+
+        json_record["db-identifier"] = db_identifier
+        json_record["time"] = timestamp
+        json_record["log-detail"] = log_message
         return json_record
 
     def _parse_rds_audit_log(
@@ -774,22 +875,42 @@ class RDSWithS3(LogType):
                     json_record[key] = json_record[key].strip("ip-").replace("-", ".")
         return json_record
 
-    # def parse(self, line) -> list:
     def parse(self, lines: Iterable[str]) -> dict:
-        for line in lines:
-            data_str = "[{}]".format(line.replace("}{", "},{"))
-            try:
-                data_json = json.loads(data_str)
-            except json.JSONDecodeError as e:
-                logger.error(e)
-                return {}
+        for message in self._iter_messages(lines):
+            if message.get("messageType") != "DATA_MESSAGE":
+                # logger.info("Skipping Kinesis Firehose Test Message.")
+                continue
+            yield from self.parse_log_event(message)
 
-            for i in range(len(data_json)):
-                if data_json[i]["messageType"] != "DATA_MESSAGE":
-                    # logger.info("Skipping Kinesis Firehose Test Message.")
+    def _iter_messages(self, lines: Iterable[str]):
+        """Decode the CloudWatch Logs messages concatenated by Firehose, e.g. `{...}{...}`, one
+        at a time, so that the records of a message are yielded before the next one is decoded.
+
+        A message which doesn't end in its line is completed by the next lines, and an invalid
+        message is skipped up to the start of the next message.
+        """
+        decoder = json.JSONDecoder()
+        pending = ""
+        for line in lines:
+            buffer = pending + "\n" + line if pending else line
+            pending = ""
+            pos = _WHITESPACE.match(buffer).end()
+            while pos < len(buffer):
+                try:
+                    message, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    next_message = self._message_start.search(buffer, pos + 1)
+                    if next_message is None:
+                        pending = buffer[pos:]
+                        break
+                    logger.error(e)
+                    pos = next_message.start()
                     continue
-                for each in self.parse_log_event(data_json[i]):
-                    yield each
+                if isinstance(message, dict):
+                    yield message
+                pos = _WHITESPACE.match(buffer, pos).end()
+        if pending:
+            logger.error("Unable to decode the last message: %s", pending[:100])
 
     def parse_log_event(self, log_event) -> dict:
         log_group = log_event.get("logGroup")
@@ -826,6 +947,15 @@ class RDSWithS3(LogType):
                     timestamp,
                     db_identifier,
                 )
+            elif "/postgresql" in log_group:
+                yield self._parse_rds_log_singel_line(
+                    "postgresql",
+                    log_message,
+                    self._postgresql_pattern,
+                    self._postgresql_fields,
+                    timestamp,
+                    db_identifier,
+                )
 
     def parse_error_log(self, log, log_message, timestamp, db_identifier):
         record = {}
@@ -856,6 +986,8 @@ class RDSWithS3(LogType):
 class LambdaWithS3(LogType):
     """An implementation of LogType for Lambda Function Logs"""
 
+    _seekable = True
+
     _fields = [
         "time",
         "log_group",
@@ -929,6 +1061,10 @@ class LogParser:
     def export_format(self):
         return "json" if self._service.format == "json" else "csv"
 
+    @property
+    def seekable(self) -> bool:
+        return getattr(self._service, "_seekable", False)
+
 
 class LogEntry(dict):
     def __init__(self, **kwargs):
@@ -967,6 +1103,7 @@ class JSONWithFLB(LogType):
     """
 
     _format = "json"
+    _seekable = True
 
     def parse_single_line(self, record):
         # from kds buffer or msk buffer, record's type is str
@@ -1023,8 +1160,18 @@ class JSONWithS3(JSONWithFLB):
             yield log
 
 
+@functools.lru_cache(maxsize=8)
+def _compile_regex(pattern: str) -> re.Pattern:
+    return re.compile(pattern, re.MULTILINE)
+
+
 class Regex:
     _format = "regex"
+    # lines matched against the pattern at a time
+    _chunk_lines = 1000
+
+    def __init__(self, max_record_size: int = multiline_max_record_size) -> None:
+        self._max_record_size = max_record_size
 
     def parse_for_s3_event(
         self,
@@ -1034,8 +1181,19 @@ class Regex:
         time_format: str = "",
         time_offset: str = "",
     ) -> Iterable[LogEntry]:
+        """Parse the lines into log entries, a line matching the pattern starts a new entry, and
+        the following lines which don't match are appended to the last group of the entry.
+
+        The lines appended to an entry are buffered in a list and joined once the entry is
+        complete, an entry larger than the max record size is split, the rest of it is buffered
+        as a new entry with a single `log` field.
+        """
+        match_line = _compile_regex(pattern).match
+        lines = iter(lines)
         log = None
         last_key = None
+        parts = []
+        size = 0
 
         def _mk_log(fields: dict, time_key: str, time_format: str, time_offset: str):
             log = LogEntry(**fields)
@@ -1043,22 +1201,36 @@ class Regex:
                 log.set_time(time_key, time_format, time_offset)
             return log
 
-        for line in lines:
-            match = re.match(pattern, line, re.MULTILINE)
-            if match:
-                if log:
-                    yield log
+        def _complete(log: LogEntry, last_key: str, parts: list) -> LogEntry:
+            if parts:
+                log[last_key] += "".join(parts)
+            return log
 
-                last_key = match.lastgroup
-                log = _mk_log(match.groupdict(), time_key, time_format, time_offset)
-            else:
-                if log and last_key:
-                    log[last_key] += line
+        for chunk in iter(lambda: list(islice(lines, self._chunk_lines)), []):
+            for line, match in zip(chunk, map(match_line, chunk)):
+                if match:
+                    if log:
+                        yield _complete(log, last_key, parts)
+
+                    last_key = match.lastgroup
+                    log = _mk_log(match.groupdict(), time_key, time_format, time_offset)
+                    parts, size = [], len(line)
+                elif log and last_key:
+                    if size and size + len(line) > self._max_record_size:
+                        logger.warning(
+                            "Split a multiline record larger than %d characters",
+                            self._max_record_size,
+                        )
+                        yield _complete(log, last_key, parts)
+                        log, last_key = LogEntry(log=""), "log"
+                        parts, size = [], 0
+                    parts.append(line)
+                    size += len(line)
                 else:
                     yield LogEntry(log=line)
 
         if log:
-            yield log
+            yield _complete(log, last_key, parts)
 
 
 class ApacheWithFLB(JSONWithFLB):
@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import json
+from unittest.mock import patch
+from benchmark.run import main
+from benchmark.parsers import BENCHMARKS, run_benchmark
+from benchmark.scenarios import SCENARIOS, replicate, read_concatenated_json
+
+
+def test_replicate():
+    data = replicate(["a", "bc"], 10)
+    assert data == b"a\nbc\n" * 2
+
+
+def test_read_concatenated_json():
+    lines = read_concatenated_json("rds.log")
+    assert len(lines) > 1
+    for line in lines:
+        assert "logEvents" in json.loads(line)
+
+
+def test_run_benchmark(tmp_path):
+    output = tmp_path / "result.json"
+    main(
+        [
+            "--scenario", "sqs-s3",
+            "--scenario", "kds-json-flb",
+            "--size-mb", "0.05",
+            "--bulk-item-error-rate", "0.1",
+            "--output", str(output),
+        ]
+    )
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [x["scenario"] for x in results] == ["sqs-s3", "kds-json-flb"]
+    for result in results:
+        assert result["failed_invocations"] == 0, result["first_error"]
+        assert result["records"] > 0
+        assert 0 < result["failed_records"] < result["records"]
+        assert result["records_per_second"] > 0
+        assert result["mb_per_second"] > 0
+        assert result["peak_rss_mb"] > 0
+        assert {"Parse", "Serialize", "Bulk"} <= set(result["stages"])
+        assert result["timed_blocks"] > 0
+        assert result["stage_timer_overhead"] > 0
+    assert "S3Get" in results[0]["stages"]
+
+
+def test_scenarios_cover_sources():
+    assert {x.source for x in SCENARIOS.values()} == {"SQS", "KDS", "MSK"}
+
+
+def test_parser_benchmarks():
+    with patch.dict(os.environ):
+        for name, benchmark in BENCHMARKS.items():
+            results = run_benchmark(name, 20)
+            assert [x["variant"] for x in results] == list(benchmark.variants)
+            for result in results:
+                assert result["lines"] == 20
+                assert result["lines_per_second"] > 0
+                assert result["records"] == results[0]["records"] > 0
+
+
+def test_parser_benchmark_variants_agree():
+    with patch.dict(os.environ):
+        for name, benchmark in BENCHMARKS.items():
+            os.environ.update(benchmark.env)
+            lines = benchmark.lines()
+            variants = benchmark.parity or list(benchmark.variants)
+            results = [list(benchmark.variants[x]()(lines)) for x in variants]
+            assert results[0]
+            for result in results[1:]:
+                assert result == results[0], name
+
+
+def test_response_benchmark():
+    from benchmark.responses import run_benchmark as run_response_benchmark
+
+    results = run_response_benchmark(100, 1)
+    assert [(x["variant"], x["errors"]) for x in results] == [
+        ("full", False), ("filtered", False), ("full", True), ("filtered", True)
+    ]
+    for full, filtered in zip(results[::2], results[1::2]):
+        assert filtered["response_bytes"] < full["response_bytes"]
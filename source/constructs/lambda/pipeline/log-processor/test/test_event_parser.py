@@ -19,7 +19,8 @@ os.environ['CONFIG_JSON'] = json.dumps({
 })
 os.environ['LOG_TYPE'] = "SingleLineText"
 
-from event.event_parser import EventBridge
+from event.event_parser import EventBridge, checkpoint
+from event.ranged_reader import _get_range
 
 
 @pytest.fixture
@@ -176,3 +177,502 @@ class TestEventBridgeParser:
         
         with pytest.raises(KeyError):
             eventbridge_parser.process_event(invalid_event)
+
+    def test_process_event_drops_empty_records(self, eventbridge_parser, sample_eventbridge_event, setup_s3_bucket):
+        from log_processor.log_parser import LogParser
+
+        with open("./test/datafile/vpcflow.log", encoding="utf-8") as f:
+            setup_s3_bucket.put_object(Bucket='test-bucket', Key='test-key', Body=f.read())
+
+        eventbridge_parser._log_parser = LogParser("VPCFlowWithS3")
+        with patch('event.event_parser.CONFIG_JSON', ""), \
+            patch('event.event_parser.idx_svc.calculate_record_size') as mock_calc_size, \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load, \
+            patch('event.event_parser.plugin_modules', []):
+            mock_calc_size.return_value = 100
+            mock_bulk_load.side_effect = lambda records, **kwargs: (records, [])
+
+            eventbridge_parser.process_event(sample_eventbridge_event)
+
+            mock_bulk_load.assert_called_once()
+            documents = mock_bulk_load.call_args[0][0]
+            assert len(documents) == 10
+            assert all(documents)
+            # the header row and the records without src and dst never reach bulk requests.
+            assert mock_calc_size.call_count == 10
+
+            metrics_data = eventbridge_parser._metrics.serialize_metric_set()
+            assert metrics_data['TotalLogs'][0] == 35
+            assert metrics_data['LoadedLogs'][0] == 10
+            assert metrics_data['FailedLogs'][0] == 0
+            assert metrics_data['ExcludedLogs'][0] == 25
+
+
+class TestMSKParser:
+
+    def test_process_event_drops_empty_records(self):
+        import base64
+        from event.event_parser import MSK
+
+        with patch('event.event_parser.sub_category', "FLB"):
+            parser = MSK("MSK")
+        parser.set_metrics(Metrics(namespace="Solution/CL"))
+        messages = [{"log": "a"}, {}, {"log": "b"}, {}, {"log": "c"}]
+        event = {
+            "eventSource": "aws:kafka",
+            "records": {
+                "topic-0": [
+                    {"value": base64.b64encode(json.dumps(message).encode()).decode()}
+                    for message in messages
+                ]
+            },
+        }
+
+        with patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load, \
+            patch('event.event_parser.plugin_modules', []):
+            mock_bulk_load.side_effect = lambda records, **kwargs: (records, [])
+
+            parser.process_event(event)
+
+            mock_bulk_load.assert_called_once()
+            assert mock_bulk_load.call_args[0][0] == [{"log": "a"}, {"log": "b"}, {"log": "c"}]
+
+            metrics_data = parser._metrics.serialize_metric_set()
+            assert metrics_data['TotalLogs'][0] == 5
+            assert metrics_data['LoadedLogs'][0] == 3
+            assert metrics_data['ExcludedLogs'][0] == 2
+        parser._metrics.clear_metrics()
+
+
+class FakeOpenSearchIndex:
+    """A fake _bulk endpoint which keeps the created document ids"""
+
+    def __init__(self, requests_mock):
+        from idx.idx_svc import opensearch_util
+
+        self.documents = {}
+        self.conflicts = 0
+        url = f"https://{opensearch_util.endpoint}/{opensearch_util.index_alias}/_bulk"
+        requests_mock.put(url, json=self._bulk)
+
+    def _bulk(self, request, context):
+        lines = request.text.splitlines()
+        items = []
+        for action, source in zip(lines[::2], lines[1::2]):
+            action = json.loads(action)
+            doc_id = action.get("create", {}).get("_id", str(len(self.documents)))
+            if doc_id in self.documents:
+                self.conflicts += 1
+                error = {"type": "version_conflict_engine_exception", "reason": "document already exists"}
+                items.append({"create": {"status": 409, "error": error}})
+                continue
+            self.documents[doc_id] = json.loads(source)
+            items.append({next(iter(action)): {"status": 201}})
+        return {"took": 1, "errors": self.conflicts > 0, "items": items}
+
+
+class TestDocumentId:
+
+    def test_replay_s3_event(self, eventbridge_parser, sample_eventbridge_event, setup_s3_bucket, requests_mock):
+        index = FakeOpenSearchIndex(requests_mock)
+
+        with patch('idx.idx_svc.DOCUMENT_ID_STRATEGY', "hash"), \
+            patch('event.event_parser.plugin_modules', []):
+            eventbridge_parser.process_event(sample_eventbridge_event)
+            assert len(index.documents) == 4
+            eventbridge_parser._metrics.clear_metrics()
+
+            # the same S3 object is delivered again
+            eventbridge_parser.process_event(sample_eventbridge_event)
+            assert len(index.documents) == 4
+            assert index.conflicts == 4
+
+            metrics_data = eventbridge_parser._metrics.serialize_metric_set()
+            assert metrics_data['LoadedLogs'][0] == 4
+            assert metrics_data['FailedLogs'][0] == 0
+
+    def test_replay_msk_event(self, requests_mock):
+        import base64
+        from event.event_parser import MSK
+
+        index = FakeOpenSearchIndex(requests_mock)
+        with patch('event.event_parser.sub_category', "FLB"):
+            parser = MSK("MSK")
+        parser.set_metrics(Metrics(namespace="Solution/CL"))
+
+        # two identical messages at different offsets are different documents.
+        messages = [{"log": "a"}, {"log": "b"}, {"log": "b"}]
+        event = {
+            "eventSource": "aws:kafka",
+            "records": {
+                "topic-0": [
+                    {"offset": offset, "value": base64.b64encode(json.dumps(message).encode()).decode()}
+                    for offset, message in enumerate(messages)
+                ]
+            },
+        }
+
+        with patch('idx.idx_svc.DOCUMENT_ID_STRATEGY', "hash"), \
+            patch('event.event_parser.plugin_modules', []):
+            parser.process_event(event)
+            parser.process_event(event)
+
+        assert len(index.documents) == 3
+        assert index.conflicts == 3
+        parser._metrics.clear_metrics()
+
+        # without document ids, the replay duplicates documents.
+        with patch('event.event_parser.plugin_modules', []):
+            parser.process_event(event)
+        assert len(index.documents) == 6
+        assert "create" not in requests_mock.last_request.text
+        parser._metrics.clear_metrics()
+
+
+class TestStreamChunking:
+
+    def _msk_event(self, messages):
+        import base64
+
+        return {
+            "eventSource": "aws:kafka",
+            "records": {
+                "topic-0": [
+                    {"offset": offset, "value": base64.b64encode(json.dumps(message).encode()).decode()}
+                    for offset, message in enumerate(messages)
+                ]
+            },
+        }
+
+    def test_chunk_iter(self):
+        from event.event_parser import MSK, idx_svc
+
+        with patch('event.event_parser.sub_category', "FLB"):
+            parser = MSK("MSK")
+
+        records = [{"id": i, "log": "x" * 1024 * 1024} for i in range(12)]
+        records.insert(5, {"id": "oversized", "log": "x" * 12 * 1024 * 1024})
+        ids = [str(i) for i in range(len(records))]
+        with patch('event.event_parser.MAX_PAYLOAD_SIZE', 10), \
+            patch('event.event_parser.batch_size', 4):
+            chunks = list(parser._chunk_iter(records, ids))
+
+        assert [len(x[0]) for x in chunks] == [4, 1, 1, 4, 3]
+        assert chunks[2][0][0]["id"] == "oversized"
+        assert [x for chunk in chunks for x in chunk[0]] == records
+        assert [x for chunk in chunks for x in chunk[1]] == ids
+        for chunk_records, _ in chunks:
+            size = sum(idx_svc.calculate_record_size(x) for x in chunk_records)
+            assert size <= 9 * 1024 * 1024 or len(chunk_records) == 1
+
+    def test_process_oversized_event(self):
+        import time
+        import threading
+        from event.event_parser import MSK, idx_svc
+
+        with patch('event.event_parser.sub_category', "FLB"):
+            parser = MSK("MSK")
+        parser.set_metrics(Metrics(namespace="Solution/CL"))
+        messages = [{"id": i, "log": "x" * 1024 * 1024} for i in range(30)]
+
+        running, max_running = [0], [0]
+        lock = threading.Lock()
+
+        def _bulk_load(records, need_json_serial=False, ids=None):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return records, [x for x in records if x["id"] % 7 == 0]
+
+        with patch('event.event_parser.idx_svc.bulk_load_idx_records', side_effect=_bulk_load) as mock_bulk_load, \
+            patch('event.event_parser.restorer.export_failed_records') as mock_export_failed, \
+            patch('event.event_parser.plugin_modules', []), \
+            patch('event.event_parser.MAX_PAYLOAD_SIZE', 10), \
+            patch('event.event_parser.BULK_MAX_WORKERS', 4):
+            parser.process_event(self._msk_event(messages))
+
+        payloads = [call.args[0] for call in mock_bulk_load.call_args_list]
+        assert len(payloads) == 4
+        assert sorted(x["id"] for payload in payloads for x in payload) == list(range(30))
+        for payload in payloads:
+            assert sum(idx_svc.calculate_record_size(x) for x in payload) <= 9 * 1024 * 1024
+        assert max_running[0] > 1
+
+        # failed records of all chunks are reported together
+        mock_export_failed.assert_called_once()
+        assert sorted(x["id"] for x in mock_export_failed.call_args.args[1]) == [0, 7, 14, 21, 28]
+
+        metrics_data = parser._metrics.serialize_metric_set()
+        assert metrics_data['TotalLogs'][0] == 30
+        assert metrics_data['LoadedLogs'][0] == 25
+        assert metrics_data['FailedLogs'][0] == 5
+        parser._metrics.clear_metrics()
+
+
+class TestKDSParser:
+
+    def test_process_aggregated_records(self):
+        import base64
+        from event.event_parser import KDS
+        from test.test_kpl_aggregation import aggregate
+
+        with patch('event.event_parser.sub_category', "FLB"):
+            parser = KDS("KDS")
+        parser.set_metrics(Metrics(namespace="Solution/CL"))
+
+        def _kinesis_record(seq, data):
+            return {
+                "eventID": f"shardId-000000000000:{seq}",
+                "kinesis": {"sequenceNumber": seq, "data": base64.b64encode(data).decode()},
+            }
+
+        event = {
+            "Records": [
+                _kinesis_record("1", aggregate([json.dumps({"id": i}).encode() for i in range(3)])),
+                _kinesis_record("2", json.dumps({"id": 3}).encode()),
+                _kinesis_record("3", aggregate([json.dumps({"id": i}).encode() for i in range(4, 6)])),
+            ]
+        }
+
+        with patch('event.event_parser.IS_SVC_PIPELINE', False), \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load, \
+            patch('idx.idx_svc.DOCUMENT_ID_STRATEGY', "hash"), \
+            patch('event.event_parser.plugin_modules', []):
+            mock_bulk_load.side_effect = lambda records, **kwargs: (records, [])
+            parser.process_event(event)
+
+        assert mock_bulk_load.call_args.args[0] == [{"id": i} for i in range(6)]
+        # each user record of an aggregated record has its own document id
+        assert len(set(mock_bulk_load.call_args.kwargs["ids"])) == 6
+
+        metrics_data = parser._metrics.serialize_metric_set()
+        assert metrics_data['TotalLogs'][0] == 6
+        assert metrics_data['LoadedLogs'][0] == 6
+        parser._metrics.clear_metrics()
+
+
+class FakeLambdaContext:
+    def __init__(self, remaining_times):
+        self._remaining_times = iter(remaining_times)
+
+    def get_remaining_time_in_millis(self):
+        return next(self._remaining_times, 900000)
+
+
+@pytest.fixture
+def large_object_event(sample_eventbridge_event):
+    with mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='test-bucket')
+        s3.create_bucket(Bucket=os.environ["BACKUP_BUCKET_NAME"])
+        body = "\n".join(f'2024-01-13T10:00:00Z INFO message {i}' for i in range(50))
+        response = s3.put_object(Bucket='test-bucket', Key='test-key', Body=body)
+        sample_eventbridge_event["detail"]["object"].update(
+            {"size": len(body), "etag": response["ETag"].strip('"')}
+        )
+        yield sample_eventbridge_event
+
+
+class TestCheckpoint:
+
+    def test_resume_after_timeout(self, eventbridge_parser, large_object_event):
+        from event.event_parser import ProcessingInterrupted
+
+        loaded = []
+        with patch('event.event_parser.CHECKPOINT_MIN_OBJECT_SIZE', 1), \
+            patch('event.event_parser.batch_size', 10), \
+            patch('event.event_parser.plugin_modules', []), \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load:
+            mock_bulk_load.side_effect = lambda records, **kwargs: (loaded.extend(records), [])
+
+            # the invocation is running out of time before the third batch, the first batch
+            # is loaded without checking the remaining time
+            eventbridge_parser.set_lambda_context(FakeLambdaContext([900000, 1000]))
+            with pytest.raises(ProcessingInterrupted):
+                eventbridge_parser.process_event(large_object_event)
+            assert len(loaded) == 20
+            metrics_data = eventbridge_parser._metrics.serialize_metric_set()
+            assert metrics_data['TotalLogs'][0] == 20
+            assert metrics_data['LoadedLogs'][0] == 20
+            eventbridge_parser._metrics.clear_metrics()
+
+            # the message is redelivered, the object is resumed from the checkpoint
+            eventbridge_parser.set_lambda_context(FakeLambdaContext([]))
+            eventbridge_parser.process_event(large_object_event)
+            messages = [record["message"] for record in loaded]
+            assert messages == [f"message {i}" for i in range(50)]
+            metrics_data = eventbridge_parser._metrics.serialize_metric_set()
+            assert metrics_data['TotalLogs'][0] == 30
+            assert metrics_data['LoadedLogs'][0] == 30
+            eventbridge_parser._metrics.clear_metrics()
+
+            # a completed object is skipped
+            mock_bulk_load.reset_mock()
+            eventbridge_parser.process_event(large_object_event)
+            mock_bulk_load.assert_not_called()
+
+    def test_resume_from_byte_offset(self, sample_eventbridge_event):
+        from event.checkpoint import Position
+        from event.event_parser import ProcessingInterrupted
+
+        lines = [json.dumps({"message": f"message {i}"}) + "\n" for i in range(50)]
+        body = "".join(lines)
+        loaded = []
+        with mock_aws(), patch('event.event_parser.log_type', "JSON"), \
+            patch('event.event_parser.CHECKPOINT_MIN_OBJECT_SIZE', 1), \
+            patch('event.event_parser.batch_size', 10), \
+            patch('event.event_parser.plugin_modules', []), \
+            patch('event.event_parser.checkpoint.put', wraps=checkpoint.put) as mock_put, \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load:
+            mock_bulk_load.side_effect = lambda records, **kwargs: (loaded.extend(records), [])
+            s3 = boto3.client('s3', region_name='us-east-1')
+            s3.create_bucket(Bucket='test-bucket')
+            s3.create_bucket(Bucket=os.environ["BACKUP_BUCKET_NAME"])
+            response = s3.put_object(Bucket='test-bucket', Key='test-key', Body=body)
+            sample_eventbridge_event["detail"]["object"].update(
+                {"size": len(body), "etag": response["ETag"].strip('"')}
+            )
+            parser = EventBridge("EVENT_BRIDGE")
+            parser.set_metrics(Metrics(namespace="Solution/CL"))
+            assert parser.log_parser.seekable
+
+            parser.set_lambda_context(FakeLambdaContext([900000, 1000]))
+            with pytest.raises(ProcessingInterrupted):
+                parser.process_event(sample_eventbridge_event)
+            position = mock_put.call_args.args[2]
+            assert position == Position(20, len("".join(lines[:20])), 0)
+            parser._metrics.clear_metrics()
+
+            # the object is read from the line of the first record not loaded yet
+            with patch.object(parser, 's3_read_object_by_lines', wraps=parser.s3_read_object_by_lines) as mock_read:
+                parser.set_lambda_context(FakeLambdaContext([]))
+                parser.process_event(sample_eventbridge_event)
+                mock_read.assert_called_once_with('test-bucket', 'test-key', position.byte_offset)
+            assert [record["message"] for record in loaded] == [f"message {i}" for i in range(50)]
+            metrics_data = parser._metrics.serialize_metric_set()
+            assert metrics_data['TotalLogs'][0] == 30
+            parser._metrics.clear_metrics()
+
+    def test_interrupted_sqs_messages(self):
+        from event.event_parser import SQS, ProcessingInterrupted
+
+        def _message(message_id, key):
+            s3_event = {"Records": [{"s3": {"bucket": {"name": "test-bucket"}, "object": {"key": key}}}]}
+            return {"messageId": message_id, "eventSource": "aws:sqs", "body": json.dumps(s3_event)}
+
+        event = {"Records": [_message(f"message-{i}", f"key-{i}") for i in range(3)]}
+        parser = SQS("SQS")
+        with patch.object(parser, 'process_s3_log_file') as mock_process:
+            mock_process.side_effect = [None, ProcessingInterrupted("stop"), None]
+            with pytest.raises(ProcessingInterrupted):
+                parser.process_event(event)
+        # the objects after the interrupted one are processed when the batch is redelivered
+        assert mock_process.call_count == 2
+
+    def test_read_gzip_object_from_byte_offset(self):
+        import gzip
+
+        body = b"line 1\nline 2\nline 3\n"
+        with mock_aws():
+            s3 = boto3.client('s3', region_name='us-east-1')
+            s3.create_bucket(Bucket='test-bucket')
+            s3.put_object(Bucket='test-bucket', Key='test-key.gz', Body=gzip.compress(body))
+            parser = EventBridge("EVENT_BRIDGE")
+            lines = parser.s3_read_object_by_lines('test-bucket', 'test-key.gz', 7)
+            assert next(lines) == "line 2\n"
+            assert parser._line_start == 7
+            assert list(lines) == ["line 3\n"]
+            assert parser._line_start == 14
+
+    def test_get_checkpoint_errors(self):
+        from botocore.exceptions import ClientError
+        from event.checkpoint import Checkpoint, Position
+
+        with patch('event.checkpoint.s3_client') as mock_s3:
+            mock_s3.get_object.side_effect = ClientError(
+                {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+            )
+            assert Checkpoint("backup-bucket").get("test-bucket", "test-key") == Position()
+
+            # a checkpoint which can't be read is not treated as a missing one
+            mock_s3.get_object.side_effect = ClientError(
+                {"Error": {"Code": "AccessDenied"}}, "GetObject"
+            )
+            with pytest.raises(ClientError):
+                Checkpoint("backup-bucket").get("test-bucket", "test-key")
+
+    def test_small_object_without_checkpoint(self, eventbridge_parser, large_object_event):
+        with patch('event.event_parser.batch_size', 10), \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load, \
+            patch('event.event_parser.checkpoint') as mock_checkpoint:
+            mock_bulk_load.return_value = ([], [])
+
+            eventbridge_parser.set_lambda_context(FakeLambdaContext([1000] * 10))
+            eventbridge_parser.process_event(large_object_event)
+            assert mock_bulk_load.call_count == 5
+            mock_checkpoint.get.assert_not_called()
+            mock_checkpoint.put.assert_not_called()
+
+
+class TestRangedGet:
+
+    def test_process_event_with_ranged_gets(self, eventbridge_parser, large_object_event):
+        loaded = []
+        with patch('event.event_parser.RANGED_GET_MIN_OBJECT_SIZE', 1), \
+            patch('event.event_parser.RANGED_GET_SIZE', 100), \
+            patch('event.event_parser.plugin_modules', []), \
+            patch('event.ranged_reader._get_range', wraps=_get_range) as mock_get_range, \
+            patch('event.event_parser.idx_svc.bulk_load_idx_records') as mock_bulk_load:
+            mock_bulk_load.side_effect = lambda records, **kwargs: (loaded.extend(records), [])
+            eventbridge_parser.process_event(large_object_event)
+
+        size = large_object_event["detail"]["object"]["size"]
+        assert mock_get_range.call_count == (size + 99) // 100
+        assert [record["message"] for record in loaded] == [f"message {i}" for i in range(50)]
+
+
+class TestStageTimer:
+
+    def test_stage_metrics(self, eventbridge_parser, large_object_event, requests_mock):
+        from event.stage_timer import stage_timer
+
+        FakeOpenSearchIndex(requests_mock)
+        with patch('event.event_parser.plugin_modules', []):
+            stage_timer.start(sample_rate=1)
+            with stage_timer.stage("Parse"):
+                eventbridge_parser.process_event(large_object_event)
+            stage_timer.put_metrics(eventbridge_parser._metrics)
+
+        metrics_data = eventbridge_parser._metrics.serialize_metric_set()
+        for name in ("ParseTime", "S3GetTime", "SerializeTime", "BulkTime", "BulkBytes", "RecordsPerSecond"):
+            assert name in metrics_data
+        assert metrics_data["S3GetBytes"] == [large_object_event["detail"]["object"]["size"]]
+
+    def test_stage_timer_blocks(self, eventbridge_parser, requests_mock):
+        from event.stage_timer import stage_timer
+        from event.event_parser import READ_CHUNK_SIZE
+
+        FakeOpenSearchIndex(requests_mock)
+        event = {"detail": {"bucket": {"name": "test-bucket"}, "object": {"key": "large-key"}}}
+        with mock_aws():
+            s3 = boto3.client('s3', region_name='us-east-1')
+            s3.create_bucket(Bucket='test-bucket')
+            body = "\n".join(f'2024-01-13T10:00:00Z INFO message {i}' for i in range(20000))
+            s3.put_object(Bucket='test-bucket', Key='large-key', Body=body)
+
+            with patch('event.event_parser.plugin_modules', []), \
+                patch('event.event_parser.batch_size', 1000):
+                stage_timer.start(sample_rate=1)
+                with stage_timer.stage("Parse"):
+                    eventbridge_parser.process_event(event)
+                timed_blocks = stage_timer.count
+                stage_timer.put_metrics(eventbridge_parser._metrics)
+
+        # the timed blocks are the chunks of the object and a few stages per batch of records, the
+        # records themselves are not timed
+        chunks = -(-len(body) // READ_CHUNK_SIZE) + 1
+        batches = 20000 // 1000
+        assert chunks + batches <= timed_blocks <= chunks + 4 * batches + 1
@@ -122,4 +122,270 @@ def test_ism_policy_creation(mock_sleep, aos_service, mock_opensearch_util):
         sleep_interval=0,
         policy_name="test_policy"
     )
-    assert mock_opensearch_util.create_ism_policy.call_count == 2
\ No newline at end of file
+    assert mock_opensearch_util.create_ism_policy.call_count == 2
+
+def _bulk_response(count, failed=(), filtered=True):
+    """Build a realistic _bulk response body, failed is the positions of the failed items"""
+    import json
+
+    items = []
+    for i in range(count):
+        if i in failed:
+            error = {
+                "type": "mapper_parsing_exception",
+                "reason": "failed to parse field [sc-bytes] of type [long]",
+            }
+            item = {"status": 400, "error": error}
+            if not filtered:
+                item = {"_index": "hello-2024-01-01-000001", "_id": f"id-{i}", **item}
+        elif filtered:
+            item = {"status": 201}
+        else:
+            item = {
+                "_index": "hello-2024-01-01-000001",
+                "_id": f"aBcDeFgHiJkLmNoP{i:08d}",
+                "_version": 1,
+                "result": "created",
+                "_shards": {"total": 2, "successful": 2, "failed": 0},
+                "_seq_no": i,
+                "_primary_term": 1,
+                "status": 201,
+            }
+        items.append({"index": item})
+    return json.dumps({"took": 1234, "errors": bool(failed), "items": items}).encode()
+
+
+def test_bulk_load_idx_records_with_filter_path(aos_service, requests_mock):
+    from idx.idx_svc import opensearch_util
+
+    url = f"https://{opensearch_util.endpoint}/{opensearch_util.index_alias}/_bulk"
+    requests_mock.put(url, content=_bulk_response(5, failed=(1, 3)))
+
+    records = [{"id": i} for i in range(5)]
+    total, failed_records = aos_service.bulk_load_idx_records(records)
+
+    assert requests_mock.last_request.qs["filter_path"] == [
+        "errors,took,items.*.error,items.*.status"
+    ]
+    assert total == records
+    assert [x["id"] for x in failed_records] == [1, 3]
+    assert failed_records[0]["error_type"] == "mapper_parsing_exception"
+    assert failed_records[0]["index_name"] == opensearch_util.index_alias
+
+    requests_mock.put(url, content=_bulk_response(5))
+    _, failed_records = aos_service.bulk_load_idx_records([{"id": i} for i in range(5)])
+    assert failed_records == []
+
+    # the response is fully checked if the errors flag is missing.
+    requests_mock.put(
+        url, content=b'{"items":[{"index":{"status":201}},{"index":{"status":429}}]}'
+    )
+    _, failed_records = aos_service.bulk_load_idx_records([{"id": 0}, {"id": 1}])
+    assert [x["id"] for x in failed_records] == [1]
+
+
+def test_bulk_response_handling(aos_service):
+    """The filtered response gives the same failed records as the full response decoded item
+    by item, in a fraction of its bytes."""
+    from benchmark.responses import _get_failed_records_full
+
+    count = 10000
+    for failed in ((), (10, 5000, 9999)):
+        full = _bulk_response(count, failed=failed, filtered=False)
+        filtered = _bulk_response(count, failed=failed)
+
+        expected = _get_failed_records_full(full, [{"id": i} for i in range(count)], "hello")
+        result = aos_service._get_failed_records(filtered, [{"id": i} for i in range(count)], "hello")
+        assert result == expected
+        assert [x["id"] for x in result] == list(failed)
+        assert len(filtered) * 3 < len(full)
+
+
+def test_create_bulk_records_with_ids(aos_service):
+    import json
+
+    records = [{"id": 0}, {"id": 1}]
+    ids = [
+        aos_service.generate_document_id(f"s3://bucket/key:{i}", record)
+        for i, record in enumerate(records)
+    ]
+    assert ids[0] == aos_service.generate_document_id("s3://bucket/key:0", {"id": 0})
+    assert ids[0] != aos_service.generate_document_id("s3://bucket/key:1", {"id": 0})
+    assert len(ids[0]) == 40
+
+    lines = aos_service._create_bulk_records(records, ids=ids).splitlines()
+    assert json.loads(lines[0]) == {"create": {"_id": ids[0]}}
+    assert json.loads(lines[2]) == {"create": {"_id": ids[1]}}
+
+    lines = aos_service._create_bulk_records(records).splitlines()
+    assert json.loads(lines[0]) == {"index": {}}
+
+
+def test_get_failed_records_with_version_conflicts(aos_service):
+    import json
+
+    content = json.dumps(
+        {
+            "took": 1,
+            "errors": True,
+            "items": [
+                {"create": {"status": 201}},
+                {
+                    "create": {
+                        "status": 409,
+                        "error": {
+                            "type": "version_conflict_engine_exception",
+                            "reason": "document already exists",
+                        },
+                    }
+                },
+                {
+                    "create": {
+                        "status": 400,
+                        "error": {"type": "mapper_parsing_exception", "reason": ""},
+                    }
+                },
+            ],
+        }
+    ).encode()
+    records = [{"id": i} for i in range(3)]
+    failed_records = aos_service._get_failed_records(content, records, "hello")
+    assert [x["id"] for x in failed_records] == [2]
+
+
+def test_adaptive_batch_size():
+    from idx.idx_svc import AdaptiveBatchSize
+
+    size = AdaptiveBatchSize(1000, 100, 2000, target_ms=500)
+    # a batch cut by the payload size doesn't grow the batch size
+    size.update(10, 100)
+    assert size.value == 1000
+    size.update(1000, 100)
+    assert size.value == 1250
+    for _ in range(10):
+        size.update(size.value, 100)
+    assert size.value == 2000
+
+    size.update(2000, 800)
+    assert size.value == 1500
+    size.reject()
+    assert size.value == 750
+    for _ in range(10):
+        size.reject()
+    assert size.value == 100
+
+
+@pytest.fixture
+def backfill():
+    from benchmark.standins import OpenSearchStandIn
+    from idx.idx_svc import AdaptiveBatchSize
+
+    with patch("idx.idx_svc.BACKFILL_ID", "2024-01"), patch(
+        "idx.idx_svc.init_backfill_job", 0
+    ), patch(
+        "idx.idx_svc.backfill_batch_size", AdaptiveBatchSize(4, 2, 10, 60000)
+    ), OpenSearchStandIn() as aos:
+        yield aos
+
+
+def test_backfill(aos_service, backfill):
+    from idx.idx_svc import opensearch_util, backfill_batch_size
+
+    index_name = "hello-backfill-2024-01"
+    assert aos_service.default_index_name() == index_name
+    assert aos_service.bulk_batch_size(10) == 4
+
+    aos_service._init_backfill()
+    aos_service._init_backfill()
+    assert backfill.settings_calls == [
+        (
+            index_name,
+            {
+                "refresh_interval": "-1",
+                "number_of_replicas": "0",
+                "plugins": {"index_state_management": {"auto_manage": "false"}},
+            },
+        )
+    ]
+
+    total, failed_records = aos_service.bulk_load_idx_records([{"id": i} for i in range(4)])
+    assert len(total) == 4 and failed_records == []
+    assert backfill.index_documents == {index_name: 4}
+    # a full batch is loaded within the target latency
+    assert aos_service.bulk_batch_size(10) == backfill_batch_size.value == 5
+
+    assert aos_service.finish_backfill() == index_name
+    assert backfill.settings_calls[1] == (
+        index_name,
+        {
+            "refresh_interval": "30s",
+            "number_of_replicas": "1",
+            "plugins.index_state_management.rollover_skip": "true",
+        },
+    )
+    assert backfill.indices[index_name]["refresh_interval"] == "30s"
+    assert backfill.refreshed == [index_name]
+    assert backfill.alias_actions == [
+        {
+            "add": {
+                "index": index_name,
+                "alias": opensearch_util.index_alias,
+                "is_write_index": False,
+            }
+        }
+    ]
+    assert backfill.ism_policies == {index_name: "hello-ism-policy"}
+
+
+def test_finish_backfill_ism_policy(aos_service, backfill):
+    aos_service._init_backfill()
+    # no ISM policy is created without ages and rollover size
+    with patch("idx.idx_svc.rollover_size", ""):
+        aos_service.finish_backfill()
+    assert backfill.settings_calls[-1] == (
+        "hello-backfill-2024-01",
+        {"refresh_interval": "30s", "number_of_replicas": "1"},
+    )
+    assert backfill.ism_policies == {}
+
+
+def test_finish_backfill_ism_policy_failed(aos_service, backfill, requests_mock):
+    from idx.idx_svc import opensearch_util
+
+    # the requests are served by requests_mock instead of the stand-in
+    requests_mock.post(
+        f"https://{opensearch_util.endpoint}/_plugins/_ism/add/hello-backfill-2024-01",
+        json={"updated_indices": 0, "failures": True, "failed_indices": [{"reason": "policy not found"}]},
+    )
+    for method, path in (
+        ("PUT", "hello-backfill-2024-01/_settings"),
+        ("POST", "hello-backfill-2024-01/_refresh"),
+        ("POST", "_aliases"),
+    ):
+        requests_mock.register_uri(method, f"https://{opensearch_util.endpoint}/{path}", json={})
+    with pytest.raises(APIException):
+        aos_service.finish_backfill()
+
+
+def test_backfill_index_created_concurrently(aos_service, backfill):
+    from idx.idx_svc import opensearch_util
+
+    backfill.indices["hello-backfill-2024-01"] = {}
+    with patch.object(opensearch_util, "exist_index", return_value=False):
+        aos_service._init_backfill()
+    assert backfill.settings_calls == []
+
+
+def test_backfill_batch_size_rejected(aos_service, backfill, requests_mock):
+    from idx.idx_svc import opensearch_util, backfill_batch_size
+
+    url = f"https://{opensearch_util.endpoint}/hello-backfill-2024-01/_bulk"
+    requests_mock.put(url, status_code=429, text="rejected")
+    with patch("idx.idx_svc.SLEEP_INTERVAL", 0), pytest.raises(RuntimeError):
+        aos_service.bulk_load_idx_records([{"id": 1}])
+    assert backfill_batch_size.value == 2
+
+
+def test_finish_backfill_without_backfill_id(aos_service):
+    with pytest.raises(APIException):
+        aos_service.finish_backfill()
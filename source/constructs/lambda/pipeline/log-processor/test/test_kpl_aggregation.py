@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import hashlib
+from event.kpl_aggregation import (
+    KPL_AGGREGATED_RECORD_MAGIC,
+    deaggregate,
+    is_aggregated,
+)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _field(field_number: int, payload) -> bytes:
+    if isinstance(payload, int):
+        return _varint(field_number << 3) + _varint(payload)
+    return _varint(field_number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def aggregate(user_records: list, partition_key: str = "pk") -> bytes:
+    """Pack user records the same way as the Kinesis Producer Library"""
+    message = _field(1, partition_key.encode()) + _field(2, b"1234567890")
+    for data in user_records:
+        record = (
+            _field(1, 0)
+            + _field(2, 0)
+            + _field(3, data)
+            + _field(4, _field(1, b"key") + _field(2, b"value"))
+        )
+        message += _field(3, record)
+    return KPL_AGGREGATED_RECORD_MAGIC + message + hashlib.md5(message).digest()
+
+
+class TestKPLAggregation:
+    def test_deaggregate(self):
+        user_records = [json.dumps({"id": i, "log": "x" * i}).encode() for i in range(200)]
+        data = aggregate(user_records)
+
+        assert is_aggregated(data)
+        assert deaggregate(data) == user_records
+        assert deaggregate(aggregate([])) == []
+
+    def test_deaggregate_non_aggregated_record(self):
+        data = b'{"log": "hello"}'
+        assert not is_aggregated(data)
+        assert deaggregate(data) == [data]
+        assert deaggregate(KPL_AGGREGATED_RECORD_MAGIC) == [KPL_AGGREGATED_RECORD_MAGIC]
+
+    def test_deaggregate_invalid_record(self):
+        data = aggregate([b"a", b"b"])
+
+        # MD5 digest doesn't match
+        corrupted = data[:-1] + bytes([data[-1] ^ 0xFF])
+        assert deaggregate(corrupted) == [corrupted]
+
+        # truncated protobuf message with a valid digest
+        message = data[len(KPL_AGGREGATED_RECORD_MAGIC) : -16][:-1]
+        truncated = KPL_AGGREGATED_RECORD_MAGIC + message + hashlib.md5(message).digest()
+        assert deaggregate(truncated) == [truncated]
@@ -29,6 +29,13 @@ class TestLambdaHandler:
         mock_idx.init_idx_env.assert_called()
         mock_disable.assert_called_with(event)
 
+    @patch("lambda_function.idx_svc")
+    @patch("lambda_function.parse_sqs_event")
+    def test_finish_backfill(self, mock_parse, mock_idx):
+        lambda_handler({"action": "FinishBackfill"}, None)
+        mock_idx.finish_backfill.assert_called_once()
+        mock_parse.assert_not_called()
+
 
 class TestParseEvents:
     @patch("lambda_function.KDS")
@@ -92,3 +99,48 @@ def test_approximate_receive_count_greater_than_2_logs_correctly(mocker):
         "Error: %s",
         "This message has exceeded the maximum number of retries, verify that you can connect to OpenSearch or that the data type does not match the field type defined for the index",
     )
+
+
+@patch("lambda_function.idx_svc")
+@patch("lambda_function.source", "SQS")
+def test_processing_interrupted_sqs_messages(mock_idx):
+    from event.event_parser import ProcessingInterrupted
+
+    event = {
+        "Records": [
+            {"eventSource": "aws:sqs", "attributes": {"ApproximateReceiveCount": "5"}}
+        ]
+    }
+    with patch("lambda_function.parse_sqs_event") as mock_parse, patch(
+        "lambda_function.lambda_client"
+    ) as mock_lambda, patch("lambda_function.sqs_client") as mock_sqs:
+        mock_parse.side_effect = ProcessingInterrupted("stop")
+        # the SQS event source is not created with ReportBatchItemFailures, the invocation fails
+        # to redeliver the batch, even if the messages have exceeded the maximum number of retries.
+        with pytest.raises(ProcessingInterrupted):
+            lambda_handler(event, None)
+        mock_parse.assert_called_once_with(event, None)
+        mock_lambda.invoke.assert_not_called()
+        mock_sqs.change_message_visibility.assert_not_called()
+
+
+@patch("lambda_function.idx_svc")
+@patch("lambda_function.source", "EVENT_BRIDGE")
+def test_processing_interrupted_async_event(mock_idx):
+    import json
+    from unittest.mock import MagicMock
+    from event.event_parser import ProcessingInterrupted
+
+    event = {"detail": {"bucket": {"name": "test-bucket"}, "object": {"key": "test-key"}}}
+    context = MagicMock(invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:test")
+    with patch("lambda_function.parse_event_bridge_event") as mock_parse, patch(
+        "lambda_function.lambda_client"
+    ) as mock_lambda:
+        mock_parse.side_effect = ProcessingInterrupted("stop")
+        # the event is resumed by an async invocation instead of a retry of the failed one
+        assert lambda_handler(event, context) == "Ok"
+        mock_lambda.invoke.assert_called_once_with(
+            FunctionName="arn:aws:lambda:us-east-1:123456789012:function:test",
+            InvocationType="Event",
+            Payload=json.dumps(event),
+        )
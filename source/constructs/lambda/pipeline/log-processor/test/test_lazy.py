@@ -0,0 +1,110 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import json
+import types
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from event.lazy import LazyClient, LazyPlugins
+
+LOG_PROCESSOR_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# count the boto3 clients and resources created by importing the log processor
+IMPORT_LAMBDA_FUNCTION = """
+import json
+import botocore.client
+
+created = []
+create_client = botocore.client.ClientCreator.create_client
+
+def _create_client(self, service_name, *args, **kwargs):
+    created.append(service_name)
+    return create_client(self, service_name, *args, **kwargs)
+
+botocore.client.ClientCreator.create_client = _create_client
+
+import lambda_function
+print(json.dumps(created))
+"""
+
+
+def import_time(code: str, env: dict) -> tuple:
+    """Run the code with `python -X importtime`
+
+    Returns:
+        tuple: (stdout, {module: (self us, cumulative us)})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env={**os.environ, **env},
+        cwd=LOG_PROCESSOR_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return result.stdout, modules
+
+
+def test_lazy_client():
+    conn = MagicMock()
+    client = LazyClient(conn, "s3", client_type="resource")
+    assert not client.created
+    conn.get_client.assert_not_called()
+
+    client.Object("bucket", "key")
+    assert client.created
+    conn.get_client.assert_called_once_with("s3", client_type="resource")
+    conn.get_client.return_value.Object.assert_called_once_with("bucket", "key")
+
+    client.meta
+    conn.get_client.assert_called_once()
+
+
+def test_lazy_client_is_created_once_by_threads():
+    conn = MagicMock()
+    client = LazyClient(conn, "s3")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: client.get(), range(100)))
+    conn.get_client.assert_called_once_with("s3")
+
+
+def test_lazy_plugins():
+    module = types.ModuleType("fake_plugin")
+    module.Plugin = MagicMock()
+    with patch.dict(sys.modules, {"fake_plugin": module}):
+        plugins = LazyPlugins("fake_plugin,fake_plugin", "ELB")
+        assert not plugins.loaded
+        module.Plugin.assert_not_called()
+
+        assert plugins
+        assert plugins.loaded
+        assert len(plugins) == 2
+        assert list(plugins) == [module.Plugin.return_value] * 2
+        module.Plugin.assert_called_with("ELB")
+        assert module.Plugin.call_count == 2
+
+    no_plugins = LazyPlugins("", "ELB")
+    assert not no_plugins
+    assert list(no_plugins) == []
+
+
+def test_import_creates_no_clients_or_plugins():
+    # the plugin modules are not on the path of the tests, importing them would fail
+    stdout, modules = import_time(
+        IMPORT_LAMBDA_FUNCTION,
+        {"SOURCE": "SQS", "PLUGINS": "geo_ip,user_agent"},
+    )
+    assert json.loads(stdout) == []
+    assert "lambda_function" in modules
+    assert "geo_ip" not in modules
+    assert "user_agent" not in modules
@@ -1,8 +1,10 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-
+import os
+import json
 import pytest
+from unittest.mock import patch
 
 
 class TestCloudFrontWithRT:
@@ -34,6 +36,50 @@ class TestCloudFrontWithRT:
         result = self.cf_with_rt.comma_delimited_list_string(s)
         assert result == expected
 
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "12345\ttest.com\tGET\t200\t/home\tFirefox\t1.2.3.4",
+            "12345\ttest.com\tGET\t200\t/home\tFirefox\t1.2.3.4\n",
+            "12345\ttest.com\tGET\t200\t/home\tFirefox\t1.2.3.4\r\n",
+            "12345\t-\tGET\t-\t/home\t-\t-\n",
+            "12345\ttest.com\tGET\n",
+            "12345\t\t\t\t\t\t",
+            " 12345 \t test.com\t-GET-\t200\t/home\tFirefox\t1.2.3.4",
+            '12345\ttest.com\tGET\t200\t"/home\tpage"\tFirefox\t1.2.3.4',
+            '12345\ttest.com\tGET\t200\t/home\tMozilla "5.0"\t1.2.3.4',
+            "12345\ttest.com\tGET\t200\t/home\tFirefox\t1.2.3.4\n\n",
+        ],
+    )
+    def test_parse_parity(self, line):
+        """The split by tabs returns the same record as csv.DictReader"""
+        field_names = self.cf_with_rt.comma_delimited_list_string(os.environ["FIELD_NAMES"])
+        assert self.cf_with_rt.parse(line) == self.cf_with_rt._parse_csv(line, field_names)
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "",
+            "\n",
+            "12345\ttest.com\n12345\ttest.com",
+            "\t".join(["x"] * 100),
+        ],
+    )
+    def test_parse_invalid_parity(self, line):
+        field_names = self.cf_with_rt.comma_delimited_list_string(os.environ["FIELD_NAMES"])
+        with pytest.raises(ValueError):
+            self.cf_with_rt._parse_csv(line, field_names)
+        with pytest.raises(ValueError):
+            self.cf_with_rt.parse(line)
+
+    def test_parse_without_field_names(self):
+        from log_processor.log_parser import CloudFrontWithRT
+
+        with patch.dict(os.environ, {"FIELD_NAMES": ""}):
+            parser = CloudFrontWithRT()
+        with pytest.raises(ValueError, match="Field names not defined"):
+            parser.parse("12345\ttest.com")
+
 
 class TestELBWithS3:
     def setup_method(self):
@@ -75,6 +121,38 @@ class TestCloudTrailWithS3:
             # assert record.
         assert i==4
 
+    def test_nested_fields(self):
+        records = list(self.ct.parse(self.data))
+        assert isinstance(records[1]["requestParameters"], str)
+        assert json.loads(records[1]["requestParameters"])["roleSessionName"] == "StateManagerService"
+        assert isinstance(records[1]["responseElements"], str)
+        assert isinstance(records[1]["userIdentity"], dict)
+
+    def test_flattened_and_excluded_fields(self):
+        from log_processor.log_parser import CloudTrailWithS3
+
+        ct = CloudTrailWithS3(
+            nested_field_type="flattened", excluded_fields="responseElements, tlsDetails"
+        )
+        records = list(ct.parse(self.data))
+        assert len(records) == 4
+        assert records[1]["requestParameters"]["roleSessionName"] == "StateManagerService"
+        for record in records:
+            assert "responseElements" not in record
+            assert "tlsDetails" not in record
+            assert "eventName" in record
+
+        ct = CloudTrailWithS3(nested_fields="userIdentity")
+        records = list(ct.parse(self.data))
+        assert isinstance(records[1]["userIdentity"], str)
+        assert isinstance(records[1]["requestParameters"], dict)
+
+    def test_invalid_nested_field_type(self):
+        from log_processor.log_parser import CloudTrailWithS3
+
+        with pytest.raises(ValueError):
+            CloudTrailWithS3(nested_field_type="nested")
+
 
 
 class TestS3:
@@ -139,6 +217,34 @@ class TestWAF:
             assert isinstance(record, dict)
             assert "action" in record
 
+    def test_promoted_headers(self):
+        from log_processor.log_parser import _web_acl_name
+
+        _web_acl_name.cache_clear()
+        records = list(self.waf.parse(self.data))
+        assert len(records) == 2
+        for record in records:
+            assert record["webaclName"] == "test-graphql"
+            assert record["host"] == "xgv77w723jdkfojpi6a2zsw6re.appsync-api.eu-west-1.amazonaws.com"
+            assert record["userAgent"].startswith("Mozilla/5.0")
+            assert "referer" not in record
+        assert _web_acl_name.cache_info().hits == 1
+
+    def test_configured_promoted_headers(self):
+        from log_processor.log_parser import WAFWithS3
+
+        waf = WAFWithS3(promoted_headers="Host=host, referer ,,origin=requestOrigin")
+        for record in waf.parse(self.data):
+            assert record["host"] == "xgv77w723jdkfojpi6a2zsw6re.appsync-api.eu-west-1.amazonaws.com"
+            assert record["referer"] == "https://d5szyetdhz3b0.cloudfront.net/"
+            assert record["requestOrigin"] == "https://d5szyetdhz3b0.cloudfront.net"
+            assert "userAgent" not in record
+
+    def test_invalid_web_acl_id(self):
+        line = '{"webaclId": "arn:aws:wafv2:invalid", "httpRequest": {"headers": []}}'
+        with pytest.raises(AttributeError):
+            list(self.waf.parse([line]))
+
 
 
 
@@ -216,6 +322,81 @@ class TestRDS:
             for record in self.rds.parse(self.data):
                 assert isinstance(record,dict)
 
+    def _message(self, log_group, *messages, message_type="DATA_MESSAGE"):
+        return json.dumps(
+            {
+                "messageType": message_type,
+                "logGroup": log_group,
+                "logStream": "mydb-instance-1",
+                "logEvents": [
+                    {"id": str(i), "timestamp": 1645164142837 + i, "message": x}
+                    for i, x in enumerate(messages)
+                ],
+            }
+        )
+
+    def test_parse_by_message(self):
+        with open("./test/datafile/rds.log", encoding="utf-8") as f:
+            records = list(self.rds.parse(f.readlines()))
+        assert len(records) == 160
+
+        deadlock = [x for x in records if "deadlock-thread-id-1" in x][0]
+        assert deadlock["deadlock-thread-id-1"] == "7"
+        assert deadlock["deadlock-query-1"] == "update user set name='tom2' where id=2"
+        assert deadlock["deadlock-thread-id-2"] == "8"
+        assert deadlock["deadlock-query-2"] == "update user set name='aiden2' where id=1"
+        assert deadlock["db-identifier"] == "myaudb-instance-1"
+
+        slow_queries = [x for x in records if "sq-duration" in x]
+        assert len(slow_queries) == 135
+        assert slow_queries[1]["sq-duration"] == "2.502063"
+
+    def test_parse_concatenated_messages(self):
+        audit = self._message(
+            "/aws/rds/cluster/mydb/audit",
+            "1645164733006686,mydb-instance-1,rdsadmin,localhost,5,1013,READ,mysql,plugin,",
+            "1645164733006789,mydb-instance-1,rdsadmin,localhost,5,1013,QUERY,mysql,'SELECT \\'}{\\'',0",
+        )
+        control = self._message("/aws/rds/cluster/mydb/audit", "CWL CONTROL MESSAGE", message_type="CONTROL_MESSAGE")
+        general = self._message(
+            "/aws/rds/cluster/mydb/general",
+            "2022-02-18T06:02:22.837877Z   55 Query\tSELECT 1",
+        )
+        # a message split across lines between its tokens, an invalid message and a message after it
+        head, tail = general.split(", ", 1)
+        lines = [audit + control + head + ",", tail + '{"messageType": "DATA_', general + "\n"]
+
+        records = list(self.rds.parse(lines))
+        assert len(records) == 4
+        assert records[0]["audit-operation"] == "READ"
+        assert records[1]["audit-query"] == "'SELECT \\'}{\\''"
+        assert records[2]["general-action"] == "Query"
+        assert records[2]["general-query"] == "SELECT 1"
+        assert records[3] == records[2]
+
+    def test_parse_invalid_last_message(self):
+        lines = ['{"messageType": "DATA_MESSAGE", "logGroup": ']
+        assert list(self.rds.parse(lines)) == []
+
+    def test_parse_postgresql(self):
+        line = self._message(
+            "/aws/rds/instance/pgdb/postgresql",
+            "2022-02-18 06:02:22 UTC:10.0.0.1(52718):postgres@mydb:[1234]:LOG:  statement: select 1",
+            "2022-02-18 06:02:23 UTC::@:[567]:LOG:  checkpoint starting: time",
+            "not a postgresql log",
+        )
+        records = list(self.rds.parse([line]))
+        assert records[0]["pg-host-name"] == "10.0.0.1(52718)"
+        assert records[0]["pg-user"] == "postgres"
+        assert records[0]["pg-db-name"] == "mydb"
+        assert records[0]["pg-pid"] == "1234"
+        assert records[0]["pg-level"] == "LOG"
+        assert records[0]["pg-detail"] == "statement: select 1"
+        assert records[0]["time"] == 1645164142837
+        assert records[1]["pg-pid"] == "567"
+        assert "pg-user" not in records[1] or records[1]["pg-user"] == ""
+        assert records[2]["log-detail"] == "not a postgresql log"
+
 class TestLogParser:
     def test_init(self):
         with pytest.raises(RuntimeError):
@@ -241,6 +422,64 @@ def test_log_entry():
     assert log.dict()["time"] == "2023-01-01T19:00:00-06:30"
 
 
+class TestRegex:
+    pattern = r"^(?P<time>\d+-\d+-\d+ \d+:\d+:\d+) (?P<level>\w+) \[(?P<class>[^\]]+)\] - (?P<message>.*)"
+    log = (
+        "NOT A JAVA LOG 0\n"
+        "2023-03-16 15:02:35 INFO [com.example.app.MyClass] - Request processed\n"
+        "2023-03-16 15:02:36 ERROR [com.example.app.MyClass] - Request failed\n"
+        "java.lang.IllegalStateException: failed\n"
+        "\tat com.example.app.MyClass.process(MyClass.java:10)\n"
+        "\tat com.example.app.MyClass.main(MyClass.java:5)\n"
+        "2023-03-16 15:02:37 WARN [com.example.app.MyClass] - Request retried"
+    )
+
+    def setup_method(self):
+        from log_processor.log_parser import MultiLineTextWithS3
+
+        self.regex = MultiLineTextWithS3()
+
+    def test_parse_for_s3_event(self):
+        lines = self.log.splitlines(True)
+        records = list(self.regex.parse_for_s3_event(lines, self.pattern, "time", "%Y-%m-%d %H:%M:%S"))
+
+        assert records == [
+            {"log": "NOT A JAVA LOG 0\n"},
+            {"time": "2023-03-16 15:02:35", "level": "INFO", "class": "com.example.app.MyClass", "message": "Request processed"},
+            {
+                "time": "2023-03-16 15:02:36",
+                "level": "ERROR",
+                "class": "com.example.app.MyClass",
+                "message": "Request failed"
+                "java.lang.IllegalStateException: failed\n"
+                "\tat com.example.app.MyClass.process(MyClass.java:10)\n"
+                "\tat com.example.app.MyClass.main(MyClass.java:5)\n",
+            },
+            {"time": "2023-03-16 15:02:37", "level": "WARN", "class": "com.example.app.MyClass", "message": "Request retried"},
+        ]
+        assert records[2].dict()["time"] == "2023-03-16T15:02:36"
+
+        # the records don't depend on the lines of a chunk
+        self.regex._chunk_lines = 2
+        assert list(self.regex.parse_for_s3_event(iter(lines), self.pattern, "time", "%Y-%m-%d %H:%M:%S")) == records
+
+    def test_max_record_size(self):
+        from log_processor.log_parser import MultiLineTextWithS3
+
+        lines = self.log.splitlines(True)
+        regex = MultiLineTextWithS3(max_record_size=120)
+        records = list(regex.parse_for_s3_event(lines, self.pattern))
+
+        assert len(records) == 5
+        assert records[2]["message"] == "Request failedjava.lang.IllegalStateException: failed\n"
+        assert records[3] == {
+            "log": "\tat com.example.app.MyClass.process(MyClass.java:10)\n"
+            "\tat com.example.app.MyClass.main(MyClass.java:5)\n"
+        }
+        assert records[4]["level"] == "WARN"
+        assert records[2]["message"] + records[3]["log"] == "Request failed" + "".join(lines[3:6])
+
+
 # def test_parse_json():
 #     for each in parse_by_json(
 #         [
@@ -57,6 +57,31 @@ class TestOpenSearch:
         resp = self.aos.create_index(format)
         assert resp.status_code == 201
     
+    def test_default_index_template_flattened_fields(self):
+        aos = OpenSearchUtil(
+            region=default_region,
+            endpoint=self.endpoint,
+            index_prefix=self.index_prefix,
+            log_type="CloudTrail",
+        )
+        properties = aos.default_index_template()["template"]["mappings"]["properties"]
+        assert properties["requestParameters"] == {"type": "keyword"}
+
+        template = aos.default_index_template(flattened_fields=["requestParameters", "responseElements"])
+        properties = template["template"]["mappings"]["properties"]
+        assert properties["requestParameters"] == {"type": "flat_object"}
+        assert properties["responseElements"] == {"type": "flat_object"}
+
+        aos = OpenSearchUtil(
+            region=default_region,
+            endpoint=self.endpoint,
+            index_prefix=self.index_prefix,
+            engine=Engine.ELASTICSEARCH,
+            log_type="CloudTrail",
+        )
+        template = aos.default_index_template(flattened_fields=["requestParameters"])
+        assert template["template"]["mappings"]["properties"]["requestParameters"] == {"type": "flattened"}
+
     def test_put_index_pattern(self, requests_mock):
         req = requests_mock
         
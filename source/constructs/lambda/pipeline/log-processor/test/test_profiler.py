@@ -0,0 +1,64 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import time
+import boto3
+import pytest
+from moto import mock_aws
+from event.profiler import InvocationProfiler, SamplingProfiler
+
+
+def busy_parser(seconds: float):
+    end = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < end:
+        count += sum(range(100))
+    return count
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=os.environ["BACKUP_BUCKET_NAME"])
+        yield s3
+
+
+def test_disabled_by_default(s3_client):
+    profiler = InvocationProfiler()
+    assert not profiler.start()
+    busy_parser(0.01)
+    assert profiler.stop("request-id") == ""
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=os.environ["BACKUP_BUCKET_NAME"])
+
+
+def test_upload_collapsed_stacks(s3_client):
+    profiler = InvocationProfiler()
+    assert profiler.start(sample_rate=1)
+    busy_parser(0.3)
+    key = profiler.stop("request-id")
+
+    assert key.startswith("profiling/index-prefix=hello/date=")
+    assert key.endswith("/request-id.collapsed")
+    body = s3_client.get_object(Bucket=os.environ["BACKUP_BUCKET_NAME"], Key=key)["Body"].read().decode()
+    lines = body.splitlines()
+    assert lines
+    busy_samples = 0
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        if "busy_parser (test_profiler.py:" in stack.split(";")[-1]:
+            busy_samples += int(count)
+    # the overhead cap can lengthen the interval on a loaded machine, only require some samples
+    assert busy_samples > 0
+
+
+def test_overhead_cap():
+    profiler = SamplingProfiler(interval_ms=1, max_overhead=1e-9)
+    profiler.start()
+    busy_parser(0.1)
+    profiler.stop()
+    # the interval is doubled after each sample which exceeds the overhead cap
+    assert profiler.interval >= 0.001 * 2 ** (profiler.samples - 1)
+    assert profiler.samples <= 7
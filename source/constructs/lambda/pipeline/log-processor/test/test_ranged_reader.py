@@ -0,0 +1,99 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import boto3
+import threading
+import pytest
+from moto import mock_aws
+import gzip
+from event.ranged_reader import get_byte_ranges, iter_lines, iter_lines_by_ranges
+
+
+@pytest.fixture
+def s3_object():
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        body = b"".join(
+            f"10.0.0.{i % 255} - - [13/Jan/2024:10:00:00 +0000] \"GET /{'a' * (i % 37)} HTTP/1.1\" 200 {i}".encode()
+            + (b"\r\n" if i % 5 == 0 else b"\n")
+            for i in range(100)
+        ) + b"last line without newline"
+        response = s3.put_object(Bucket="test-bucket", Key="test-key", Body=body)
+        yield s3, body, response["ETag"].strip('"')
+
+
+class ConcurrencyS3Client:
+    """A local S3 stand-in which records the peak number of GETs in flight, the first GETs wait
+    until expected GETs are in flight, so the peak doesn't depend on the timing of the threads"""
+
+    def __init__(self, body: bytes, expected: int):
+        self._body = body
+        self._expected = expected
+        self._lock = threading.Lock()
+        self._reached = threading.Event()
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            if self.in_flight >= self._expected:
+                self._reached.set()
+        try:
+            self._reached.wait(timeout=10)
+            start, end = (int(x) for x in Range.replace("bytes=", "").split("-"))
+            return {"Body": io.BytesIO(self._body[start : end + 1])}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_get_byte_ranges():
+    assert get_byte_ranges(0, 10) == []
+    assert get_byte_ranges(10, 10) == [(0, 9)]
+    assert get_byte_ranges(25, 10) == [(0, 9), (10, 19), (20, 24)]
+    assert get_byte_ranges(25, 10, start=7) == [(7, 16), (17, 24)]
+    assert get_byte_ranges(25, 10, start=25) == []
+
+
+@pytest.mark.parametrize("range_size", [64, 333, 1000, 1 << 20])
+def test_iter_lines_by_ranges(s3_object, range_size):
+    s3, body, etag = s3_object
+    expected = list(s3.get_object(Bucket="test-bucket", Key="test-key")["Body"].iter_lines(keepends=True))
+
+    lines = list(
+        iter_lines_by_ranges(s3, "test-bucket", "test-key", len(body), range_size, max_workers=4, etag=etag)
+    )
+    assert lines == expected
+    assert b"".join(lines) == body
+
+
+def test_iter_lines_with_separator():
+    data = b"a\r\nb\rc\n\nlast"
+    expected = list(iter(gzip.GzipFile(fileobj=io.BytesIO(gzip.compress(data))).readline, b""))
+    for size in (1, 2, 5, 100):
+        chunks = [data[i : i + size] for i in range(0, len(data), size)]
+        assert list(iter_lines(chunks, b"\n")) == expected
+
+
+def test_iter_lines_by_ranges_of_changed_object(s3_object):
+    s3, body, _ = s3_object
+    with pytest.raises(Exception):
+        list(iter_lines_by_ranges(s3, "test-bucket", "test-key", len(body), 1024, etag="mismatched"))
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_iter_lines_by_ranges_concurrency(max_workers):
+    body = b"".join(f"2024-01-13T10:00:00Z INFO request {i}\n".encode() for i in range(1000))
+    client = ConcurrencyS3Client(body, expected=max_workers)
+
+    lines = list(iter_lines_by_ranges(client, "bucket", "key", len(body), 1024, max_workers))
+    assert b"".join(lines) == body
+    assert client.requests == len(get_byte_ranges(len(body), 1024))
+    # the window of ranged GETs is full, and never larger than max_workers
+    assert client.peak == max_workers
@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import pytest
+from unittest.mock import patch
+from aws_lambda_powertools import Metrics
+from event.stage_timer import StageTimer
+
+
+def test_disabled_timer():
+    timer = StageTimer()
+    assert not timer.start(sample_rate=0)
+    with timer.stage("Parse"):
+        pass
+    assert list(timer.iter_timed([b"abc"], "S3Get")) == [b"abc"]
+    fileobj = io.BytesIO(b"abc")
+    assert timer.timed_reader(fileobj, "S3Get") is fileobj
+    assert timer.count == 0
+
+    metrics = Metrics(namespace="Solution/CL")
+    timer.put_metrics(metrics)
+    assert metrics.metric_set == {}
+
+
+class FakeClock:
+    """A perf_counter which only moves when it's advanced"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class SlowReader(io.BytesIO):
+    def __init__(self, data: bytes, clock: FakeClock):
+        super().__init__(data)
+        self._clock = clock
+
+    def read(self, size=-1):
+        self._clock.advance(0.001)
+        return super().read(size)
+
+
+def test_nested_stages():
+    clock = FakeClock()
+
+    def chunks():
+        clock.advance(0.002)
+        yield b"a" * 10
+        clock.advance(0.003)
+        yield b"b" * 5
+
+    with patch("event.stage_timer.time.perf_counter", clock):
+        timer = StageTimer()
+        assert timer.start(sample_rate=1)
+        with timer.stage("Parse"):
+            clock.advance(0.01)
+            with timer.stage("Bulk"):
+                clock.advance(0.05)
+            assert b"".join(timer.iter_timed(chunks(), "S3Get")) == b"a" * 10 + b"b" * 5
+            reader = timer.timed_reader(SlowReader(b"c" * 7, clock), "S3Get")
+            assert reader.read(4) + reader.read() == b"c" * 7
+
+        # the nested time is not included in the outer stage
+        assert timer._elapsed["Parse"] == pytest.approx(0.01)
+        assert timer._elapsed["Bulk"] == pytest.approx(0.05)
+        assert timer._elapsed["S3Get"] == pytest.approx(0.007)
+        assert timer.summary()["S3Get"] == {"ms": 7.0, "bytes": 22}
+        # Parse, Bulk, 3 next() of the chunks including the last one, and 2 reads
+        assert timer.count == 7
+        assert timer._bytes["S3Get"] == 22
+        timer.add_records(100)
+
+    metrics = Metrics(namespace="Solution/CL")
+    timer.put_metrics(metrics)
+    data = metrics.serialize_metric_set()
+    for name in ("ParseTime", "BulkTime", "S3GetTime", "S3GetBytes", "RecordsPerSecond"):
+        assert name in data
+    assert data["S3GetBytes"] == [22.0]
+    assert not timer.enabled
+    metrics.clear_metrics()
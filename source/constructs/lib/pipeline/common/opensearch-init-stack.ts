@@ -378,6 +378,8 @@ export class OpenSearchInitStack extends Construct {
         actions: [
           'lambda:UpdateFunctionConfiguration',
           'lambda:GetFunctionConfiguration',
+          // resume a large log object interrupted before the timeout
+          'lambda:InvokeFunction',
         ],
         resources: [
           `arn:${Aws.PARTITION}:lambda:${Aws.REGION}:${Aws.ACCOUNT_ID}:function:${Aws.STACK_NAME}-LogProcessorFn`,
@@ -433,6 +435,24 @@ export class OpenSearchInitStack extends Construct {
               `arn:${Aws.PARTITION}:s3:::${props.backupBucketName}/*`,
             ],
           }),
+          // read the checkpoints of large log objects, ListBucket makes a missing checkpoint a 404 instead of a 403
+          new iam.PolicyStatement({
+            actions: ['s3:GetObject'],
+            effect: iam.Effect.ALLOW,
+            resources: [
+              `arn:${Aws.PARTITION}:s3:::${props.backupBucketName}/checkpoint/*`,
+            ],
+          }),
+          new iam.PolicyStatement({
+            actions: ['s3:ListBucket'],
+            effect: iam.Effect.ALLOW,
+            resources: [`arn:${Aws.PARTITION}:s3:::${props.backupBucketName}`],
+            conditions: {
+              StringLike: {
+                's3:prefix': ['checkpoint/*'],
+              },
+            },
+          }),
         ],
       }
     );
@@ -147,7 +147,7 @@ export class RDSLogsToS3 extends Construct {
             },
           },
           sink: {
-            type: 's3',
+            type: 's3multipart',
             context: {
               bucket: props.bucketName,
               prefix: props.bucketPrefix,
@@ -166,7 +166,7 @@ export class WAFSampledStack extends Construct {
             },
           },
           sink: {
-            type: 's3',
+            type: 's3multipart',
             context: {
               bucket: props.bucketName,
               prefix: props.bucketPrefix,